@@ -0,0 +1,287 @@
+"""
+Animated snap transitions for SnapStack.
+Moves windows to their new geometry over a short duration, with one batched geometry call per display frame for all running animations.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Frames per second used when the display refresh rate is unknown
+DEFAULT_FRAME_RATE = 60.0
+
+# Seconds a transition takes by default
+DEFAULT_DURATION = 0.15
+
+# Weight of the newest frame in the moving average of frame call latency
+LATENCY_SMOOTHING = 0.3
+
+
+def ease_out(progress):
+    """Cubic ease-out: fast start, gentle landing."""
+    return 1 - (1 - progress) ** 3
+
+
+def interpolate(start, end, progress):
+    """
+    Get the geometry part of the way between two geometries.
+
+    Args:
+        start: (x, y, width, height) at progress 0
+        end: (x, y, width, height) at progress 1
+        progress: Fraction of the duration elapsed, from 0 to 1
+
+    Returns:
+        Tuple of integer (x, y, width, height)
+    """
+    eased = ease_out(min(1.0, max(0.0, progress)))
+    return tuple(round(first + (last - first) * eased) for first, last in zip(start, end))
+
+
+class Animation:
+    """One window moving from one geometry to another."""
+
+    __slots__ = ('window', 'start', 'end', 'started', 'duration', 'current')
+
+    def __init__(self, window, start, end, started, duration):
+        self.window = window
+        self.start = start
+        self.end = end
+        self.started = started
+        self.duration = duration
+        self.current = start
+
+    def __repr__(self):
+        return f"Animation(start={self.start}, end={self.end}, current={self.current})"
+
+
+class AnimationScheduler:
+    """
+    Drives every running transition from one shared frame tick.
+
+    Each frame computes the geometry every animating window should have
+    when the frame's native call lands, and applies all of them in one
+    apply_geometries() batch, so a bulk re-stack costs one call per frame
+    rather than one per window. Frames are paced to the frame rate. When a
+    batch takes longer than a frame, the frames that were missed are
+    dropped rather than queued. Once the next frame would land after an
+    animation's end, the final geometry is sent instead, so transitions
+    finish on time however slow the window system is.
+
+    Frames run on the scheduler's own thread, or through step() for
+    callers that drive the clock themselves.
+    """
+
+    def __init__(self, backend, duration=DEFAULT_DURATION, frame_rate=DEFAULT_FRAME_RATE, clock=time.monotonic):
+        """
+        Initialize an idle scheduler.
+
+        Args:
+            backend: WindowBackend the frames are applied to
+            duration: Seconds each transition takes
+            frame_rate: Frames per second, usually the display refresh rate
+            clock: Callable returning seconds, used for pacing and progress
+        """
+        self.backend = backend
+        self.duration = duration
+        self.frame_rate = frame_rate
+        self.clock = clock
+        self.animations = {}
+        self.latency = None
+        self.next_frame = None
+        self._in_frame = False
+        self._stopping = False
+        self._thread = None
+        self._condition = threading.Condition()
+        self.counters = {
+            'animations': 0, 'replaced': 0, 'frames': 0, 'frame_windows': 0, 'dropped_frames': 0,
+            'finished': 0, 'late': 0,
+        }
+
+    def start(self):
+        """Start the frame thread."""
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='snapstack-animation', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the frame thread and move every animating window straight to its end."""
+        if self._thread is not None:
+            with self._condition:
+                self._stopping = True
+                self._condition.notify_all()
+            self._thread.join(timeout)
+            self._thread = None
+        self.finish_all()
+
+    def animate(self, changes, starts):
+        """
+        Start moving windows towards new geometries.
+
+        A window that is already animating continues from where it is now;
+        one already heading to the same geometry is left alone.
+
+        Args:
+            changes: List of (window, x, y, width, height) tuples as committed,
+                None for a position or size that does not change
+            starts: Dictionary mapping window keys to the Geometry each window has now
+
+        Returns:
+            List of the changes that cannot be animated, because the window's
+            geometry is unknown, to be applied directly
+        """
+        immediate = []
+        key_of = self.backend.window_key
+        with self._condition:
+            now = self.clock()
+            for change in changes:
+                window = change[0]
+                key = key_of(window)
+                running = self.animations.get(key)
+                start = running.current if running else starts.get(key)
+                if start is None:
+                    immediate.append(change)
+                    continue
+                start = tuple(start)
+                end = tuple(start[index] if value is None else value for index, value in enumerate(change[1:]))
+                if running is not None:
+                    if running.end == end:
+                        continue
+                    self.counters['replaced'] += 1
+                    del self.animations[key]
+                if start == end:
+                    continue
+                self.animations[key] = Animation(window, start, end, now, self.duration)
+                self.counters['animations'] += 1
+            if self.animations and self.next_frame is None:
+                self.next_frame = now
+            self._condition.notify_all()
+        return immediate
+
+    def cancel(self, window):
+        """Stop animating a window, leaving it where the last frame put it."""
+        with self._condition:
+            self.animations.pop(self.backend.window_key(window), None)
+
+    def step(self):
+        """
+        Run the next frame if it is due.
+
+        Returns:
+            Seconds until the next frame is due, or None if nothing is animating
+        """
+        with self._condition:
+            if not self.animations:
+                self.next_frame = None
+                return None
+            now = self.clock()
+            if now < self.next_frame:
+                return self.next_frame - now
+
+            # Frames whose time passed while the previous batch ran are dropped
+            interval = 1.0 / self.frame_rate
+            missed = int((now - self.next_frame) / interval)
+            self.counters['dropped_frames'] += missed
+            self.next_frame += (missed + 1) * interval
+
+            latency = self.latency or 0.0
+            lands = now + latency
+            next_lands = max(self.next_frame, lands) + latency
+            changes = []
+            finished = []
+            for key, animation in list(self.animations.items()):
+                if next_lands >= animation.started + animation.duration:
+                    # No later frame would land in time, so this one ends the transition
+                    geometry = animation.end
+                    del self.animations[key]
+                    finished.append(animation)
+                else:
+                    geometry = interpolate(animation.start, animation.end, (lands - animation.started) / animation.duration)
+                animation.current = geometry
+                changes.append((animation.window,) + geometry)
+            self.counters['frames'] += 1
+            self.counters['frame_windows'] += len(changes)
+            self._in_frame = True
+
+        # The native call runs unlocked, so snaps queue new animations meanwhile
+        start = self.clock()
+        try:
+            self.backend.apply_geometries(changes)
+        except Exception as e:
+            logger.error("Error applying animation frame: %s", e)
+        done = self.clock()
+        elapsed = done - start
+        self.latency = elapsed if self.latency is None else (
+            LATENCY_SMOOTHING * elapsed + (1 - LATENCY_SMOOTHING) * self.latency
+        )
+
+        with self._condition:
+            self._in_frame = False
+            self.counters['finished'] += len(finished)
+            for animation in finished:
+                if done > animation.started + animation.duration + interval:
+                    self.counters['late'] += 1
+            if not self.animations:
+                self.next_frame = None
+            self._condition.notify_all()
+            return None if self.next_frame is None else max(0.0, self.next_frame - done)
+
+    def finish_all(self):
+        """Move every animating window to its end geometry in one batch."""
+        with self._condition:
+            changes = [(animation.window,) + animation.end for animation in self.animations.values()]
+            self.animations.clear()
+            self.next_frame = None
+            self._condition.notify_all()
+        if changes:
+            try:
+                self.backend.apply_geometries(changes)
+            except Exception as e:
+                logger.error("Error finishing animations: %s", e)
+
+    def wait_idle(self, timeout=None):
+        """
+        Wait until every transition has finished.
+
+        Args:
+            timeout: Seconds to wait at most, None to wait indefinitely
+
+        Returns:
+            Boolean: True if nothing is animating
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self.animations and not self._in_frame, timeout)
+
+    def _run(self):
+        """Frame loop: sleep until a frame is due, run it, repeat while anything animates."""
+        delay = None
+        while True:
+            with self._condition:
+                if delay is None:
+                    self._condition.wait_for(lambda: self.animations or self._stopping)
+                elif delay > 0:
+                    # New animations join the next tick, only stopping cuts the wait short
+                    self._condition.wait_for(lambda: self._stopping, delay)
+                if self._stopping:
+                    break
+            delay = self.step()
+
+    def stats(self):
+        """
+        Get the animation counters.
+
+        Returns:
+            Dictionary with animations started, frames run and dropped, windows
+            per frame, late finishes and the measured frame call latency
+        """
+        with self._condition:
+            stats = dict(self.counters, running=len(self.animations))
+        frames = stats['frames']
+        stats['windows_per_frame'] = stats['frame_windows'] / frames if frames else 0.0
+        stats['frame_latency_ms'] = (self.latency or 0.0) * 1000
+        stats['frame_rate'] = self.frame_rate
+        stats['duration'] = self.duration
+        return stats
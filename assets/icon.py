@@ -7,17 +7,24 @@ from PySide6.QtGui import QPainter, QPixmap, QColor, QPen, QBrush, QGuiApplicati
 from PySide6.QtCore import Qt, QRect
 import sys
 
-def generate_icon(size=256, app=None):
+# Bump whenever the drawing below changes, so cached renders are replaced
+GENERATOR_VERSION = 1
+
+def generate_icon(size=256, app=None, device_pixel_ratio=1.0):
     """
     Generate a simple icon for SnapStack.
     
     Args:
-        size: Size of the icon in pixels
+        size: Size of the icon in logical pixels
         app: Optional QApplication instance
+        device_pixel_ratio: Physical pixels per logical pixel of the target screen
     
     Returns:
-        QPixmap: The generated icon
+        QPixmap: The generated icon, `size` times `device_pixel_ratio` pixels wide
     """
+    logical_size = size
+    size = round(size * device_pixel_ratio)
+    
     # Create a QGuiApplication if one doesn't exist
     local_app = None
     if app is None and not QGuiApplication.instance():
@@ -77,6 +84,7 @@ def generate_icon(size=256, app=None):
     
     # End painting
     painter.end()
+    pixmap.setDevicePixelRatio(size / logical_size)
     
     # Clean up the local app if we created one
     # Note: We don't call exec() so it's just for initialization
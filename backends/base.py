@@ -0,0 +1,310 @@
+"""
+Window backend interface for SnapStack.
+A backend wraps one native window system so the snapping logic can stay platform independent.
+"""
+
+import logging
+import sys
+import threading
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.monitor_info import PHYSICAL, get_screen_info, get_system_platform
+
+logger = logging.getLogger(__name__)
+
+# Position and size of a window in screen coordinates
+Geometry = namedtuple('Geometry', ['x', 'y', 'width', 'height'])
+
+# What window rules match on: title, application or window class, and
+# executable name. Fields a backend cannot read are empty strings.
+WindowInfo = namedtuple('WindowInfo', ['title', 'app', 'process'])
+
+
+class WindowBackend:
+    """
+    Base class for native window backends.
+
+    Window objects returned by a backend are opaque to the caller and are
+    only ever passed back to the same backend.
+    """
+
+    name = 'base'
+
+    # Worker threads used to dispatch per-window calls of a batch concurrently.
+    # Backends whose native calls are not thread safe keep this at 1.
+    max_workers = 1
+
+    # Coordinates monitors and window geometries are reported and set in,
+    # PHYSICAL device pixels or LOGICAL pixels scaled by the monitor
+    coordinate_space = PHYSICAL
+
+    # Whether watch_windows() also reports the user dragging windows
+    reports_drags = False
+
+    def __init__(self):
+        """Initialize the call counters shared by all backends."""
+        self.native_calls = 0
+        self.calls_by_op = Counter()
+        self._counter_lock = threading.Lock()
+        self._executor = None
+
+    def count_call(self, op, count=1):
+        """
+        Record native calls made by the backend.
+
+        Args:
+            op: Short name of the native operation
+            count: Number of native calls the operation issued
+        """
+        with self._counter_lock:
+            self.native_calls += count
+            self.calls_by_op[op] += count
+
+    def reset_counters(self):
+        """Reset the native call counters."""
+        self.native_calls = 0
+        self.calls_by_op.clear()
+
+    def get_active_window(self):
+        """
+        Get the currently active/focused window.
+
+        Returns:
+            Window object or None if no window has focus
+        """
+        raise NotImplementedError
+
+    def enumerate_windows(self):
+        """
+        Get all visible top-level windows.
+
+        Returns:
+            List of window objects
+        """
+        raise NotImplementedError
+
+    def enumerate_window_geometries(self):
+        """
+        Get all visible top-level windows together with their geometry.
+
+        Backends override this when they can read every geometry in the
+        same pass as the enumeration.
+
+        Returns:
+            List of (window, Geometry) tuples
+        """
+        windows = []
+        for window in self.enumerate_windows():
+            geometry = self.get_geometry(window)
+            if geometry is not None:
+                windows.append((window, geometry))
+        return windows
+
+    def get_geometry(self, window):
+        """
+        Get the current position and size of a window.
+
+        Args:
+            window: Window object returned by this backend
+
+        Returns:
+            Geometry tuple or None if it cannot be read
+        """
+        raise NotImplementedError
+
+    def set_geometry(self, window, x, y, width, height):
+        """
+        Move and resize a window.
+
+        Args:
+            window: Window object returned by this backend
+            x, y: New top-left corner in screen coordinates
+            width, height: New size in pixels
+        """
+        raise NotImplementedError
+
+    def apply_geometries(self, changes):
+        """
+        Move and resize several windows as one batch.
+
+        Backends that can defer window positioning override this to issue
+        the whole batch as a single native operation. Otherwise each window
+        is set separately, spread over `max_workers` threads.
+
+        Args:
+            changes: List of (window, x, y, width, height) tuples, where x and y
+                or width and height may both be None to leave them unchanged
+        """
+        if self.max_workers > 1 and len(changes) > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='snapstack-native')
+            # Consume the results so errors from any worker are raised here
+            list(self._executor.map(self._apply_change, changes))
+        else:
+            for change in changes:
+                self._apply_change(change)
+
+    def _apply_change(self, change):
+        """Apply one change from apply_geometries() with set_geometry()."""
+        window, x, y, width, height = change
+        if x is None or width is None:
+            current = self.get_geometry(window)
+            if current is None:
+                return
+            if x is None:
+                x, y = current.x, current.y
+            if width is None:
+                width, height = current.width, current.height
+        self.set_geometry(window, x, y, width, height)
+
+    def window_key(self, window):
+        """
+        Get a hashable identity for a window.
+
+        Args:
+            window: Window object returned by this backend
+
+        Returns:
+            Value that is equal for every object referring to the same window
+        """
+        return window
+
+    def describe_window(self, window):
+        """
+        Get the title, application and process of a window.
+
+        Args:
+            window: Window object returned by this backend
+
+        Returns:
+            WindowInfo, with empty strings for what cannot be read
+        """
+        return WindowInfo('', '', '')
+
+    def watch_windows(self, listener):
+        """
+        Start delivering window events to a listener.
+
+        The listener's on_created(window, geometry), on_destroyed(window),
+        on_focus(window) and on_moved(window, geometry) methods may be
+        called from a backend thread. Backends with reports_drags set also
+        call on_move_start(window, x, y) when the user starts dragging a
+        window, on_drag(window, x, y) as the pointer moves and
+        on_move_end(window, x, y) when it is dropped, with the pointer
+        position in monitor coordinates.
+
+        Args:
+            listener: Object receiving the events, usually a WindowRegistry
+
+        Returns:
+            Boolean: True if events will be delivered, False if unsupported
+        """
+        return False
+
+    def unwatch_windows(self):
+        """Stop delivering window events."""
+        pass
+
+    def get_monitors(self):
+        """
+        Get information about all connected monitors.
+
+        Returns:
+            List of monitor objects with x, y, width, height and is_primary
+        """
+        return get_screen_info()
+
+    def get_work_areas(self, monitors):
+        """
+        Get the part of each monitor not covered by taskbars, docks or panels.
+
+        Args:
+            monitors: Monitor objects as returned by get_monitors()
+
+        Returns:
+            List of Rect in the same order as monitors, or None to use the full monitor bounds
+        """
+        return None
+
+    def get_scale_factors(self, monitors):
+        """
+        Get the scale factor of each monitor, e.g. 1.5 for 150%.
+
+        Args:
+            monitors: Monitor objects as returned by get_monitors()
+
+        Returns:
+            List of floats in the same order as monitors, or None for 1.0 everywhere
+        """
+        return None
+
+    def topology_token(self):
+        """
+        Get a cheap value that changes whenever the display configuration does.
+
+        Returns:
+            Comparable token, or None if the backend cannot detect changes itself
+        """
+        return None
+
+    def close(self):
+        """Release any native resources held by the backend."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class NullBackend(WindowBackend):
+    """Backend for platforms without native window control."""
+
+    name = 'null'
+
+    def get_active_window(self):
+        return None
+
+    def enumerate_windows(self):
+        return []
+
+    def enumerate_window_geometries(self):
+        return []
+
+    def get_geometry(self, window):
+        return None
+
+    def set_geometry(self, window, x, y, width, height):
+        pass
+
+    def apply_geometries(self, changes):
+        pass
+
+
+def create_backend(system=None):
+    """
+    Create the native backend for the current platform.
+
+    Args:
+        system: Platform name to create a backend for, defaults to the running one
+
+    Returns:
+        WindowBackend instance
+    """
+    system = system or get_system_platform()
+
+    if system == 'Windows':
+        from backends.windows import WindowsBackend
+        return WindowsBackend()
+    elif system == 'Darwin':  # macOS
+        from backends.macos import MacBackend
+        return MacBackend()
+    elif system == 'Linux':
+        try:
+            from backends.x11 import X11Backend
+            return X11Backend()
+        except Exception as e:
+            # No X server to talk to, e.g. a pure Wayland session
+            logger.warning("X11 backend unavailable, window control disabled: %s", e)
+            return NullBackend()
+
+    logger.warning("Unsupported platform: %s", system)
+    sys.exit(1)
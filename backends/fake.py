@@ -0,0 +1,242 @@
+"""
+In-memory window backend for SnapStack.
+Simulates windows and monitors so snapping can be tested and benchmarked without a desktop.
+"""
+
+import time
+
+from screeninfo import Monitor
+
+from backends.base import Geometry, WindowBackend, WindowInfo
+from utils.monitor_info import PHYSICAL
+
+
+class FakeWindow:
+    """A simulated top-level window."""
+
+    __slots__ = ('handle', 'title', 'app', 'process', 'x', 'y', 'width', 'height', 'visible')
+
+    def __init__(self, handle, title, app, x, y, width, height, visible=True, process=None):
+        self.handle = handle
+        self.title = title
+        self.app = app
+        self.process = process or app
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.visible = visible
+
+    def __repr__(self):
+        return (
+            f"FakeWindow(handle={self.handle}, title={self.title!r}, "
+            f"x={self.x}, y={self.y}, width={self.width}, height={self.height})"
+        )
+
+
+class FakeBackend(WindowBackend):
+    """
+    Deterministic in-memory window backend.
+
+    Every native operation sleeps for the configured latency before it
+    runs, so the cost of real window-system calls can be simulated.
+    """
+
+    name = 'fake'
+    reports_drags = True
+
+    def __init__(self, monitors=None, latency=0.0, batching=True, max_workers=1, scales=None, coordinate_space=PHYSICAL):
+        """
+        Initialize the fake backend.
+
+        Args:
+            monitors: List of monitor objects, defaults to one 1920x1080 display
+            latency: Seconds per native call, or a callable taking the
+                operation name and returning seconds
+            batching: Simulate a platform with deferred window positioning, where
+                a whole batch is one native call. When False every window in a
+                batch costs its own call.
+            max_workers: Threads used for per-window calls when batching is off
+            scales: Optional scale factor of each monitor, defaults to 1.0 everywhere
+            coordinate_space: PHYSICAL or LOGICAL, the coordinates of monitors and windows
+        """
+        super().__init__()
+        self.batching = batching
+        self.max_workers = max_workers
+        self.monitors = monitors or [Monitor(x=0, y=0, width=1920, height=1080, name='FAKE-1', is_primary=True)]
+        self.work_areas = None
+        self.scales = scales
+        self.coordinate_space = coordinate_space
+        self.topology_version = 0
+        self.latency = latency
+        self.windows = {}
+        self.active_handle = None
+        self.listener = None
+        self.dragging = None
+        self._next_handle = 1
+
+    def _native_call(self, op, count=1):
+        """Count a native call and simulate its latency."""
+        self.count_call(op, count)
+        delay = self.latency(op) if callable(self.latency) else self.latency
+        if delay:
+            time.sleep(delay * count)
+
+    def add_window(self, title='Window', app='app', x=0, y=0, width=800, height=600, visible=True, focus=True,
+                   process=None, handle=None):
+        """
+        Create a simulated window.
+
+        Args:
+            title: Window title
+            app: Owning application name
+            x, y, width, height: Initial geometry
+            visible: Whether the window is shown
+            focus: Make the new window the active one
+            process: Executable name, defaults to the application name
+            handle: Window key to use, e.g. one from a recorded trace, defaults to the next free number
+
+        Returns:
+            The new FakeWindow
+        """
+        if handle is None:
+            handle = self._next_handle
+            self._next_handle += 1
+        window = FakeWindow(handle, title, app, x, y, width, height, visible, process)
+        self.windows[window.handle] = window
+        if self.listener and visible:
+            self.listener.on_created(window, Geometry(x, y, width, height))
+        if focus:
+            self.focus(window)
+        return window
+
+    def close_window(self, window):
+        """Destroy a simulated window."""
+        self.windows.pop(window.handle, None)
+        if self.active_handle == window.handle:
+            self.active_handle = None
+        if self.listener:
+            self.listener.on_destroyed(window)
+
+    def set_monitors(self, monitors, work_areas=None, scales=None):
+        """
+        Simulate a display configuration change.
+
+        Args:
+            monitors: New list of monitor objects
+            work_areas: Optional list of Rect work areas, one per monitor
+            scales: Optional list of scale factors, one per monitor
+        """
+        self.monitors = list(monitors)
+        self.work_areas = work_areas
+        self.scales = scales
+        self.topology_version += 1
+
+    def focus(self, window):
+        """Make a simulated window the active one."""
+        self.active_handle = window.handle if window else None
+        if self.listener:
+            self.listener.on_focus(window)
+
+    def move_window(self, window, x, y, width, height):
+        """Simulate the user moving a window, without counting a native call."""
+        window.x, window.y, window.width, window.height = x, y, width, height
+        if self.listener:
+            self.listener.on_moved(window, Geometry(x, y, width, height))
+
+    def start_drag(self, window, x, y):
+        """Simulate the user grabbing a window with the pointer at (x, y)."""
+        # Offset of the pointer within the window, kept for the whole drag
+        self.dragging = (window, x - window.x, y - window.y)
+        if self.listener:
+            self.listener.on_move_start(window, x, y)
+
+    def drag_to(self, x, y):
+        """Simulate the pointer moving the dragged window, without counting a native call."""
+        window, offset_x, offset_y = self.dragging
+        self.move_window(window, x - offset_x, y - offset_y, window.width, window.height)
+        if self.listener:
+            self.listener.on_drag(window, x, y)
+
+    def end_drag(self, x, y):
+        """Simulate the user dropping the dragged window with the pointer at (x, y)."""
+        window = self.dragging[0]
+        self.dragging = None
+        if self.listener:
+            self.listener.on_move_end(window, x, y)
+
+    def get_active_window(self):
+        self._native_call('get_active_window')
+        return self.windows.get(self.active_handle)
+
+    def enumerate_windows(self):
+        self._native_call('enumerate_windows')
+        return [window for window in self.windows.values() if window.visible]
+
+    def enumerate_window_geometries(self):
+        self._native_call('enumerate_windows')
+        return [
+            (window, Geometry(window.x, window.y, window.width, window.height))
+            for window in self.windows.values() if window.visible
+        ]
+
+    def get_geometry(self, window):
+        self._native_call('get_geometry')
+        return Geometry(window.x, window.y, window.width, window.height)
+
+    def set_geometry(self, window, x, y, width, height):
+        self._native_call('set_geometry')
+        window.x = x
+        window.y = y
+        window.width = width
+        window.height = height
+        if self.listener:
+            self.listener.on_moved(window, Geometry(x, y, width, height))
+
+    def apply_geometries(self, changes):
+        if not self.batching:
+            super().apply_geometries(changes)
+            return
+
+        # Simulates a deferred batch: one native call however many windows move
+        self._native_call('apply_geometries')
+        for window, x, y, width, height in changes:
+            if x is not None:
+                window.x = x
+                window.y = y
+            if width is not None:
+                window.width = width
+                window.height = height
+            if self.listener:
+                self.listener.on_moved(window, Geometry(window.x, window.y, window.width, window.height))
+
+    def window_key(self, window):
+        return window.handle
+
+    def describe_window(self, window):
+        self._native_call('describe_window')
+        return WindowInfo(window.title, window.app, window.process)
+
+    def watch_windows(self, listener):
+        # Events are delivered synchronously from the simulated operations
+        self.listener = listener
+        return True
+
+    def unwatch_windows(self):
+        self.listener = None
+
+    def get_monitors(self):
+        self._native_call('get_monitors')
+        return list(self.monitors)
+
+    def get_work_areas(self, monitors):
+        self._native_call('get_work_areas')
+        return self.work_areas
+
+    def get_scale_factors(self, monitors):
+        self._native_call('get_scale_factors')
+        return self.scales
+
+    def topology_token(self):
+        self._native_call('topology_token')
+        return self.topology_version
@@ -0,0 +1,193 @@
+"""
+macOS backend for SnapStack.
+Controls windows through AppleScript run with osascript.
+"""
+
+import logging
+import re
+import subprocess
+
+from screeninfo import Monitor
+
+from backends.base import Geometry, WindowBackend, WindowInfo
+from utils.monitor_info import LOGICAL
+
+logger = logging.getLogger(__name__)
+
+# Lines of `system_profiler SPDisplaysDataType` describing a display's size:
+# "Resolution: 3024 x 1964 Retina" in pixels and "UI Looks like: 1512 x 982 @ 120.00Hz" in points
+RESOLUTION_PATTERN = re.compile(r'^\s*Resolution:\s*(\d+)\s*x\s*(\d+)', re.MULTILINE)
+LOOKS_LIKE_PATTERN = re.compile(r'^\s*UI Looks like:\s*(\d+)\s*x\s*(\d+)', re.MULTILINE)
+
+# Returns "app, window" for the frontmost window
+ACTIVE_WINDOW_SCRIPT = '''
+tell application "System Events"
+    set frontApp to name of first application process whose frontmost is true
+    set frontWindow to name of front window of application process frontApp
+    return {frontApp, frontWindow}
+end tell
+'''
+
+# Returns one "app<TAB>window" line per window of every visible application
+LIST_WINDOWS_SCRIPT = '''
+set output to ""
+tell application "System Events"
+    repeat with proc in (every application process whose visible is true)
+        repeat with win in (every window of proc)
+            set output to output & (name of proc) & tab & (name of win) & linefeed
+        end repeat
+    end repeat
+end tell
+return output
+'''
+
+# Returns one "app<TAB>window<TAB>x<TAB>y<TAB>width<TAB>height" line per window
+LIST_WINDOW_GEOMETRIES_SCRIPT = '''
+set output to ""
+tell application "System Events"
+    repeat with proc in (every application process whose visible is true)
+        repeat with win in (every window of proc)
+            set {px, py} to position of win
+            set {sx, sy} to size of win
+            set output to output & (name of proc) & tab & (name of win) & tab & px & tab & py & tab & sx & tab & sy & linefeed
+        end repeat
+    end repeat
+end tell
+return output
+'''
+
+
+def _quote(text):
+    """Escape a string for use inside an AppleScript string literal."""
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _window_reference(window):
+    """Build the AppleScript reference for a window dictionary."""
+    if window.get('window'):
+        return f'window "{_quote(window["window"])}"'
+    return 'front window'
+
+
+def _bounds_script(window, x, y, width, height):
+    """Build the AppleScript that sets the bounds of one window."""
+    return f'''
+    tell application "{_quote(window['app'])}"
+        set bounds of {_window_reference(window)} to {{{x}, {y}, {x + width}, {y + height}}}
+    end tell
+    '''
+
+
+class MacBackend(WindowBackend):
+    """Window backend for macOS."""
+
+    name = 'macos'
+
+    coordinate_space = LOGICAL
+
+    # Scale factors of the monitors last read by get_monitors()
+    _scales = None
+
+    def _run_script(self, op, script):
+        """Run an AppleScript snippet and return the completed process."""
+        self.count_call(op)
+        return subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
+
+    def get_active_window(self):
+        result = self._run_script('get_active_window', ACTIVE_WINDOW_SCRIPT)
+        if result.returncode == 0:
+            app_name, window_name = result.stdout.strip().split(", ", 1)
+            return {"app": app_name, "window": window_name}
+        return None
+
+    def enumerate_windows(self):
+        result = self._run_script('enumerate_windows', LIST_WINDOWS_SCRIPT)
+        if result.returncode != 0:
+            return []
+
+        windows = []
+        for line in result.stdout.splitlines():
+            if '\t' in line:
+                app_name, window_name = line.split('\t', 1)
+                windows.append({"app": app_name, "window": window_name})
+        return windows
+
+    def enumerate_window_geometries(self):
+        result = self._run_script('enumerate_window_geometries', LIST_WINDOW_GEOMETRIES_SCRIPT)
+        if result.returncode != 0:
+            return []
+
+        windows = []
+        for line in result.stdout.splitlines():
+            fields = line.rsplit('\t', 4)
+            if len(fields) != 5 or '\t' not in fields[0]:
+                continue
+            app_name, window_name = fields[0].split('\t', 1)
+            try:
+                geometry = Geometry(*(int(float(value)) for value in fields[1:]))
+            except ValueError:
+                continue
+            windows.append(({"app": app_name, "window": window_name}, geometry))
+        return windows
+
+    def get_geometry(self, window):
+        script = f'''
+        tell application "{_quote(window['app'])}"
+            get bounds of {_window_reference(window)}
+        end tell
+        '''
+        result = self._run_script('get_geometry', script)
+        if result.returncode != 0:
+            return None
+
+        left, top, right, bottom = (int(value) for value in result.stdout.strip().split(", "))
+        return Geometry(left, top, right - left, bottom - top)
+
+    def set_geometry(self, window, x, y, width, height):
+        # Use AppleScript to position and resize the window
+        self._run_script('set_geometry', _bounds_script(window, x, y, width, height))
+
+    def apply_geometries(self, changes):
+        complete = [change for change in changes if change[1] is not None and change[3] is not None]
+        partial = [change for change in changes if change[1] is None or change[3] is None]
+
+        # One osascript process sets the bounds of every window in the batch
+        if complete:
+            script = ''.join(_bounds_script(*change) for change in complete)
+            self._run_script('apply_geometries', script)
+        if partial:
+            super().apply_geometries(partial)
+
+    def window_key(self, window):
+        return (window['app'], window['window'])
+
+    def describe_window(self, window):
+        # Window dictionaries already carry the names; the process is the application
+        return WindowInfo(window.get('window') or '', window['app'], window['app'])
+
+    def get_monitors(self):
+        self.count_call('get_monitors')
+        output = subprocess.getoutput("system_profiler SPDisplaysDataType")
+
+        # Only the first display is reported with a known position
+        resolution = RESOLUTION_PATTERN.search(output)
+        if resolution is None:
+            logger.error("Error reading display resolution: no Resolution line in system_profiler output")
+            self._scales = None
+            return super().get_monitors()
+        pixels_wide, pixels_high = int(resolution.group(1)), int(resolution.group(2))
+
+        # AppleScript positions windows in points, so the monitor is reported
+        # in points too; without the UI size a Retina display looks twice as large
+        following = RESOLUTION_PATTERN.search(output, resolution.end())
+        looks_like = LOOKS_LIKE_PATTERN.search(output, resolution.end(), following.start() if following else len(output))
+        if looks_like is not None:
+            width, height = int(looks_like.group(1)), int(looks_like.group(2))
+        else:
+            width, height = pixels_wide, pixels_high
+        self._scales = [pixels_wide / width]
+        return [Monitor(x=0, y=0, width=width, height=height, is_primary=True)]
+
+    def get_scale_factors(self, monitors):
+        # Read together with the monitors, system_profiler is slow
+        return self._scales
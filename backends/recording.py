@@ -0,0 +1,323 @@
+"""
+Recording window backend for SnapStack.
+Wraps another backend and writes every native call, window event, hotkey event and snap command to a compact trace file for later replay.
+"""
+
+import gzip
+import json
+import logging
+import threading
+import time
+
+from backends.base import WindowBackend
+
+logger = logging.getLogger(__name__)
+
+# First line of every trace file identifies it
+TRACE_FORMAT = 'snapstack-trace'
+TRACE_VERSION = 1
+
+# Record kinds, the first field of every record line:
+# ['op', t, name, args, result, seconds]   a native call and how long it took
+# ['event', t, name, args]                 a window event the backend reported
+# ['key', t, down, name]                   a key event seen by the hotkey engine
+# ['command', t, action, layout, slot, window, name, monitor]
+#                                          a SnapCommand queued with submit()
+# ['batch', t, [[action, layout, slot, window, name, monitor], ...]]
+#                                          SnapCommands passed to run_batch()
+# `t` is seconds since recording started, windows are written as their key
+# and monitors as their index.
+
+# Seconds between flushes, so a session that is killed still leaves a readable trace
+FLUSH_SECONDS = 1.0
+
+
+class TraceWriter:
+    """
+    Appends records to a gzip-compressed JSON lines file.
+
+    Records come from the executor, the hotkey hook and the backend's
+    event thread, so writes go through one lock.
+    """
+
+    def __init__(self, path, header=None):
+        """
+        Open the trace file and write its header.
+
+        Args:
+            path: File to write, replaced if it exists
+            header: Optional dictionary stored in the header line, e.g. the backend and config
+        """
+        self.path = path
+        self.started = time.monotonic()
+        self.records = 0
+        self._flushed = self.started
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._lock = threading.Lock()
+        first = {'format': TRACE_FORMAT, 'version': TRACE_VERSION, 'recorded_at': time.time()}
+        first.update(header or {})
+        self._file.write(json.dumps(first, default=repr) + '\n')
+
+    def now(self):
+        """Get the seconds since recording started."""
+        return round(time.monotonic() - self.started, 6)
+
+    def write(self, record):
+        """Append one record list."""
+        line = json.dumps(record, separators=(',', ':'), default=repr) + '\n'
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self.records += 1
+            now = time.monotonic()
+            if now - self._flushed >= FLUSH_SECONDS:
+                self._file.flush()
+                self._flushed = now
+
+    def close(self):
+        """Flush and close the file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_trace(path):
+    """
+    Read a trace file.
+
+    Returns:
+        Tuple of (header dictionary, list of record lists)
+
+    A trace cut short, e.g. by killing the app, is read up to its last
+    complete record.
+
+    Raises:
+        ValueError: If the file is not a SnapStack trace of a known version
+    """
+    records = []
+    with gzip.open(path, 'rt', encoding='utf-8') as trace_file:
+        header = json.loads(trace_file.readline() or 'null')
+        if not isinstance(header, dict) or header.get('format') != TRACE_FORMAT:
+            raise ValueError(f"{path} is not a SnapStack trace")
+        if header.get('version') != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version {header.get('version')} in {path}")
+        try:
+            for line in trace_file:
+                records.append(json.loads(line))
+        except (EOFError, ValueError) as e:
+            logger.warning("Trace %s is truncated after %d records: %s", path, len(records), e)
+    return header, records
+
+
+def encode_command(command, key_of):
+    """
+    Write a SnapCommand as the list stored in command records.
+
+    Args:
+        command: SnapCommand
+        key_of: Callable giving a window's key, e.g. a backend's window_key
+
+    Returns:
+        List of [action, layout, slot, window, name, monitor]
+    """
+    return [
+        command.action, command.layout, command.slot,
+        None if command.window is None else key_of(command.window), command.name,
+        None if command.monitor is None else command.monitor.index,
+    ]
+
+
+def _geometry(value):
+    """Write a Geometry or Rect as a list, None as None."""
+    return None if value is None else list(value)
+
+
+class RecordingListener:
+    """Window event listener that writes each event to the trace before passing it on."""
+
+    def __init__(self, backend, listener):
+        self.backend = backend
+        self.listener = listener
+
+    def _record(self, name, window, *args):
+        backend = self.backend
+        key = None if window is None else backend.key_of(window)
+        backend.writer.write(['event', backend.writer.now(), name, [key] + list(args)])
+
+    def on_created(self, window, geometry=None):
+        self._record('created', window, _geometry(geometry))
+        self.listener.on_created(window, geometry)
+
+    def on_destroyed(self, window):
+        self._record('destroyed', window)
+        self.listener.on_destroyed(window)
+
+    def on_focus(self, window):
+        self._record('focus', window)
+        self.listener.on_focus(window)
+
+    def on_moved(self, window, geometry):
+        self._record('moved', window, _geometry(geometry))
+        self.listener.on_moved(window, geometry)
+
+    def on_move_start(self, window, x, y):
+        self._record('move_start', window, x, y)
+        self.listener.on_move_start(window, x, y)
+
+    def on_drag(self, window, x, y):
+        self._record('drag', window, x, y)
+        self.listener.on_drag(window, x, y)
+
+    def on_move_end(self, window, x, y):
+        self._record('move_end', window, x, y)
+        self.listener.on_move_end(window, x, y)
+
+
+class RecordingBackend(WindowBackend):
+    """
+    Backend wrapper that records a session into a trace.
+
+    Every call is passed to the wrapped backend unchanged and written to
+    the trace with its arguments, result and duration. Window objects are
+    written as their window_key() and monitors as plain lists, so the
+    trace can be replayed without the window system it came from. Call
+    counters are the wrapped backend's.
+
+    Also set as the `recorder` of a HotkeyEngine and a SnapExecutor to
+    capture key events and queued commands.
+    """
+
+    def __init__(self, backend, writer):
+        """
+        Wrap a backend.
+
+        Args:
+            backend: WindowBackend doing the real work
+            writer: TraceWriter receiving the records
+        """
+        # The base class counters are replaced by the wrapped backend's
+        self._executor = None
+        self.backend = backend
+        self.writer = writer
+        self.name = backend.name
+        self.max_workers = backend.max_workers
+        self.coordinate_space = backend.coordinate_space
+        self.reports_drags = backend.reports_drags
+        self.key_of = backend.window_key
+
+    @property
+    def native_calls(self):
+        return self.backend.native_calls
+
+    @property
+    def calls_by_op(self):
+        return self.backend.calls_by_op
+
+    def count_call(self, op, count=1):
+        self.backend.count_call(op, count)
+
+    def reset_counters(self):
+        self.backend.reset_counters()
+
+    def _call(self, name, args, encode, method, *call_args):
+        """Run a call on the wrapped backend and record it with its encoded result."""
+        start = time.perf_counter()
+        t = self.writer.now()
+        try:
+            result = method(*call_args)
+        except Exception as e:
+            self.writer.write(['op', t, name, args, {'error': str(e)}, round(time.perf_counter() - start, 6)])
+            raise
+        self.writer.write(['op', t, name, args, encode(result), round(time.perf_counter() - start, 6)])
+        return result
+
+    def _window_key(self, window):
+        return None if window is None else self.key_of(window)
+
+    def get_active_window(self):
+        return self._call('get_active_window', [], self._window_key, self.backend.get_active_window)
+
+    def enumerate_windows(self):
+        return self._call(
+            'enumerate_windows', [], lambda windows: [self.key_of(window) for window in windows],
+            self.backend.enumerate_windows,
+        )
+
+    def enumerate_window_geometries(self):
+        return self._call(
+            'enumerate_window_geometries', [],
+            lambda items: [[self.key_of(window)] + list(geometry) for window, geometry in items],
+            self.backend.enumerate_window_geometries,
+        )
+
+    def get_geometry(self, window):
+        return self._call('get_geometry', [self.key_of(window)], _geometry, self.backend.get_geometry, window)
+
+    def set_geometry(self, window, x, y, width, height):
+        return self._call(
+            'set_geometry', [self.key_of(window), x, y, width, height], lambda result: None,
+            self.backend.set_geometry, window, x, y, width, height,
+        )
+
+    def apply_geometries(self, changes):
+        args = [[self.key_of(change[0])] + list(change[1:]) for change in changes]
+        return self._call('apply_geometries', args, lambda result: None, self.backend.apply_geometries, changes)
+
+    def window_key(self, window):
+        return self.key_of(window)
+
+    def describe_window(self, window):
+        return self._call('describe_window', [self.key_of(window)], list, self.backend.describe_window, window)
+
+    def watch_windows(self, listener):
+        return self.backend.watch_windows(RecordingListener(self, listener))
+
+    def unwatch_windows(self):
+        self.backend.unwatch_windows()
+
+    def get_monitors(self):
+        return self._call(
+            'get_monitors', [],
+            lambda monitors: [
+                [monitor.x, monitor.y, monitor.width, monitor.height, getattr(monitor, 'name', None),
+                 bool(getattr(monitor, 'is_primary', False))]
+                for monitor in monitors
+            ],
+            self.backend.get_monitors,
+        )
+
+    def get_work_areas(self, monitors):
+        return self._call(
+            'get_work_areas', [],
+            lambda areas: None if areas is None else [_geometry(area) for area in areas],
+            self.backend.get_work_areas, monitors,
+        )
+
+    def get_scale_factors(self, monitors):
+        return self._call(
+            'get_scale_factors', [], lambda scales: None if scales is None else list(scales),
+            self.backend.get_scale_factors, monitors,
+        )
+
+    def topology_token(self):
+        return self._call('topology_token', [], lambda token: token, self.backend.topology_token)
+
+    def record_key(self, down, name):
+        """Record a key event, called by HotkeyEngine.feed()."""
+        self.writer.write(['key', self.writer.now(), down, name])
+
+    def record_command(self, command):
+        """Record a SnapCommand passed to SnapExecutor.submit()."""
+        self.writer.write(['command', self.writer.now()] + encode_command(command, self.key_of))
+
+    def record_batch(self, commands):
+        """Record the SnapCommands passed to SnapExecutor.run_batch()."""
+        self.writer.write(['batch', self.writer.now(), [encode_command(command, self.key_of) for command in commands]])
+
+    def close(self):
+        """Close the wrapped backend and the trace."""
+        self.backend.close()
+        self.writer.close()
+        logger.info("Trace with %d records written to %s", self.writer.records, self.writer.path)
@@ -0,0 +1,440 @@
+"""
+Windows backend for SnapStack.
+Finds windows through pygetwindow and positions them with the Win32 API.
+"""
+
+import ctypes
+import logging
+import ntpath
+import threading
+from ctypes import wintypes
+
+import pygetwindow as gw
+
+from backends.base import Geometry, WindowBackend, WindowInfo
+from utils.monitor_info import Rect
+
+logger = logging.getLogger(__name__)
+
+user32 = ctypes.WinDLL('user32', use_last_error=True)
+
+user32.SetWindowPos.argtypes = [
+    wintypes.HWND, wintypes.HWND, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int, wintypes.UINT
+]
+user32.SetWindowPos.restype = wintypes.BOOL
+user32.BeginDeferWindowPos.argtypes = [ctypes.c_int]
+user32.BeginDeferWindowPos.restype = wintypes.HANDLE
+user32.DeferWindowPos.argtypes = [
+    wintypes.HANDLE, wintypes.HWND, wintypes.HWND,
+    ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int, wintypes.UINT
+]
+user32.DeferWindowPos.restype = wintypes.HANDLE
+user32.EndDeferWindowPos.argtypes = [wintypes.HANDLE]
+user32.EndDeferWindowPos.restype = wintypes.BOOL
+user32.IsZoomed.argtypes = [wintypes.HWND]
+user32.IsZoomed.restype = wintypes.BOOL
+user32.ShowWindow.argtypes = [wintypes.HWND, ctypes.c_int]
+user32.ShowWindow.restype = wintypes.BOOL
+
+
+class MONITORINFO(ctypes.Structure):
+    _fields_ = [
+        ('cbSize', wintypes.DWORD),
+        ('rcMonitor', wintypes.RECT),
+        ('rcWork', wintypes.RECT),
+        ('dwFlags', wintypes.DWORD),
+    ]
+
+
+user32.MonitorFromPoint.argtypes = [wintypes.POINT, wintypes.DWORD]
+user32.MonitorFromPoint.restype = wintypes.HMONITOR
+user32.GetMonitorInfoW.argtypes = [wintypes.HMONITOR, ctypes.POINTER(MONITORINFO)]
+user32.GetMonitorInfoW.restype = wintypes.BOOL
+user32.GetSystemMetrics.argtypes = [ctypes.c_int]
+user32.GetSystemMetrics.restype = ctypes.c_int
+
+WINEVENTPROC = ctypes.WINFUNCTYPE(
+    None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+    wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+)
+
+user32.SetWinEventHook.argtypes = [
+    wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WINEVENTPROC,
+    wintypes.DWORD, wintypes.DWORD, wintypes.DWORD
+]
+user32.SetWinEventHook.restype = wintypes.HANDLE
+user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+user32.UnhookWinEvent.restype = wintypes.BOOL
+user32.GetMessageW.argtypes = [ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT]
+user32.GetMessageW.restype = wintypes.BOOL
+user32.TranslateMessage.argtypes = [ctypes.POINTER(wintypes.MSG)]
+user32.DispatchMessageW.argtypes = [ctypes.POINTER(wintypes.MSG)]
+user32.PostThreadMessageW.argtypes = [wintypes.DWORD, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+user32.PostThreadMessageW.restype = wintypes.BOOL
+user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+user32.GetAncestor.restype = wintypes.HWND
+user32.IsWindowVisible.argtypes = [wintypes.HWND]
+user32.IsWindowVisible.restype = wintypes.BOOL
+user32.GetWindowRect.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.RECT)]
+user32.GetWindowRect.restype = wintypes.BOOL
+user32.GetWindowTextW.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
+user32.GetWindowTextW.restype = ctypes.c_int
+user32.GetClassNameW.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
+user32.GetClassNameW.restype = ctypes.c_int
+user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.DWORD)]
+user32.GetWindowThreadProcessId.restype = wintypes.DWORD
+user32.GetCursorPos.argtypes = [ctypes.POINTER(wintypes.POINT)]
+user32.GetCursorPos.restype = wintypes.BOOL
+
+try:
+    # Windows 8.1 and later
+    shcore = ctypes.WinDLL('shcore', use_last_error=True)
+    shcore.GetDpiForMonitor.argtypes = [
+        wintypes.HMONITOR, ctypes.c_int, ctypes.POINTER(wintypes.UINT), ctypes.POINTER(wintypes.UINT)
+    ]
+    shcore.GetDpiForMonitor.restype = ctypes.c_long
+except OSError:
+    shcore = None
+
+kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+kernel32.GetCurrentThreadId.restype = wintypes.DWORD
+kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+kernel32.OpenProcess.restype = wintypes.HANDLE
+kernel32.QueryFullProcessImageNameW.argtypes = [
+    wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR, ctypes.POINTER(wintypes.DWORD)
+]
+kernel32.QueryFullProcessImageNameW.restype = wintypes.BOOL
+kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+kernel32.CloseHandle.restype = wintypes.BOOL
+
+SWP_NOSIZE = 0x0001
+SWP_NOMOVE = 0x0002
+SWP_NOZORDER = 0x0004
+SWP_NOACTIVATE = 0x0010
+SW_RESTORE = 9
+MONITOR_DEFAULTTONEAREST = 2
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+MAX_TEXT = 512
+MDT_EFFECTIVE_DPI = 0
+DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE_V2 = -4
+PROCESS_PER_MONITOR_DPI_AWARE = 2
+DEFAULT_DPI = 96
+
+# WinEvent constants for the events the window registry needs
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_SYSTEM_MOVESIZESTART = 0x000A
+EVENT_SYSTEM_MOVESIZEEND = 0x000B
+EVENT_SYSTEM_MINIMIZESTART = 0x0016
+EVENT_SYSTEM_MINIMIZEEND = 0x0017
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+GA_ROOT = 2
+WM_QUIT = 0x0012
+
+# Event ranges hooked, kept narrow so unrelated events never reach Python
+HOOKED_EVENT_RANGES = (
+    (EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND),
+    (EVENT_SYSTEM_MOVESIZESTART, EVENT_SYSTEM_MOVESIZEEND),
+    (EVENT_SYSTEM_MINIMIZESTART, EVENT_SYSTEM_MINIMIZEEND),
+    (EVENT_OBJECT_CREATE, EVENT_OBJECT_HIDE),
+    (EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_LOCATIONCHANGE),
+)
+
+# GetSystemMetrics indices describing the virtual screen and monitor count
+DISPLAY_METRICS = (
+    76,  # SM_XVIRTUALSCREEN
+    77,  # SM_YVIRTUALSCREEN
+    78,  # SM_CXVIRTUALSCREEN
+    79,  # SM_CYVIRTUALSCREEN
+    80,  # SM_CMONITORS
+)
+
+
+def _position_flags(x, width):
+    """Build SetWindowPos flags for a change that may leave position or size alone."""
+    flags = SWP_NOZORDER | SWP_NOACTIVATE
+    if x is None:
+        flags |= SWP_NOMOVE
+    if width is None:
+        flags |= SWP_NOSIZE
+    return flags
+
+
+def _enable_dpi_awareness():
+    """
+    Make the process per-monitor DPI aware.
+
+    Without it Windows scales the coordinates of every window and monitor
+    for a DPI-unaware process, so on mixed-DPI setups snap geometry lands
+    on the wrong pixels and needs a corrective resize. Must run before
+    monitors are read; Qt asks for the same mode later and keeps it.
+    """
+    try:
+        # Windows 10 1703 and later
+        if user32.SetProcessDpiAwarenessContext(ctypes.c_void_p(DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE_V2)):
+            return
+    except AttributeError:
+        pass
+    if shcore is not None:
+        shcore.SetProcessDpiAwareness(PROCESS_PER_MONITOR_DPI_AWARE)
+    else:
+        user32.SetProcessDPIAware()
+
+
+def _monitor_handle(monitor):
+    """Get the HMONITOR of a screeninfo monitor from its center."""
+    center = wintypes.POINT(monitor.x + monitor.width // 2, monitor.y + monitor.height // 2)
+    return user32.MonitorFromPoint(center, MONITOR_DEFAULTTONEAREST)
+
+
+def _window_rect(hwnd):
+    """Read the screen rectangle of a window, or None if it is gone."""
+    rect = wintypes.RECT()
+    if not user32.GetWindowRect(hwnd, ctypes.byref(rect)):
+        return None
+    return Geometry(rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top)
+
+
+def _cursor_pos():
+    """Read the pointer position in physical screen pixels."""
+    point = wintypes.POINT()
+    user32.GetCursorPos(ctypes.byref(point))
+    return point.x, point.y
+
+
+def _window_text(function, hwnd):
+    """Read a window string with GetWindowTextW or GetClassNameW."""
+    buffer = ctypes.create_unicode_buffer(MAX_TEXT)
+    length = function(hwnd, buffer, MAX_TEXT)
+    return buffer.value[:length]
+
+
+def _process_name(hwnd):
+    """Get the executable name of the process owning a window, or '' if it cannot be read."""
+    pid = wintypes.DWORD()
+    user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+    process = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
+    if not process:
+        return ''
+    try:
+        buffer = ctypes.create_unicode_buffer(MAX_TEXT)
+        size = wintypes.DWORD(MAX_TEXT)
+        if not kernel32.QueryFullProcessImageNameW(process, 0, buffer, ctypes.byref(size)):
+            return ''
+        return ntpath.basename(buffer.value)
+    finally:
+        kernel32.CloseHandle(process)
+
+
+class WinEventWatcher(threading.Thread):
+    """
+    Thread that receives WinEvents and forwards them to a listener.
+
+    Out-of-context hooks are delivered through the message queue of the
+    thread that installed them, so the thread runs its own message loop.
+    """
+
+    def __init__(self, listener):
+        super().__init__(name='snapstack-winevents', daemon=True)
+        self.listener = listener
+        self.thread_id = None
+        self.started = threading.Event()
+        self.hooks = []
+        # Window the user is dragging, between its move-size start and end
+        self.moving = None
+        # Keep a reference so the callback is not garbage collected
+        self.callback = WINEVENTPROC(self.on_event)
+
+    def run(self):
+        self.thread_id = kernel32.GetCurrentThreadId()
+        for first, last in HOOKED_EVENT_RANGES:
+            hook = user32.SetWinEventHook(
+                first, last, None, self.callback, 0, 0,
+                WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS,
+            )
+            if hook:
+                self.hooks.append(hook)
+        self.started.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        for hook in self.hooks:
+            user32.UnhookWinEvent(hook)
+        self.hooks = []
+
+    def stop(self):
+        """Stop the message loop and remove the hooks."""
+        if self.thread_id is not None:
+            user32.PostThreadMessageW(self.thread_id, WM_QUIT, 0, 0)
+
+    def on_event(self, hook, event_type, hwnd, id_object, id_child, thread, event_time):
+        if not hwnd or id_object != OBJID_WINDOW or id_child != CHILDID_SELF:
+            return
+        try:
+            if event_type == EVENT_OBJECT_DESTROY:
+                self.listener.on_destroyed(gw.Win32Window(hwnd))
+                return
+
+            # Only top-level windows are tracked
+            if user32.GetAncestor(hwnd, GA_ROOT) != hwnd:
+                return
+            window = gw.Win32Window(hwnd)
+
+            if event_type == EVENT_SYSTEM_FOREGROUND:
+                self.listener.on_focus(window)
+            elif event_type == EVENT_OBJECT_LOCATIONCHANGE:
+                geometry = _window_rect(hwnd)
+                if geometry is not None:
+                    self.listener.on_moved(window, geometry)
+                # The pointer is only read while a drag is in progress
+                if hwnd == self.moving:
+                    self.listener.on_drag(window, *_cursor_pos())
+            elif event_type == EVENT_SYSTEM_MOVESIZESTART:
+                self.moving = hwnd
+                self.listener.on_move_start(window, *_cursor_pos())
+            elif event_type == EVENT_SYSTEM_MOVESIZEEND:
+                self.moving = None
+                self.listener.on_move_end(window, *_cursor_pos())
+            elif event_type in (EVENT_OBJECT_HIDE, EVENT_SYSTEM_MINIMIZESTART):
+                self.listener.on_destroyed(window)
+            elif user32.IsWindowVisible(hwnd):
+                # Create, show and restore from minimized
+                self.listener.on_created(window, _window_rect(hwnd))
+        except Exception as e:
+            # Exceptions must not propagate into the native callback
+            logger.error("Error handling window event: %s", e)
+
+
+class WindowsBackend(WindowBackend):
+    """Window backend for Microsoft Windows."""
+
+    name = 'windows'
+    reports_drags = True
+
+    def __init__(self):
+        super().__init__()
+        self._watcher = None
+        _enable_dpi_awareness()
+
+    def _restore_if_maximized(self, hwnd):
+        """Restore a maximized window, which would otherwise ignore the new geometry."""
+        if user32.IsZoomed(hwnd):
+            self.count_call('restore')
+            user32.ShowWindow(hwnd, SW_RESTORE)
+
+    def get_active_window(self):
+        self.count_call('get_active_window')
+        return gw.getActiveWindow()
+
+    def enumerate_windows(self):
+        self.count_call('enumerate_windows')
+        return [
+            window for window in gw.getAllWindows()
+            if window.visible and window.title and not window.isMinimized
+        ]
+
+    def get_geometry(self, window):
+        self.count_call('get_geometry')
+        return Geometry(window.left, window.top, window.width, window.height)
+
+    def set_geometry(self, window, x, y, width, height):
+        # Move and resize in one call so the window repaints once
+        self._restore_if_maximized(window._hWnd)
+        self.count_call('set_geometry')
+        if not user32.SetWindowPos(window._hWnd, None, x, y, width, height, SWP_NOZORDER | SWP_NOACTIVATE):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def apply_geometries(self, changes):
+        if not changes:
+            return
+        if len(changes) == 1:
+            window, x, y, width, height = changes[0]
+            if x is not None and width is not None:
+                self.set_geometry(window, x, y, width, height)
+                return
+
+        for change in changes:
+            self._restore_if_maximized(change[0]._hWnd)
+
+        # All windows are repositioned together when the deferred batch ends
+        self.count_call('apply_geometries')
+        batch = user32.BeginDeferWindowPos(len(changes))
+        if not batch:
+            raise ctypes.WinError(ctypes.get_last_error())
+        for window, x, y, width, height in changes:
+            batch = user32.DeferWindowPos(
+                batch, window._hWnd, None,
+                x or 0, y or 0, width or 0, height or 0,
+                _position_flags(x, width),
+            )
+            if not batch:
+                # A failed DeferWindowPos has already freed the batch
+                raise ctypes.WinError(ctypes.get_last_error())
+        if not user32.EndDeferWindowPos(batch):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def window_key(self, window):
+        return window._hWnd
+
+    def describe_window(self, window):
+        self.count_call('describe_window')
+        hwnd = window._hWnd
+        return WindowInfo(
+            _window_text(user32.GetWindowTextW, hwnd),
+            _window_text(user32.GetClassNameW, hwnd),
+            _process_name(hwnd),
+        )
+
+    def watch_windows(self, listener):
+        self.unwatch_windows()
+        self._watcher = WinEventWatcher(listener)
+        self._watcher.start()
+        self._watcher.started.wait()
+        return bool(self._watcher.hooks)
+
+    def unwatch_windows(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def get_work_areas(self, monitors):
+        work_areas = []
+        for monitor in monitors:
+            self.count_call('get_work_area')
+            handle = _monitor_handle(monitor)
+            info = MONITORINFO()
+            info.cbSize = ctypes.sizeof(MONITORINFO)
+            if not handle or not user32.GetMonitorInfoW(handle, ctypes.byref(info)):
+                work_areas.append(None)
+                continue
+            work = info.rcWork
+            work_areas.append(Rect(work.left, work.top, work.right - work.left, work.bottom - work.top))
+        return work_areas
+
+    def get_scale_factors(self, monitors):
+        if shcore is None:
+            return None
+        scales = []
+        for monitor in monitors:
+            self.count_call('get_scale_factor')
+            dpi_x, dpi_y = wintypes.UINT(), wintypes.UINT()
+            handle = _monitor_handle(monitor)
+            if not handle or shcore.GetDpiForMonitor(handle, MDT_EFFECTIVE_DPI, ctypes.byref(dpi_x), ctypes.byref(dpi_y)):
+                scales.append(None)
+                continue
+            scales.append(dpi_x.value / DEFAULT_DPI)
+        return scales
+
+    def topology_token(self):
+        self.count_call('topology_token')
+        return tuple(user32.GetSystemMetrics(index) for index in DISPLAY_METRICS)
@@ -0,0 +1,537 @@
+"""
+Linux X11 backend for SnapStack.
+Controls windows through EWMH client messages over one long-lived X connection.
+"""
+
+import logging
+import threading
+
+from Xlib import X, Xatom, display, error
+from Xlib.ext import randr
+from Xlib.protocol import event, request
+from screeninfo import Monitor
+
+from backends.base import Geometry, WindowBackend, WindowInfo
+from utils.monitor_info import Rect, intersect_rects
+
+logger = logging.getLogger(__name__)
+
+# Atoms interned once when the backend connects
+ATOM_NAMES = (
+    '_NET_SUPPORTED',
+    '_NET_ACTIVE_WINDOW',
+    '_NET_CLIENT_LIST',
+    '_NET_WM_STATE',
+    '_NET_WM_STATE_MAXIMIZED_VERT',
+    '_NET_WM_STATE_MAXIMIZED_HORZ',
+    '_NET_WM_STATE_HIDDEN',
+    '_NET_FRAME_EXTENTS',
+    '_NET_MOVERESIZE_WINDOW',
+    '_NET_WORKAREA',
+    '_NET_CURRENT_DESKTOP',
+    '_NET_WM_NAME',
+    '_NET_WM_PID',
+    'UTF8_STRING',
+)
+
+# _NET_WM_STATE actions and source indication for pager/user requests
+STATE_REMOVE = 0
+SOURCE_PAGER = 2
+
+# _NET_MOVERESIZE_WINDOW flags marking x/y and width/height as present
+MOVERESIZE_POSITION = (1 << 8) | (1 << 9)
+MOVERESIZE_SIZE = (1 << 10) | (1 << 11)
+
+# Client messages to the root window have to reach the window manager
+ROOT_EVENT_MASK = X.SubstructureRedirectMask | X.SubstructureNotifyMask
+
+
+def _text(value):
+    """Decode a string property value, '' if it is unset."""
+    if not value:
+        return ''
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return value
+
+
+def _process_name(pid):
+    """Get the executable name of a local process, or '' if it cannot be read."""
+    try:
+        with open(f'/proc/{pid}/comm', 'r', encoding='utf-8', errors='replace') as comm:
+            return comm.read().strip()
+    except OSError:
+        return ''
+
+
+class X11EventWatcher(threading.Thread):
+    """
+    Thread that turns X events into window registry events.
+
+    Xlib connections are not thread safe, so the watcher opens its own
+    connection. It listens for property changes on the root window
+    (active window, client list) and structure changes on each client.
+    """
+
+    def __init__(self, backend, listener):
+        super().__init__(name='snapstack-x11-events', daemon=True)
+        self.backend = backend
+        self.listener = listener
+        self.display = display.Display(backend.display_name)
+        self.root = self.display.screen().root
+        self.clients = set()
+        self.running = True
+
+    def run(self):
+        atoms = self.backend.atoms
+        self.root.change_attributes(event_mask=X.PropertyChangeMask)
+        self.update_clients()
+
+        while self.running:
+            try:
+                ev = self.display.next_event()
+            except Exception:
+                # The connection was closed by stop()
+                break
+            try:
+                if ev.type == X.PropertyNotify:
+                    if ev.atom == atoms['_NET_ACTIVE_WINDOW']:
+                        self.report_focus()
+                    elif ev.atom == atoms['_NET_CLIENT_LIST']:
+                        self.update_clients()
+                elif ev.type == X.ConfigureNotify and ev.window.id in self.clients:
+                    window = self.backend._window(ev.window.id, self.display)
+                    geometry = self.backend._geometry_value(self.backend._request_geometry(window, self.display))
+                    if geometry is not None:
+                        self.listener.on_moved(window, geometry)
+            except error.XError as e:
+                logger.error("Error handling X event: %s", e)
+
+    def stop(self):
+        """Stop the event loop and close the watcher connection."""
+        self.running = False
+        try:
+            self.display.close()
+        except Exception:
+            pass
+
+    def report_focus(self):
+        """Forward the current _NET_ACTIVE_WINDOW to the listener."""
+        value = self.backend._property_value(
+            self.backend._request_property(self.root, self.backend.atoms['_NET_ACTIVE_WINDOW'], 1, self.display)
+        )
+        window_id = value[0] if value else 0
+        self.listener.on_focus(self.backend._window(window_id, self.display) if window_id else None)
+
+    def update_clients(self):
+        """Diff _NET_CLIENT_LIST against the known clients and report the changes."""
+        value = self.backend._property_value(
+            self.backend._request_property(self.root, self.backend.atoms['_NET_CLIENT_LIST'], 4096, self.display)
+        )
+        current = set(value or ())
+        added = current - self.clients
+        removed = self.clients - current
+        self.clients = current
+
+        for window_id in removed:
+            with self.backend._lock:
+                self.backend.frame_extents.pop(window_id, None)
+            self.listener.on_destroyed(self.backend._window(window_id, self.display))
+
+        # Read all new geometries with one round trip
+        pending = []
+        for window_id in added:
+            window = self.backend._window(window_id, self.display)
+            window.change_attributes(event_mask=X.StructureNotifyMask)
+            pending.append(self.backend._request_geometry(window, self.display))
+        for item in pending:
+            self.listener.on_created(item[0], self.backend._geometry_value(item))
+
+        if added or removed:
+            self.report_focus()
+
+
+class X11Backend(WindowBackend):
+    """
+    Window backend for X11 window managers that follow EWMH.
+
+    The connection and interned atoms are kept for the life of the backend.
+    Requests that need replies are pipelined so each operation costs at
+    most one round trip, and a snap is sent as a single flushed batch.
+    Every use of the connection holds one lock, so calls from the executor,
+    animation frames and other threads never interleave on the wire.
+    """
+
+    name = 'x11'
+
+    def __init__(self, display_name=None):
+        """
+        Connect to the X server.
+
+        Args:
+            display_name: X display to use, defaults to $DISPLAY
+        """
+        super().__init__()
+        self.round_trips = 0
+        self.display = display.Display(display_name)
+        self.root = self.display.screen().root
+        self.atoms = self._intern_atoms(ATOM_NAMES)
+        self.frame_extents = {}
+
+        supported = self._read_property(self.root, self.atoms['_NET_SUPPORTED'])
+        self.supported = set(supported or ())
+        self.has_window_manager = self.atoms['_NET_MOVERESIZE_WINDOW'] in self.supported
+        self.has_randr = self.display.has_extension('RANDR')
+        self.display_name = display_name
+        self._watcher = None
+        # Xlib connections are not thread safe, and the executor, animation
+        # frames, topology checks and command server threads all share this one
+        self._lock = threading.RLock()
+
+    def reset_counters(self):
+        super().reset_counters()
+        self.round_trips = 0
+
+    def _intern_atoms(self, names):
+        """Intern all atoms with one round trip."""
+        pending = [
+            (name, request.InternAtom(display=self.display.display, defer=True, name=name, only_if_exists=False))
+            for name in names
+        ]
+        self.round_trips += 1
+        atoms = {}
+        for name, req in pending:
+            req.reply()
+            atoms[name] = req.atom
+        return atoms
+
+    def _request_property(self, window, atom, length=1024, connection=None):
+        """Queue a GetProperty request without waiting for the reply."""
+        return request.GetProperty(
+            display=(connection or self.display).display,
+            defer=True,
+            delete=False,
+            window=window,
+            property=atom,
+            type=X.AnyPropertyType,
+            long_offset=0,
+            long_length=length,
+        )
+
+    @staticmethod
+    def _property_value(req):
+        """Get the value of a queued GetProperty request, or None if unset."""
+        try:
+            req.reply()
+        except error.XError:
+            return None
+        if not req.property_type:
+            return None
+        return req.value
+
+    def _read_property(self, window, atom, length=1024):
+        """Read one property with a single round trip."""
+        self.round_trips += 1
+        return self._property_value(self._request_property(window, atom, length))
+
+    def _window(self, window_id, connection=None):
+        """Wrap a window id in an Xlib window object."""
+        return (connection or self.display).create_resource_object('window', window_id)
+
+    def _get_frame_extents(self, window):
+        """Get the cached (left, right, top, bottom) decoration sizes of a window."""
+        extents = self.frame_extents.get(window.id)
+        if extents is None:
+            value = self._read_property(window, self.atoms['_NET_FRAME_EXTENTS'], 4)
+            extents = tuple(value) if value and len(value) == 4 else (0, 0, 0, 0)
+            self.frame_extents[window.id] = extents
+        return extents
+
+    def get_active_window(self):
+        with self._lock:
+            self.count_call('get_active_window')
+            if self.has_window_manager:
+                value = self._read_property(self.root, self.atoms['_NET_ACTIVE_WINDOW'], 1)
+                if not value or not value[0]:
+                    return None
+                return self._window(value[0])
+
+            # Without a window manager the input focus is the closest equivalent
+            self.round_trips += 1
+            focus = self.display.get_input_focus().focus
+            if isinstance(focus, int) or focus == self.root:
+                return None
+            return focus
+
+    def enumerate_windows(self):
+        with self._lock:
+            self.count_call('enumerate_windows')
+            if self.has_window_manager:
+                client_ids = self._read_property(self.root, self.atoms['_NET_CLIENT_LIST']) or []
+                windows = [self._window(window_id) for window_id in client_ids]
+                states = [self._request_property(window, self.atoms['_NET_WM_STATE']) for window in windows]
+                self.round_trips += 1
+                hidden = self.atoms['_NET_WM_STATE_HIDDEN']
+                return [
+                    window for window, state in zip(windows, states)
+                    if hidden not in (self._property_value(state) or ())
+                ]
+
+            self.round_trips += 1
+            children = self.root.query_tree().children
+            attributes = [
+                request.GetWindowAttributes(display=self.display.display, defer=True, window=child)
+                for child in children
+            ]
+            self.round_trips += 1
+            windows = []
+            for child, attrs in zip(children, attributes):
+                try:
+                    attrs.reply()
+                except error.XError:
+                    continue
+                if attrs.map_state == X.IsViewable and not attrs.override_redirect:
+                    windows.append(child)
+            return windows
+
+    def _request_geometry(self, window, connection=None):
+        """Queue the requests needed to read a window's frame geometry."""
+        connection = connection or self.display
+        geometry = request.GetGeometry(display=connection.display, defer=True, drawable=window)
+        origin = request.TranslateCoords(
+            display=connection.display, defer=True,
+            src_wid=window, dst_wid=connection.screen().root, src_x=0, src_y=0,
+        )
+        extents_request = None
+        if window.id not in self.frame_extents:
+            extents_request = self._request_property(window, self.atoms['_NET_FRAME_EXTENTS'], 4, connection)
+        return window, geometry, origin, extents_request
+
+    def _geometry_value(self, pending):
+        """Build the frame Geometry from queued requests, or None if the window is gone."""
+        window, geometry, origin, extents_request = pending
+        try:
+            geometry.reply()
+            origin.reply()
+        except error.XError:
+            return None
+        if extents_request is not None:
+            value = self._property_value(extents_request)
+            # The event watcher thread fills the cache too
+            with self._lock:
+                self.frame_extents[window.id] = tuple(value) if value and len(value) == 4 else (0, 0, 0, 0)
+
+        with self._lock:
+            left, right, top, bottom = self.frame_extents.get(window.id, (0, 0, 0, 0))
+        return Geometry(
+            origin.x - left,
+            origin.y - top,
+            geometry.width + left + right,
+            geometry.height + top + bottom,
+        )
+
+    def get_geometry(self, window):
+        with self._lock:
+            self.count_call('get_geometry')
+            pending = self._request_geometry(window)
+            self.round_trips += 1
+            return self._geometry_value(pending)
+
+    def enumerate_window_geometries(self):
+        with self._lock:
+            windows = self.enumerate_windows()
+            self.count_call('get_geometry', len(windows))
+
+            # Every geometry request is in flight before the first reply is read
+            pending = [self._request_geometry(window) for window in windows]
+            self.round_trips += 1
+            result = []
+            for item in pending:
+                geometry = self._geometry_value(item)
+                if geometry is not None:
+                    result.append((item[0], geometry))
+            return result
+
+    def _prefetch_frame_extents(self, windows):
+        """Read the frame extents of all uncached windows with one round trip."""
+        pending = [
+            (window, self._request_property(window, self.atoms['_NET_FRAME_EXTENTS'], 4))
+            for window in windows if window.id not in self.frame_extents
+        ]
+        if not pending:
+            return
+        self.round_trips += 1
+        for window, req in pending:
+            value = self._property_value(req)
+            self.frame_extents[window.id] = tuple(value) if value and len(value) == 4 else (0, 0, 0, 0)
+
+    def _queue_geometry(self, window, x, y, width, height):
+        """Queue the requests for one geometry change without flushing them."""
+        left, right, top, bottom = self._get_frame_extents(window)
+        client_width = client_height = None
+        if width is not None:
+            client_width = max(1, width - left - right)
+            client_height = max(1, height - top - bottom)
+
+        if not self.has_window_manager:
+            values = {}
+            if x is not None:
+                values.update(x=x, y=y)
+            if width is not None:
+                values.update(width=client_width, height=client_height)
+            window.configure(**values)
+            self.count_call('set_geometry')
+            return
+
+        # Un-maximize first, otherwise most window managers ignore the move
+        self.root.send_event(
+            event.ClientMessage(
+                window=window,
+                client_type=self.atoms['_NET_WM_STATE'],
+                data=(32, [
+                    STATE_REMOVE,
+                    self.atoms['_NET_WM_STATE_MAXIMIZED_VERT'],
+                    self.atoms['_NET_WM_STATE_MAXIMIZED_HORZ'],
+                    SOURCE_PAGER,
+                    0,
+                ]),
+            ),
+            event_mask=ROOT_EVENT_MASK,
+        )
+
+        flags = X.NorthWestGravity | (SOURCE_PAGER << 12)
+        if x is not None:
+            flags |= MOVERESIZE_POSITION
+        if width is not None:
+            flags |= MOVERESIZE_SIZE
+        self.root.send_event(
+            event.ClientMessage(
+                window=window,
+                client_type=self.atoms['_NET_MOVERESIZE_WINDOW'],
+                data=(32, [flags, x or 0, y or 0, client_width or 0, client_height or 0]),
+            ),
+            event_mask=ROOT_EVENT_MASK,
+        )
+        self.count_call('set_geometry', 2)
+
+    def set_geometry(self, window, x, y, width, height):
+        with self._lock:
+            self._queue_geometry(window, x, y, width, height)
+
+            # Both requests go out together without waiting for replies
+            self.display.flush()
+
+    def apply_geometries(self, changes):
+        with self._lock:
+            self._prefetch_frame_extents([change[0] for change in changes])
+            for change in changes:
+                self._queue_geometry(*change)
+
+            # The whole batch reaches the server in one write
+            self.display.flush()
+
+    def window_key(self, window):
+        return window.id
+
+    def describe_window(self, window):
+        with self._lock:
+            self.count_call('describe_window')
+            # All four properties are in flight before the first reply is read
+            pending = [
+                self._request_property(window, self.atoms['_NET_WM_NAME']),
+                self._request_property(window, Xatom.WM_NAME),
+                self._request_property(window, Xatom.WM_CLASS),
+                self._request_property(window, self.atoms['_NET_WM_PID'], 1),
+            ]
+            self.round_trips += 1
+            net_name, wm_name, wm_class, pid = [self._property_value(req) for req in pending]
+
+            # WM_CLASS is the instance name and the class name, NUL separated
+            instance, _, class_name = _text(wm_class).rstrip('\0').partition('\0')
+            # _NET_WM_PID is only meaningful for clients on this machine
+            process = _process_name(pid[0]) if pid else ''
+            return WindowInfo(_text(net_name) or _text(wm_name), class_name or instance, process)
+
+    def watch_windows(self, listener):
+        # Focus and client list changes are only published by EWMH window managers
+        if not self.has_window_manager:
+            return False
+        self.unwatch_windows()
+        self._watcher = X11EventWatcher(self, listener)
+        self._watcher.start()
+        return True
+
+    def unwatch_windows(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def get_monitors(self):
+        with self._lock:
+            self.count_call('get_monitors')
+            if self.has_randr:
+                try:
+                    self.round_trips += 1
+                    reply = randr.get_monitors(self.root)
+                    names = [
+                        request.GetAtomName(display=self.display.display, defer=True, atom=info.name)
+                        for info in reply.monitors
+                    ]
+                    self.round_trips += 1
+                    monitors = []
+                    for info, name in zip(reply.monitors, names):
+                        name.reply()
+                        monitors.append(Monitor(
+                            x=info.x,
+                            y=info.y,
+                            width=info.width_in_pixels,
+                            height=info.height_in_pixels,
+                            width_mm=info.width_in_millimeters,
+                            height_mm=info.height_in_millimeters,
+                            name=name.name,
+                            is_primary=bool(info.primary),
+                        ))
+                    if monitors:
+                        return monitors
+                except error.XError as e:
+                    logger.error("Error reading RandR monitors: %s", e)
+
+            screen = self.display.screen()
+            return [Monitor(x=0, y=0, width=screen.width_in_pixels, height=screen.height_in_pixels, is_primary=True)]
+
+    def get_work_areas(self, monitors):
+        with self._lock:
+            self.count_call('get_work_areas')
+            workarea = self._request_property(self.root, self.atoms['_NET_WORKAREA'])
+            desktop = self._request_property(self.root, self.atoms['_NET_CURRENT_DESKTOP'], 1)
+            self.round_trips += 1
+            workarea = self._property_value(workarea)
+            desktop = self._property_value(desktop)
+            if not workarea:
+                return None
+
+            # _NET_WORKAREA holds one x, y, width, height group per virtual desktop
+            index = desktop[0] if desktop else 0
+            if len(workarea) < (index + 1) * 4:
+                index = 0
+            area = Rect(*workarea[index * 4:index * 4 + 4])
+
+            # The work area spans all monitors, so clip it to each one
+            return [
+                intersect_rects(Rect(monitor.x, monitor.y, monitor.width, monitor.height), area)
+                for monitor in monitors
+            ]
+
+    def topology_token(self):
+        with self._lock:
+            if not self.has_randr:
+                return None
+            self.count_call('topology_token')
+            self.round_trips += 1
+            return randr.get_screen_resources_current(self.root).config_timestamp
+
+    def close(self):
+        self.unwatch_windows()
+        super().close()
+        with self._lock:
+            self.display.close()
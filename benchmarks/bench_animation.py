@@ -0,0 +1,228 @@
+"""
+Snap animation benchmark for SnapStack.
+Runs animated snaps and bulk re-stacks against a fake backend with simulated call latency and checks that every frame is one batched call and every transition ends on time.
+
+Usage:
+    python -m benchmarks.bench_animation --latency-ms 0 5 25 40 --repeats 10
+"""
+
+import argparse
+import sys
+import time
+
+from animation import AnimationScheduler
+from backends.fake import FakeBackend
+from benchmarks.harness import print_report, summarize
+from snapper import WindowSnapper
+
+# Transition length and frame rate the cases run with
+DURATION = 0.15
+FRAME_RATE = 60.0
+
+# Windows re-stacked at once in the bulk case
+BULK_WINDOWS = 24
+
+# Seconds a transition may end after its deadline before it counts as late,
+# on top of one frame, for thread wakeup jitter on a loaded machine
+SLACK = 0.01
+
+
+class ScriptedClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ClockedBackend(FakeBackend):
+    """Fake backend whose geometry batches advance a scripted clock instead of sleeping."""
+
+    def __init__(self, clock, cost):
+        super().__init__()
+        self.clock = clock
+        self.cost = cost
+        self.frames = []
+
+    def apply_geometries(self, changes):
+        super().apply_geometries(changes)
+        self.clock.now += self.cost
+        self.frames.append((self.clock.now, [tuple(change[1:]) for change in changes]))
+
+
+def apply_latency(latency):
+    """Latency function charging only geometry batches, the calls animation frames make."""
+    return lambda op: latency if op == 'apply_geometries' else 0.0
+
+
+def run_transitions(latency, repeats):
+    """
+    Snap one window back and forth with animation on.
+
+    Returns:
+        Tuple of (result dictionary, list of problems)
+    """
+    backend = FakeBackend(latency=apply_latency(latency))
+    window = backend.add_window(title="Editor", x=100, y=100, width=800, height=600)
+    snapper = WindowSnapper(backend)
+    snapper.set_animation(DURATION, FRAME_RATE)
+    animator = snapper.animator
+    interval = 1 / FRAME_RATE
+    problems = []
+
+    samples = []
+    clock = time.perf_counter
+    begin = clock()
+    for index in range(repeats):
+        slot = index & 1
+        backend.reset_counters()
+        start = clock()
+        snapper.snap_window_to_slot(window, 'halves', slot)
+        animator.wait_idle()
+        samples.append(clock() - start)
+
+        rect = snapper.layout_engine.slot_rect(snapper.monitor, 'halves', slot)
+        if tuple(backend.get_geometry(window)) != tuple(rect):
+            problems.append(f"{latency * 1000:g} ms: transition {index} ended at {tuple(backend.get_geometry(window))}, expected {tuple(rect)}")
+        if samples[-1] > DURATION + interval + SLACK:
+            problems.append(f"{latency * 1000:g} ms: transition {index} took {samples[-1] * 1000:.1f} ms")
+    total = clock() - begin
+
+    stats = animator.stats()
+    snapper.close()
+    result = summarize(f"snap, {latency * 1000:g} ms per call", samples, total, {
+        'frames': stats['frames'] / repeats,
+        'dropped': stats['dropped_frames'] / repeats,
+        'windows_per_frame': stats['windows_per_frame'],
+        'late': stats['late'],
+    })
+    return result, problems
+
+
+def run_bulk(latency, repeats):
+    """
+    Re-stack many windows at once and check they share every frame.
+
+    Returns:
+        Tuple of (result dictionary, list of problems)
+    """
+    backend = FakeBackend(latency=apply_latency(latency))
+    windows = [
+        backend.add_window(title=f"Window {index}", x=40 * index, y=20 * index, width=700, height=500)
+        for index in range(BULK_WINDOWS)
+    ]
+    snapper = WindowSnapper(backend)
+    snapper.set_animation(DURATION, FRAME_RATE)
+    animator = snapper.animator
+    problems = []
+
+    samples = []
+    clock = time.perf_counter
+    begin = clock()
+    for index in range(repeats):
+        # Scatter the windows, instantly, so every stack animates all of them
+        snapper.animator = None
+        with snapper.begin_transaction(record_history=False) as transaction:
+            for number, window in enumerate(windows):
+                transaction.set_geometry(window, 40 * number + index, 20 * number, 700, 500)
+        snapper.animator = animator
+
+        frames = animator.stats()['frames']
+        backend.reset_counters()
+        start = clock()
+        snapper.stack_all()
+        animator.wait_idle()
+        samples.append(clock() - start)
+
+        # One batch per frame however many windows move
+        frames = animator.stats()['frames'] - frames
+        batches = backend.calls_by_op['apply_geometries']
+        if batches != frames:
+            problems.append(f"bulk {latency * 1000:g} ms: {batches} geometry calls for {frames} frames")
+    total = clock() - begin
+
+    geometries = [backend.get_geometry(window) for window in windows]
+    if len({(geometry.x, geometry.width) for geometry in geometries}) != 1:
+        problems.append(f"bulk {latency * 1000:g} ms: windows did not end in one stack")
+    stats = animator.stats()
+    snapper.close()
+    result = summarize(f"stack {BULK_WINDOWS}, {latency * 1000:g} ms per call", samples, total, {
+        'frames': stats['frames'] / repeats,
+        'dropped': stats['dropped_frames'] / repeats,
+        'windows_per_frame': stats['windows_per_frame'],
+        'late': stats['late'],
+    })
+    return result, problems
+
+
+def run_scripted(cost):
+    """
+    Drive one transition frame by frame on a scripted clock.
+
+    Returns:
+        List of problems
+    """
+    clock = ScriptedClock()
+    backend = ClockedBackend(clock, cost)
+    window = backend.add_window(title="Editor", x=0, y=0, width=800, height=600)
+    scheduler = AnimationScheduler(backend, DURATION, FRAME_RATE, clock)
+    end = (0, 500, 1920, 500)
+    scheduler.animate([(window,) + end], {window.handle: (0, 0, 800, 600)})
+
+    while True:
+        delay = scheduler.step()
+        if delay is None:
+            break
+        clock.now += delay
+
+    problems = []
+    name = f"scripted {cost * 1000:g} ms per call"
+    interval = 1 / FRAME_RATE
+    landed, final = backend.frames[-1]
+    if final != [end]:
+        problems.append(f"{name}: last frame was {final}, expected {[end]}")
+    if landed > DURATION + interval:
+        problems.append(f"{name}: ended at {landed * 1000:.1f} ms")
+    heights = [geometries[0][3] for _, geometries in backend.frames]
+    if heights != sorted(heights, reverse=True):
+        problems.append(f"{name}: frames went back and forth: {heights}")
+    stats = scheduler.stats()
+    if cost > interval and not stats['dropped_frames']:
+        problems.append(f"{name}: no frames dropped although every call takes longer than a frame")
+    if cost <= interval / 2 and stats['dropped_frames']:
+        problems.append(f"{name}: {stats['dropped_frames']} frames dropped although calls are fast")
+    return problems
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Check and time animated snaps against slow window systems.")
+    parser.add_argument('--latency-ms', type=float, nargs='+', default=[0, 5, 25, 40], help="simulated geometry call latencies")
+    parser.add_argument('--repeats', type=int, default=10, help="transitions per case")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    problems = []
+    for latency in args.latency_ms:
+        for case in (run_transitions, run_bulk):
+            result, case_problems = case(latency / 1000, args.repeats)
+            results.append(result)
+            problems.extend(case_problems)
+        problems.extend(run_scripted(latency / 1000))
+
+    print_report(results, args.json)
+    if not args.json:
+        for result in results:
+            print(f"{result['name']}: {result['frames']:.1f} frames, {result['dropped']:.1f} dropped, "
+                  f"{result['windows_per_frame']:.1f} windows per frame")
+
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Command socket benchmark for SnapStack.
+Runs the daemon's command server in-process on a temporary socket and measures per-command overhead for single, pipelined and batched requests.
+
+Usage:
+    python -m benchmarks.bench_daemon --commands 5000 --depth 64 --budget-p99-ms 1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from backends.fake import FakeBackend
+from benchmarks.harness import check_budget, print_report, run_case, summarize
+from command_server import CommandClient, CommandServer
+from snap_executor import SnapExecutor
+from snapper import WindowSnapper
+
+
+def snap_requests(count, windows):
+    """Build snap requests moving each window to the other half on every pass."""
+    return [
+        {
+            'op': 'snap', 'layout': 'halves',
+            'slot': (index // len(windows)) % 2,
+            'window': windows[index % len(windows)],
+        }
+        for index in range(count)
+    ]
+
+
+def run_grouped(name, send, requests, depth, backend):
+    """
+    Time requests sent in groups of `depth`, reporting per-command latency.
+
+    Args:
+        name: Benchmark case name
+        send: Callable sending a list of requests and returning the replies
+        requests: All requests to send
+        depth: Requests per group
+        backend: FakeBackend whose native calls are counted
+
+    Returns:
+        Result dictionary from summarize()
+    """
+    send(requests[:depth])
+    backend.reset_counters()
+
+    samples = []
+    clock = time.perf_counter
+    start = clock()
+    for offset in range(0, len(requests), depth):
+        group = requests[offset:offset + depth]
+        begin = clock()
+        replies = send(group)
+        elapsed = clock() - begin
+        if not all(reply['ok'] for reply in replies):
+            raise RuntimeError(f"{name}: daemon reported an error: {replies[0]}")
+        samples.extend([elapsed / len(group)] * len(group))
+    total = clock() - start
+    return summarize(name, samples, total, {'native_calls_per_op': backend.native_calls / len(requests)})
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure command socket throughput.")
+    parser.add_argument('--commands', type=int, default=5000, help="snap commands per case")
+    parser.add_argument('--depth', type=int, default=64, help="requests per pipelined or batched group")
+    parser.add_argument('--windows', type=int, default=8, help="simulated windows the snaps rotate through")
+    parser.add_argument('--budget-p99-ms', type=float, default=None, help="fail if a pipelined or batched case exceeds this p99")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    backend = FakeBackend()
+    for index in range(args.windows):
+        backend.add_window(title=f"Window {index}", app='bench', x=20 * index, y=20 * index)
+    snapper = WindowSnapper(backend)
+    executor = SnapExecutor(snapper)
+    executor.start()
+
+    directory = tempfile.mkdtemp(prefix='snapstack-bench-')
+    server = CommandServer(snapper, executor, os.path.join(directory, 'snapstack.sock'))
+    if not server.start():
+        return 1
+
+    try:
+        with CommandClient(server.path) as client:
+            windows = [record['window'] for record in client.request({'op': 'windows'})['result']]
+            requests = snap_requests(args.commands, windows)
+            results = [
+                run_case('ping round trip', lambda: client.request({'op': 'ping'}), min(args.commands, 2000)),
+                run_grouped('snap round trip', lambda group: [client.request(group[0])], requests[:min(args.commands, 2000)], 1, backend),
+                run_grouped(f"snap pipelined x{args.depth}", client.pipeline, requests, args.depth, backend),
+                run_grouped(f"snap batched x{args.depth}", client.batch, requests, args.depth, backend),
+            ]
+    finally:
+        server.stop()
+        executor.stop()
+        snapper.close()
+        os.rmdir(directory)
+
+    print_report(results, args.json)
+    over_budget = check_budget(results[2:], args.budget_p99_ms)
+    if over_budget:
+        print(f"p99 budget of {args.budget_p99_ms} ms exceeded by: {', '.join(over_budget)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Mixed-DPI snap benchmark for SnapStack.
+Snaps windows on synthetic monitor layouts with different scale factors and checks every snap is one correctly scaled geometry call.
+
+Usage:
+    python -m benchmarks.bench_dpi --iterations 2000
+"""
+
+import argparse
+import sys
+import time
+
+from screeninfo import Monitor
+
+from backends.fake import FakeBackend
+from benchmarks.harness import print_report, summarize
+from layouts import DEFAULT_LAYOUTS, load_layouts
+from snap_executor import SnapExecutor, snap_command
+from snapper import WindowSnapper
+from utils.monitor_info import LOGICAL, PHYSICAL, Rect
+
+# Logical pixels of the taskbar, dock or menu bar the work areas leave out
+PANEL = 40
+
+# Logical pixels between slots of the gapped layout
+GAP = 8
+
+# Synthetic setups: (name, coordinate space, list of (x, y, width, height, scale))
+SETUPS = (
+    ('windows 200/100/125/150%', PHYSICAL, [
+        (0, 0, 3840, 2160, 2.0),
+        (3840, 540, 1920, 1080, 1.0),
+        (-2560, 0, 2560, 1440, 1.25),
+        (5760, 0, 1440, 2560, 1.5),
+    ]),
+    ('windows 175/100%', PHYSICAL, [
+        (0, 0, 2880, 1800, 1.75),
+        (2880, 0, 1920, 1200, 1.0),
+    ]),
+    ('macos retina + external', LOGICAL, [
+        (0, 0, 1512, 982, 2.0),
+        (1512, 0, 2560, 1440, 1.0),
+    ]),
+    ('uniform 100%', PHYSICAL, [
+        (0, 0, 1920, 1080, 1.0),
+        (1920, 0, 1920, 1080, 1.0),
+    ]),
+)
+
+
+def build_snapper(space, displays):
+    """
+    Create a snapper over a fake desktop with scaled monitors.
+
+    Work areas leave out a panel of PANEL logical pixels, at the top on
+    macOS and at the bottom elsewhere, converted to the backend's coordinates.
+
+    Returns:
+        Tuple of (WindowSnapper, FakeBackend)
+    """
+    monitors = []
+    work_areas = []
+    scales = []
+    for index, (x, y, width, height, scale) in enumerate(displays):
+        monitors.append(Monitor(x=x, y=y, width=width, height=height, name=f"DPI-{index}", is_primary=not index))
+        panel = PANEL if space == LOGICAL else round(PANEL * scale)
+        top = y + panel if space == LOGICAL else y
+        work_areas.append(Rect(x, top, width, height - panel))
+        scales.append(scale)
+    backend = FakeBackend(monitors, scales=scales, coordinate_space=space)
+    backend.work_areas = work_areas
+    layouts = load_layouts(DEFAULT_LAYOUTS + [
+        {'name': 'gapped', 'label': 'Gapped thirds', 'ratios': [1, 1, 1], 'gap': GAP},
+    ])
+    return WindowSnapper(backend, layouts), backend
+
+
+def check_slots(monitor, rects, gap):
+    """
+    Check slot rectangles against the monitor they were computed for.
+
+    Returns:
+        List of problems, empty if the slots are right
+    """
+    problems = []
+    area = monitor.work_area
+    native_gap = round(gap * monitor.scale) if monitor.space == PHYSICAL else gap
+    covered = sum(rect.height for rect in rects) + native_gap * (len(rects) - 1)
+    if covered != area.height:
+        problems.append(f"slots cover {covered} of {area.height} pixels")
+    for upper, lower in zip(rects, rects[1:]):
+        if lower.y - (upper.y + upper.height) != native_gap:
+            problems.append(f"gap of {lower.y - (upper.y + upper.height)} pixels, expected {native_gap}")
+    for rect in rects:
+        if (rect.x, rect.width) != (area.x, area.width):
+            problems.append(f"slot {rect} is not as wide as the work area {area}")
+        # The logical slot must map back onto itself, so an overlay drawn
+        # in logical pixels shows exactly where the window goes
+        logical = monitor.to_logical(rect)
+        if monitor.to_logical(monitor.from_logical(logical)) != logical:
+            problems.append(f"slot {rect} does not survive a logical round trip")
+
+    # In logical pixels the slots fill the logical work area
+    logical = [monitor.to_logical(rect) for rect in rects]
+    logical_area = monitor.logical_work_area
+    if logical[0].y != logical_area.y or logical[-1].y + logical[-1].height != logical_area.y + logical_area.height:
+        problems.append(f"logical slots {logical} do not span the logical work area {logical_area}")
+    return problems
+
+
+def run_setup(name, space, displays, iterations):
+    """
+    Snap a window into every slot of every layout on every monitor.
+
+    Returns:
+        Tuple of (result dictionary, list of problems)
+    """
+    snapper, backend = build_snapper(space, displays)
+    executor = SnapExecutor(snapper, debounce=0, coalesce=False)
+    executor.start()
+    problems = []
+
+    monitors = snapper.topology.monitors
+    for monitor, (_, _, _, _, scale) in zip(monitors, displays):
+        if monitor.scale != scale:
+            problems.append(f"monitor {monitor.index} has scale {monitor.scale}, expected {scale}")
+
+    # One window per monitor, placed in its middle
+    windows = []
+    for monitor in monitors:
+        area = monitor.work_area
+        windows.append(backend.add_window(
+            title=f"Window {monitor.index}", x=area.x + area.width // 4, y=area.y + area.height // 4,
+            width=area.width // 2, height=area.height // 2,
+        ))
+
+    if snapper.layout_engine.get_layout('gapped').gap != GAP:
+        problems.append(f"{name}: gapped layout has a gap of {snapper.layout_engine.get_layout('gapped').gap}, expected {GAP}")
+
+    targets = []
+    for window, monitor, (*_, scale) in zip(windows, monitors, displays):
+        for layout in snapper.layout_engine.layouts.values():
+            rects = snapper.layout_engine.slot_table(monitor)[layout.name]
+            for problem in check_slots(monitor, rects, layout.gap):
+                problems.append(f"{name}, monitor {monitor.index}, {layout.name}: {problem}")
+            # Measured against the scale the setup asked for, not the one the topology reports:
+            # the gap is GAP logical pixels, so GAP times the scale in physical coordinates
+            expected_gap = round(layout.gap * scale) if space == PHYSICAL else layout.gap
+            for upper, lower in zip(rects, rects[1:]):
+                if lower.y - (upper.y + upper.height) != expected_gap:
+                    problems.append(
+                        f"{name}, monitor {monitor.index}, {layout.name}: gap of "
+                        f"{lower.y - (upper.y + upper.height)} pixels at {scale:g}x, expected {expected_gap}"
+                    )
+            for slot, rect in enumerate(rects):
+                targets.append((window, monitor, layout.name, slot, rect))
+
+    # Every snap must be one native call that lands exactly on the slot,
+    # and repeating it must find the window already in place
+    backend.reset_counters()
+    noop_before = executor.stats()['noop']
+    for window, monitor, layout_name, slot, rect in targets:
+        calls = backend.native_calls
+        executor.run(snap_command(layout_name, slot, window))
+        snap_calls = backend.native_calls - calls
+        if snap_calls != 1:
+            problems.append(f"{name}: snap to {layout_name} slot {slot} took {snap_calls} native calls")
+        geometry = backend.get_geometry(window)
+        if tuple(geometry) != tuple(rect):
+            problems.append(f"{name}: window on monitor {monitor.index} at {tuple(geometry)}, expected {tuple(rect)}")
+        calls = backend.native_calls
+        executor.run(snap_command(layout_name, slot, window))
+        if backend.native_calls != calls:
+            problems.append(f"{name}: repeated snap to {layout_name} slot {slot} moved the window again")
+    if executor.stats()['noop'] - noop_before != len(targets):
+        problems.append(f"{name}: {executor.stats()['noop'] - noop_before} of {len(targets)} repeated snaps found the window in place")
+
+    # Scale factors are read once per topology, never per snap
+    scale_reads = backend.calls_by_op['get_scale_factors']
+    if scale_reads:
+        problems.append(f"{name}: scale factors read {scale_reads} times during snaps")
+
+    samples = []
+    clock = time.perf_counter
+    begin = clock()
+    for index in range(iterations):
+        window, monitor, layout_name, slot, rect = targets[index % len(targets)]
+        start = clock()
+        snapper.snap_window_to_slot(window, layout_name, slot, monitor)
+        samples.append(clock() - start)
+    total = clock() - begin
+
+    executor.stop()
+    snapper.close()
+    scales = '/'.join(f"{scale:g}" for *_, scale in displays)
+    result = summarize(name, samples, total, {'monitors': len(displays), 'slots': len(targets), 'scales': scales})
+    return result, problems
+
+
+def run_topology_change():
+    """
+    Change the scale of a monitor and check the next snap follows it after exactly one rebuild.
+
+    Returns:
+        List of problems
+    """
+    name, space, displays = SETUPS[0]
+    snapper, backend = build_snapper(space, displays)
+    window = backend.add_window(title="Editor", x=100, y=100, width=800, height=600)
+    snapper.snap_window_to_slot(window, 'gapped', 1)
+    before = snapper.topology.generation
+    reads = backend.calls_by_op['get_scale_factors']
+
+    # The 4K monitor goes from 200% to 150%
+    backend.set_monitors(backend.monitors, backend.work_areas, [1.5] + backend.scales[1:])
+    snapper.topology.check()
+    snapper.snap_window_to_slot(window, 'gapped', 1)
+    snapper.snap_window_to_slot(window, 'gapped', 1)
+
+    problems = []
+    if snapper.topology.generation != before + 1:
+        problems.append(f"topology rebuilt {snapper.topology.generation - before} times after one change")
+    if backend.calls_by_op['get_scale_factors'] != reads + 1:
+        problems.append(f"scale factors read {backend.calls_by_op['get_scale_factors'] - reads} times after one change")
+    monitor = snapper.topology.monitors[0]
+    upper, middle = snapper.layout_engine.slot_table(monitor)['gapped'][:2]
+    if monitor.scale != 1.5 or middle.y - (upper.y + upper.height) != round(GAP * 1.5):
+        problems.append(f"gap after the change is {middle.y - (upper.y + upper.height)} pixels at scale {monitor.scale}")
+    snapper.close()
+    return problems
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Check and time snaps on mixed-DPI monitor layouts.")
+    parser.add_argument('--iterations', type=int, default=2000, help="timed snaps per setup")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    problems = []
+    for name, space, displays in SETUPS:
+        result, setup_problems = run_setup(name, space, displays, args.iterations)
+        results.append(result)
+        problems.extend(setup_problems)
+    problems.extend(run_topology_change())
+
+    print_report(results, args.json)
+    if not args.json:
+        for result in results:
+            print(f"{result['name']}: {result['slots']} slots on {result['monitors']} monitors at {result['scales']}")
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    if problems:
+        print(f"{len(problems)} problems with scaled snaps", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
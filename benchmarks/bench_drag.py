@@ -0,0 +1,305 @@
+"""
+Drag-to-edge snapping benchmark for SnapStack.
+Feeds synthetic drag traces through the fake backend and checks that drops snap correctly, pointer samples stay cheap and nothing runs between drags.
+
+Usage:
+    python -m benchmarks.bench_drag --drags 200 --idle-seconds 1
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+
+from screeninfo import Monitor
+
+from backends.fake import FakeBackend
+from benchmarks.harness import check_budget, print_report, summarize
+from drag_snap import DragSnapper, EdgeZones
+from snap_executor import SnapExecutor
+from snapper import WindowSnapper
+
+# Desktop the drags run on: (x, y, width, height, scale). The third monitor
+# sits below the first, so their shared edge is a zone on both.
+DISPLAYS = (
+    (0, 0, 2560, 1440, 1.0),
+    (2560, 0, 3840, 2160, 2.0),
+    (0, 1440, 1920, 1080, 1.0),
+)
+
+# Pointer samples per drag, about a second of movement at 60 Hz
+STEPS = 60
+
+# Rate of the polling tracker drag events replace
+POLL_HZ = 60
+
+# Grid sizes (columns, rows) the zone lookup is timed on
+GRID_SIZES = ((1, 1), (4, 4), (16, 16), (32, 32))
+
+
+class RecordingPreview:
+    """Preview that remembers what it was asked to show."""
+
+    def __init__(self):
+        self.shown = []
+        self.hidden = 0
+
+    def show_zone(self, zone):
+        self.shown.append(zone)
+
+    def hide_zone(self):
+        self.hidden += 1
+
+
+def build_desktop(displays=DISPLAYS):
+    """
+    Create a snapper, executor and drag snapper over a fake desktop.
+
+    Returns:
+        Tuple of (WindowSnapper, FakeBackend, SnapExecutor, DragSnapper, RecordingPreview)
+    """
+    monitors = [
+        Monitor(x=x, y=y, width=width, height=height, name=f"DRAG-{index}", is_primary=not index)
+        for index, (x, y, width, height, _) in enumerate(displays)
+    ]
+    backend = FakeBackend(monitors, scales=[scale for *_, scale in displays])
+    snapper = WindowSnapper(backend)
+    executor = SnapExecutor(snapper, debounce=0)
+    executor.start()
+    preview = RecordingPreview()
+    drag_snapper = DragSnapper(snapper, executor.submit, preview=preview)
+    if not drag_snapper.attach():
+        raise RuntimeError("the fake backend did not report drags")
+    return snapper, backend, executor, drag_snapper, preview
+
+
+def build_traces(snapper, count, seed=1):
+    """
+    Build drags ending at top edges, bottom edges, away from any edge and resizes.
+
+    Returns:
+        List of (start, end, expected) where expected is (monitor index, slot)
+        for a drop that snaps, None otherwise, or 'resize'
+    """
+    rng = random.Random(seed)
+    monitors = snapper.topology.monitors
+    traces = []
+    for index in range(count):
+        monitor = monitors[index % len(monitors)]
+        rect = monitor.rect
+        depth = monitor.native_length(4)
+        x = rect.x + rng.randrange(rect.width)
+        start = (rng.randrange(200, 1800), rng.randrange(300, 1000))
+        kind = index % 4
+        if kind == 0:
+            traces.append((start, (x, rect.y + rng.randrange(depth)), (monitor.index, 0)))
+        elif kind == 1:
+            traces.append((start, (x, rect.y + rect.height - 1 - rng.randrange(depth)), (monitor.index, 1)))
+        elif kind == 2:
+            traces.append((start, (x, rect.y + rect.height // 2), None))
+        else:
+            traces.append((start, (x, rect.y + rect.height - 1), 'resize'))
+    return traces
+
+
+def drag(backend, window, start, end, steps, samples=None):
+    """Drag a window from start to end in a straight line, timing each pointer sample."""
+    clock = time.perf_counter
+    backend.start_drag(window, *start)
+    for step in range(1, steps + 1):
+        x = start[0] + (end[0] - start[0]) * step // steps
+        y = start[1] + (end[1] - start[1]) * step // steps
+        begin = clock()
+        backend.drag_to(x, y)
+        if samples is not None:
+            samples.append(clock() - begin)
+    backend.end_drag(*end)
+
+
+def run_drags(count, steps):
+    """
+    Drop a window at the end of every trace and check where it went.
+
+    Returns:
+        Tuple of (list of result dictionaries, list of problems)
+    """
+    snapper, backend, executor, drag_snapper, preview = build_desktop()
+    layout_engine = snapper.layout_engine
+    monitors = snapper.topology.monitors
+    window = backend.add_window(title="Editor", x=300, y=300, width=900, height=700)
+    traces = build_traces(snapper, count)
+    problems = []
+
+    samples = []
+    begin = time.perf_counter()
+    for number, (start, end, expected) in enumerate(traces):
+        # Start each drag from a known size and place
+        backend.move_window(window, start[0] - 100, start[1] - 10, 900, 700)
+        shown = len(preview.shown)
+        if expected == 'resize':
+            # The user grabbed the bottom border: the size changes with the pointer
+            backend.start_drag(window, *start)
+            backend.move_window(window, window.x, window.y, window.width, window.height + 50)
+            backend.drag_to(*end)
+            backend.end_drag(*end)
+        else:
+            drag(backend, window, start, end, steps, samples)
+        executor.wait_idle()
+
+        geometry = backend.get_geometry(window)
+        if expected in (None, 'resize'):
+            if geometry.width != 900 or geometry.height not in (700, 750):
+                problems.append(f"drag {number} ending at {end} snapped, expected no snap ({expected})")
+            continue
+        monitor_index, slot = expected
+        rect = layout_engine.slot_rect(monitors[monitor_index], 'halves', slot)
+        if tuple(geometry) != tuple(rect):
+            problems.append(f"drag {number} ending at {end} left the window at {tuple(geometry)}, expected {tuple(rect)}")
+        new = preview.shown[shown:]
+        if not new or new[-1].monitor.index != monitor_index or new[-1].slot != slot:
+            problems.append(f"drag {number} ending at {end} previewed {[(zone.monitor.index, zone.slot) for zone in new]}")
+    total = time.perf_counter() - begin
+
+    stats = drag_snapper.stats()
+    expected_snaps = sum(1 for _, _, expected in traces if isinstance(expected, tuple))
+    if stats['snapped'] != expected_snaps:
+        problems.append(f"{stats['snapped']} drops snapped, expected {expected_snaps}")
+    if preview.hidden < stats['snapped']:
+        problems.append(f"preview hidden {preview.hidden} times after {stats['snapped']} snapping drops")
+
+    results = [summarize('drag sample, drag snapping', samples, total, {
+        'zone_changes': stats['zone_changes'], 'snapped': stats['snapped'], 'resizes': stats['resizes'],
+    })]
+
+    # The same drags without anyone listening, to isolate the drag snapper's share
+    drag_snapper.detach()
+    samples = []
+    begin = time.perf_counter()
+    for start, end, expected in traces:
+        if expected == 'resize':
+            continue
+        backend.move_window(window, start[0] - 100, start[1] - 10, 900, 700)
+        drag(backend, window, start, end, steps, samples)
+    results.append(summarize('drag sample, no listener', samples, time.perf_counter() - begin))
+
+    executor.stop()
+    snapper.close()
+    return results, problems
+
+
+def measure_idle(seconds):
+    """
+    Compare the CPU used between drags with a pointer-polling tracker.
+
+    Returns:
+        Tuple of (list of result dictionaries, wakeups of the drag snapper while idle)
+    """
+    snapper, backend, executor, drag_snapper, _ = build_desktop()
+    window = backend.add_window(title="Editor", x=300, y=300, width=900, height=700)
+    drag(backend, window, (400, 400), (400, 2), STEPS)
+    executor.wait_idle()
+
+    samples_before = drag_snapper.stats()['samples']
+    cpu = time.process_time()
+    time.sleep(seconds)
+    cpu = time.process_time() - cpu
+    wakeups = drag_snapper.stats()['samples'] - samples_before
+    results = [summarize('idle, event driven', [], seconds, {'wakeups': wakeups, 'cpu_ms': cpu * 1000})]
+
+    # What the alternative costs: reading the pointer on a timer whether or not anything is dragged
+    zones = drag_snapper.current_zones()
+    stopping = threading.Event()
+    polls = []
+
+    def poll():
+        while not stopping.wait(1 / POLL_HZ):
+            zones.hit(400, 400)
+            snapper.registry.geometry(window)
+            polls.append(1)
+
+    thread = threading.Thread(target=poll, daemon=True)
+    cpu = time.process_time()
+    thread.start()
+    time.sleep(seconds)
+    stopping.set()
+    thread.join()
+    poll_cpu = time.process_time() - cpu
+    results.append(summarize(f'idle, polling at {POLL_HZ} Hz', [], seconds, {'wakeups': len(polls), 'cpu_ms': poll_cpu * 1000}))
+
+    executor.stop()
+    snapper.close()
+    return results, wakeups
+
+
+def time_zone_lookups(lookups):
+    """
+    Time edge zone hit tests on monitor grids of growing size.
+
+    Returns:
+        List of result dictionaries
+    """
+    rng = random.Random(2)
+    results = []
+    for columns, rows in GRID_SIZES:
+        displays = [
+            (column * 1920, row * 1080, 1920, 1080, 1.0)
+            for row in range(rows) for column in range(columns)
+        ]
+        monitors = [
+            Monitor(x=x, y=y, width=width, height=height, name=f"GRID-{index}", is_primary=not index)
+            for index, (x, y, width, height, _) in enumerate(displays)
+        ]
+        snapper = WindowSnapper(FakeBackend(monitors), track_windows=False)
+        zones = EdgeZones(snapper.topology, snapper.layout_engine, 'halves')
+        points = [(rng.randrange(columns * 1920), rng.randrange(rows * 1080)) for _ in range(lookups)]
+
+        hit = zones.hit
+        samples = []
+        clock = time.perf_counter
+        begin = clock()
+        for x, y in points:
+            start = clock()
+            hit(x, y)
+            samples.append(clock() - start)
+        results.append(summarize(f"zone hit, {len(monitors)} monitors", samples, clock() - begin))
+        snapper.close()
+    return results
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Check and time drag-to-edge snapping on synthetic drag traces.")
+    parser.add_argument('--drags', type=int, default=200, help="drags fed through the fake backend")
+    parser.add_argument('--steps', type=int, default=STEPS, help="pointer samples per drag")
+    parser.add_argument('--lookups', type=int, default=20000, help="zone hit tests per monitor grid")
+    parser.add_argument('--idle-seconds', type=float, default=1.0, help="seconds measured between drags")
+    parser.add_argument('--budget-p99-ms', type=float, default=None, help="fail if a pointer sample p99 exceeds this")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    drag_results, problems = run_drags(args.drags, args.steps)
+    idle_results, wakeups = measure_idle(args.idle_seconds)
+    zone_results = time_zone_lookups(args.lookups)
+
+    results = drag_results + idle_results + zone_results
+    print_report(results, args.json)
+    if not args.json:
+        with_snapper, without = drag_results
+        overhead = (with_snapper['p50_ms'] - without['p50_ms']) * 1000
+        print(f"drag snapping adds {overhead:.2f} us per pointer sample at p50")
+        for result in idle_results:
+            print(f"{result['name']}: {result['wakeups']} wakeups, {result['cpu_ms']:.2f} ms CPU in {args.idle_seconds:g} s")
+
+    if wakeups:
+        problems.append(f"drag snapping woke up {wakeups} times with no drag in progress")
+    over_budget = check_budget(drag_results, args.budget_p99_ms)
+    if over_budget:
+        problems.append(f"p99 budget of {args.budget_p99_ms} ms exceeded by: {', '.join(over_budget)}")
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
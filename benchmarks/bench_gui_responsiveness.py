@@ -0,0 +1,111 @@
+"""
+GUI responsiveness benchmark for SnapStack.
+Submits snaps against a deliberately slow backend and measures how long the Qt event loop stalls.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_gui_responsiveness --latency-ms 200 --budget-gap-ms 50
+
+Exits 1 if a click or the event loop blocks, by default for half a native call or longer.
+"""
+
+import argparse
+import sys
+import time
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+
+from backends.fake import FakeBackend
+from snap_executor import SnapExecutor
+from snapper import WindowSnapper
+from ui.main_window import MainWindow
+
+# Interval of the timer probing the event loop while the snaps run
+TICK_MS = 20
+
+# Give up if the snaps have not finished after this many seconds
+TIMEOUT_MS = 30000
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure event loop stalls while slow snaps run.")
+    parser.add_argument('--latency-ms', type=float, default=200.0, help="simulated latency per native call")
+    parser.add_argument('--snaps', type=int, default=5, help="snap commands submitted from the GUI")
+    parser.add_argument('--budget-gap-ms', type=float, default=None,
+                        help="fail if the longest tick gap exceeds this, defaults to half a native call")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    backend = FakeBackend(latency=args.latency_ms / 1000)
+    for index in range(4):
+        backend.add_window(title=f"Window {index}", app='bench', x=40 * index, y=40 * index, width=800, height=600)
+    snapper = WindowSnapper(backend)
+    executor = SnapExecutor(snapper)
+    executor.start()
+    window = MainWindow(snapper, executor)
+
+    delivered = []
+    clock = time.perf_counter
+
+    def on_result(result):
+        # Stack all is submitted last and is never coalesced with the snaps
+        delivered.append(result)
+        if result.command.action == 'stack_all':
+            app.quit()
+
+    window.result_bridge.result_ready.connect(on_result)
+
+    ticks = []
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(clock()))
+    timer.start(TICK_MS)
+    QTimer.singleShot(TIMEOUT_MS, app.quit)
+
+    # Click through the UI the same way a user would, alternating slots.
+    # Any click running its snap on the GUI thread would take at least one
+    # native call's latency.
+    clicks = []
+    start = clock()
+    for index in range(args.snaps):
+        begin = clock()
+        window.on_snap('halves', index % 2)
+        clicks.append(clock() - begin)
+    begin = clock()
+    window.on_stack_all()
+    clicks.append(clock() - begin)
+    ticks.append(clock())
+
+    app.exec()
+    elapsed_ms = (clock() - start) * 1000
+    timer.stop()
+    executor.stop()
+    backend.close()
+
+    gaps = [(later - earlier) * 1000 for earlier, later in zip(ticks, ticks[1:])]
+    max_gap = max(gaps) if gaps else elapsed_ms
+    stats = executor.stats()
+    print(
+        f"submitted {stats['received']} commands, executed {stats['executed']} "
+        f"in {elapsed_ms:.1f} ms at {args.latency_ms:.0f} ms per native call"
+    )
+    print(f"longest click {max(clicks) * 1000:.2f} ms, {len(ticks)} event loop ticks, longest gap {max_gap:.1f} ms")
+    print(f"status label: {window.status_label.text()!r}")
+
+    # A native call made on the GUI thread would block it for the whole
+    # simulated latency, so a fraction of it already shows a regression
+    budget_gap_ms = args.budget_gap_ms if args.budget_gap_ms is not None else args.latency_ms / 2
+    problems = []
+    if not delivered or delivered[-1].command.action != 'stack_all':
+        problems.append("the snap results did not reach the GUI")
+    if max(clicks) * 1000 >= args.latency_ms:
+        problems.append(f"a click blocked for {max(clicks) * 1000:.1f} ms, as long as a native call")
+    if max_gap > budget_gap_ms:
+        problems.append(f"event loop stalled for {max_gap:.1f} ms, budget is {budget_gap_ms} ms")
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Geometry history benchmark for SnapStack.
+Simulates a long session of snaps, undos and closed windows and checks that the history stays within its memory bound.
+
+Usage:
+    python -m benchmarks.bench_history --snaps 200000 --windows 5000
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import OrderedDict
+
+from backends.fake import FakeBackend
+from benchmarks.harness import print_report, run_case, summarize
+from geometry_history import GeometryHistory, GeometryRing, WindowHistory
+from snapper import WindowSnapper
+
+
+def memory_bound(depth, max_windows):
+    """
+    Get the most memory a history with these limits can use.
+
+    Returns:
+        Bytes used when every window slot holds full undo and redo rings
+    """
+    entry = WindowHistory(None, depth)
+    entry.redo = GeometryRing(depth)
+    table = OrderedDict.fromkeys(range(max_windows))
+    return sys.getsizeof(table) + max_windows * entry.memory_bytes()
+
+
+def run_session(snaps, windows, depth, max_windows, seed):
+    """
+    Replay a random session directly against a GeometryHistory.
+
+    Roughly one in eight operations is an undo and one in a hundred closes a window.
+
+    Returns:
+        Tuple of (result dictionary, history)
+    """
+    history = GeometryHistory(depth, max_windows)
+    rng = random.Random(seed)
+    keys = list(range(windows))
+    next_key = windows
+    samples = []
+    clock = time.perf_counter
+    start = clock()
+    for step in range(snaps):
+        index = rng.randrange(len(keys))
+        key = keys[index]
+        geometry = (step % 1920, step % 1080, 800, 600)
+        roll = rng.random()
+        begin = clock()
+        if roll < 0.01:
+            history.forget(key)
+        elif roll < 0.135:
+            history.undo(key, geometry)
+        else:
+            history.record(key, None, geometry)
+        samples.append(clock() - begin)
+        if roll < 0.01:
+            # The closed window is replaced by a new one
+            keys[index] = next_key
+            next_key += 1
+    total = clock() - start
+    return summarize(f"history {windows} windows", samples, total), history
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure geometry history cost and memory.")
+    parser.add_argument('--snaps', type=int, default=200000, help="history operations in the session")
+    parser.add_argument('--windows', type=int, nargs='+', default=[100, 5000], help="windows snapped during the session")
+    parser.add_argument('--depth', type=int, default=16, help="geometries remembered per window and direction")
+    parser.add_argument('--max-windows', type=int, default=1024, help="windows with history kept at once")
+    parser.add_argument('--restore-windows', type=int, default=500, help="windows restored at once by restore_all")
+    parser.add_argument('--seed', type=int, default=1, help="random seed of the session")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    bound = memory_bound(args.depth, args.max_windows)
+    results = []
+    over_bound = []
+    for windows in args.windows:
+        result, history = run_session(args.snaps, windows, args.depth, args.max_windows, args.seed)
+        result['memory_bytes'] = history.memory_bytes()
+        result['tracked_windows'] = len(history)
+        result['evicted'] = history.evicted
+        results.append(result)
+        if result['memory_bytes'] > bound:
+            over_bound.append(result['name'])
+
+    # Restoring every window is one batch however many windows there are
+    backend = FakeBackend()
+    for index in range(args.restore_windows):
+        backend.add_window(title=f"Window {index}", app='bench', x=index, y=index)
+    snapper = WindowSnapper(backend)
+    monitor = snapper.monitor
+    result = run_case(
+        f"restore_all {args.restore_windows} windows",
+        snapper.restore_all,
+        20,
+        warmup=0,
+        setup=lambda: snapper.stack_all(monitor),
+    )
+    snapper.stack_all(monitor)
+    backend.reset_counters()
+    snapper.restore_all()
+    result['native_calls_per_op'] = backend.native_calls
+    results.append(result)
+    snapper.close()
+
+    print_report(results, args.json)
+    if not args.json:
+        print(f"memory bound for depth {args.depth} and {args.max_windows} windows: {bound / 1024:.1f} KiB")
+        for result in results[:len(args.windows)]:
+            print(
+                f"{result['name']}: {result['memory_bytes'] / 1024:.1f} KiB, "
+                f"{result['tracked_windows']} windows kept, {result['evicted']} evicted"
+            )
+    if over_bound:
+        print(f"History exceeded its memory bound: {', '.join(over_bound)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Hotkey flood benchmark for SnapStack.
+Replays key-repeat floods through the snap executor and compares the commands and native calls with and without coalescing.
+
+Usage:
+    python -m benchmarks.bench_hotkey_flood --rate 30 --seconds 1 --latency-ms 20
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from backends.fake import FakeBackend
+from snap_executor import SnapExecutor, snap_command
+from snapper import WindowSnapper
+
+# Flood patterns: (name, list of (layout, slot) cycled through while the flood lasts)
+PATTERNS = (
+    ('held ctrl+alt+up', [('halves', 0)]),
+    ('mashing up/down', [('halves', 0), ('halves', 1)]),
+)
+
+
+def run(pattern, rate, seconds, latency, queued):
+    """
+    Deliver a paced flood of hotkey events and wait until all snaps finished.
+
+    Args:
+        pattern: List of (layout, slot) cycled through
+        rate: Events per second
+        seconds: Duration of the flood
+        latency: Simulated seconds per native call
+        queued: Go through a SnapExecutor instead of snapping on the hotkey thread
+
+    Returns:
+        Result dictionary with the command counters and native calls
+    """
+    backend = FakeBackend(latency=latency)
+    backend.add_window(title="Editor", app='editor', x=100, y=100, width=800, height=600)
+    snapper = WindowSnapper(backend)
+    # Load the monitors up front so only snap calls are counted
+    snapper.topology.monitors
+    backend.reset_counters()
+
+    if queued:
+        executor = SnapExecutor(snapper)
+        executor.start()
+        submit = executor.submit
+    else:
+        # What the hotkey callbacks did before the executor existed
+        executor = None
+        submit = lambda command: snapper.snap_to_slot(command.layout, command.slot)
+
+    interval = 1.0 / rate
+    count = max(1, int(rate * seconds))
+    start = time.perf_counter()
+    for index in range(count):
+        layout, slot = pattern[index % len(pattern)]
+        submit(snap_command(layout, slot))
+        delay = start + (index + 1) * interval - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    if executor:
+        executor.wait_idle(timeout=60)
+    elapsed = time.perf_counter() - start
+
+    if executor:
+        result = executor.stats()
+        executor.stop()
+    else:
+        result = {'received': count, 'debounced': 0, 'coalesced': 0, 'executed': count, 'noop': 0}
+    result['native_calls'] = backend.native_calls
+    result['seconds'] = elapsed
+    snapper.close()
+    return result
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure hotkey flood coalescing.")
+    parser.add_argument('--rate', type=float, default=30.0, help="key-repeat events per second")
+    parser.add_argument('--seconds', type=float, default=1.0, help="how long each flood lasts")
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="simulated latency per native call")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for pattern_name, pattern in PATTERNS:
+        for mode, queued in (('direct', False), ('coalesced', True)):
+            result = run(pattern, args.rate, args.seconds, args.latency_ms / 1000, queued)
+            result['name'] = f"{pattern_name} {mode}"
+            results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'case':<28} {'received':>9} {'debounced':>10} {'coalesced':>10} {'executed':>9} {'noop':>6} {'calls':>7} {'drain s':>8}")
+    for result in results:
+        print(
+            f"{result['name']:<28} {result['received']:>9} {result['debounced']:>10} "
+            f"{result['coalesced']:>10} {result['executed']:>9} {result['noop']:>6} "
+            f"{result['native_calls']:>7} {result['seconds']:>8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
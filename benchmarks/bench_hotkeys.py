@@ -0,0 +1,293 @@
+"""
+Hotkey engine benchmark for SnapStack.
+Drives synthetic key events through the hotkey engine at high rates with up to thousands of bindings, and rebinds from an edited config file.
+
+Usage:
+    python -m benchmarks.bench_hotkeys --bindings 4 100 1000 10000 --budget-p99-ms 0.1
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from backends.fake import FakeBackend
+from benchmarks.harness import check_budget, print_report, summarize
+from config import ConfigWatcher
+from hotkeys import MODIFIER_BITS, MODIFIERS, HotkeyEngine, format_keys, load_hotkeys
+from snap_executor import SnapExecutor
+from snapper import WindowSnapper
+
+# Keys the synthetic bindings are made of
+KEYS = [chr(code) for code in range(ord('a'), ord('z') + 1)] + [str(digit) for digit in range(10)] + [f"f{number}" for number in range(1, 13)]
+
+# Names the keyboard library reports for the modifiers, left and right variants included
+EVENT_NAMES = {'ctrl': 'left ctrl', 'alt': 'alt', 'shift': 'right shift', 'super': 'left windows'}
+
+
+def build_definitions(count, layouts=('halves', 'thirds')):
+    """
+    Build hotkey definitions for count two-chord sequences, e.g. 'ctrl+alt+k, 3'.
+
+    Returns:
+        List of config dictionaries
+    """
+    definitions = []
+    for index in range(count):
+        prefix, key = divmod(index, len(KEYS))
+        mask, prefix_key = divmod(prefix, len(KEYS))
+        modifiers = [name for bit, name in enumerate(MODIFIERS) if (mask % 15 + 1) & (1 << bit)]
+        layout = layouts[index % len(layouts)]
+        definitions.append({
+            'keys': f"{'+'.join(modifiers + [KEYS[prefix_key]])}, {KEYS[key]}",
+            'action': 'snap',
+            'layout': layout,
+            'slot': index % (2 if layout == 'halves' else 3),
+        })
+    return definitions
+
+
+def key_events(sequence):
+    """
+    Turn a parsed chord sequence into the key events a user typing it produces.
+
+    Returns:
+        List of (down, name)
+    """
+    events = []
+    for mask, key in sequence:
+        held = [EVENT_NAMES[name] for bit, name in enumerate(MODIFIERS) if mask & (1 << bit)]
+        events.extend((True, name) for name in held)
+        events.append((True, key))
+        events.append((False, key))
+        events.extend((False, name) for name in reversed(held))
+    return events
+
+
+def time_dispatch(count, repeats):
+    """
+    Type every bound sequence and time each one through the engine.
+
+    Returns:
+        Tuple of (result dictionary, number of sequences that dispatched the wrong command)
+    """
+    bindings = load_hotkeys(build_definitions(count))
+    dispatched = []
+    engine = HotkeyEngine(dispatched.append)
+    engine.rebind(bindings)
+
+    sequences = list(bindings.items())
+    typed = [(key_events(sequence), command) for sequence, command in sequences]
+    samples = []
+    wrong = 0
+    clock = time.perf_counter
+    feed = engine.feed
+    begin = clock()
+    for _ in range(repeats):
+        for events, command in typed:
+            del dispatched[:]
+            start = clock()
+            for down, name in events:
+                feed(down, name)
+            samples.append(clock() - start)
+            if dispatched != [command]:
+                wrong += 1
+    total = clock() - begin
+    events = engine.stats()['events']
+    result = summarize(f"{count} bindings", samples, total, {
+        'events_per_sec': events / total if total else 0.0,
+        'events_per_sequence': events / len(samples),
+    })
+    return result, wrong
+
+
+def run_rebind(count, changed):
+    """
+    Edit a config file, let the watcher pick it up and check only the edited bindings moved.
+
+    Returns:
+        Tuple of (result dictionary, whether the counts and the dispatch were correct)
+    """
+    definitions = build_definitions(count)
+    engine = HotkeyEngine(lambda command: None)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'config.json')
+        with open(path, 'w', encoding='utf-8') as config_file:
+            json.dump({'hotkeys': definitions}, config_file)
+        engine.rebind(load_hotkeys(definitions))
+        # What the main window's shortcut list is rebuilt from
+        notified = []
+        engine.add_listener(notified.append)
+        watcher = ConfigWatcher(lambda config: engine.rebind(load_hotkeys(config['hotkeys'])), path)
+
+        # Point a few bindings at another slot and append as many new ones
+        edited = [dict(data) for data in definitions]
+        for data in edited[:changed]:
+            data['slot'] = 1 - data['slot'] if data['layout'] == 'halves' else (data['slot'] + 1) % 3
+        edited.extend(build_definitions(count + changed)[count:])
+        with open(path, 'w', encoding='utf-8') as config_file:
+            json.dump({'hotkeys': edited}, config_file)
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 1000000))
+
+        before = dict(engine.counters)
+        begin = time.perf_counter()
+        reloaded = watcher.check()
+        elapsed = time.perf_counter() - begin
+
+    added = engine.counters['added'] - before['added']
+    removed = engine.counters['removed'] - before['removed']
+    unchanged = engine.counters['unchanged'] - before['unchanged']
+
+    # The edited and the appended bindings must fire their new command
+    dispatched = []
+    engine.submit = dispatched.append
+    expected = load_hotkeys(edited)
+    checked = list(expected.items())[:changed] + list(expected.items())[count:]
+    for sequence, command in checked:
+        for down, name in key_events(sequence):
+            engine.feed(down, name)
+
+    # Rebinding the same bindings again changes nothing and notifies no one
+    engine.rebind(expected)
+    correct = (
+        reloaded and added == 2 * changed and removed == changed and unchanged == count - changed
+        and dispatched == [command for _, command in checked]
+        and notified == [expected]
+    )
+    result = summarize(f"reload {count} bindings, {changed} edited", [elapsed], elapsed, {
+        'added': added, 'removed': removed, 'unchanged': unchanged,
+    })
+    return result, correct
+
+
+def run_flood(count, sequences):
+    """
+    Type bound sequences as fast as possible into a running snap executor.
+
+    Returns:
+        Tuple of (result dictionary, whether every dispatched command reached the executor)
+    """
+    backend = FakeBackend()
+    backend.add_window(title="Editor", app='editor', x=100, y=100, width=800, height=600)
+    snapper = WindowSnapper(backend)
+    executor = SnapExecutor(snapper)
+    executor.start()
+    engine = HotkeyEngine(executor.submit)
+    bindings = load_hotkeys(build_definitions(count))
+    engine.rebind(bindings)
+
+    typed = [key_events(sequence) for sequence in bindings]
+    clock = time.perf_counter
+    begin = clock()
+    for index in range(sequences):
+        for down, name in typed[index % len(typed)]:
+            engine.feed(down, name)
+    elapsed = clock() - begin
+    executor.wait_idle()
+    stats = executor.stats()
+    executor.stop()
+    snapper.close()
+
+    dispatched = engine.stats()['dispatched']
+    result = summarize(f"flood {sequences} sequences, executor", [elapsed / sequences] * sequences, elapsed, {
+        'received': stats['received'], 'executed': stats['executed'],
+    })
+    return result, dispatched == sequences and stats['received'] == dispatched
+
+
+class KeyRecorder:
+    """Stands in for a RecordingBackend, keeping the key events it is given."""
+
+    def __init__(self):
+        self.keys = []
+
+    def record_key(self, down, name):
+        self.keys.append((down, name))
+
+
+def check_recording():
+    """
+    Type ordinary text and a hotkey into a recording engine with the default bindings.
+
+    Returns:
+        List of problems, empty if only the hotkey's chords were recorded
+    """
+    engine = HotkeyEngine(lambda command: None)
+    engine.rebind(load_hotkeys(None))
+    engine.recorder = KeyRecorder()
+    problems = []
+
+    # 'z' is part of the default undo binding, but on its own it is typing
+    typing = [(True, 'z'), (False, 'z'), (True, 'left shift'), (True, 'z'), (False, 'z'), (False, 'left shift')]
+    for down, name in typing:
+        engine.feed(down, name)
+    if engine.recorder.keys:
+        problems.append(f"Typing was recorded: {engine.recorder.keys}")
+
+    redo = next(sequence for sequence in engine.bindings if sequence[0][0] & MODIFIER_BITS['shift'])
+    engine.recorder.keys.clear()
+    for down, name in [(True, 'left shift')] + key_events(redo) + [(False, 'left shift')]:
+        engine.feed(down, name)
+    replay = HotkeyEngine(lambda command: None)
+    replay.rebind(engine.bindings)
+    dispatched = [replay.feed(down, name) for down, name in engine.recorder.keys]
+    if [command for command in dispatched if command] != [engine.bindings[redo]]:
+        problems.append(f"Recorded {format_keys(redo)} does not replay: {engine.recorder.keys}")
+    return problems
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure hotkey dispatch and rebinding with many bindings.")
+    parser.add_argument('--bindings', type=int, nargs='+', default=[4, 100, 1000, 10000], help="binding counts")
+    parser.add_argument('--events', type=int, default=50000, help="sequences typed per binding count")
+    parser.add_argument('--edited', type=int, default=10, help="bindings edited in the reload case")
+    parser.add_argument('--budget-p99-ms', type=float, default=None, help="fail if typing one sequence p99 exceeds this")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    dispatch_results = []
+    failures = []
+    for count in args.bindings:
+        result, wrong = time_dispatch(count, max(1, args.events // count))
+        results.append(result)
+        dispatch_results.append(result)
+        if wrong:
+            failures.append(f"{wrong} sequences dispatched the wrong command with {count} bindings")
+
+    largest = max(args.bindings)
+    result, correct = run_rebind(largest, min(args.edited, largest))
+    results.append(result)
+    if not correct:
+        failures.append(
+            f"Reload changed {result['added']} added, {result['removed']} removed, {result['unchanged']} unchanged "
+            f"bindings, or the rebound hotkeys did not fire or notify their listeners as expected"
+        )
+
+    result, correct = run_flood(largest, args.events)
+    results.append(result)
+    if not correct:
+        failures.append(f"Executor received {result['received']} of {args.events} hotkey commands")
+
+    failures.extend(check_recording())
+
+    print_report(results, args.json)
+    if not args.json:
+        for result in dispatch_results:
+            print(f"{result['name']}: {result['events_per_sec']:,.0f} key events/s")
+        example = format_keys(next(iter(load_hotkeys(build_definitions(1)))))
+        print(f"sequences look like '{example}'")
+
+    over_budget = check_budget(dispatch_results, args.budget_p99_ms)
+    if over_budget:
+        failures.append(f"p99 budget of {args.budget_p99_ms} ms exceeded by: {', '.join(over_budget)}")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Icon cache benchmark for SnapStack.
+Loads the generated application icon in fresh interpreters sharing one cache directory and checks that only the first launch renders anything.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_icon_cache --launches 3
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter. The bundled icon is ignored so the
+# generator and cache are exercised; the generator is wrapped to count
+# the renders.
+CHILD_SCRIPT = """
+import json, os, sys, time
+from PySide6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+import assets.icon
+from ui.icon_cache import IconCache
+renders = []
+generate_icon = assets.icon.generate_icon
+def counting_generate_icon(*args, **kwargs):
+    renders.append(args)
+    return generate_icon(*args, **kwargs)
+assets.icon.generate_icon = counting_generate_icon
+began = time.perf_counter()
+icon = IconCache(bundled_icon=None).icon([float(ratio) for ratio in sys.argv[1:]])
+elapsed = time.perf_counter() - began
+print(json.dumps({
+    'renders': len(renders),
+    'sizes': len(icon.availableSizes()),
+    'load_ms': elapsed * 1000,
+}))
+sys.stdout.flush()
+os._exit(0)
+"""
+
+
+def launch(env, cwd, ratios):
+    """
+    Load the icon once in a new interpreter.
+
+    Returns:
+        Dictionary with the renders performed, sizes available and load time
+    """
+    completed = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT] + [str(ratio) for ratio in ratios],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=120,
+    )
+    lines = [line for line in completed.stdout.splitlines() if line.startswith('{')]
+    if completed.returncode != 0 or not lines:
+        raise RuntimeError(f"Icon launch failed:\n{completed.stdout}\n{completed.stderr}")
+    return json.loads(lines[-1])
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Check that cached icons are never re-rendered.")
+    parser.add_argument('--launches', type=int, default=3, help="launches sharing one cache directory")
+    parser.add_argument('--ratios', type=float, nargs='+', default=[1.0, 2.0], help="device pixel ratios to provide")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='snapstack-icons-') as temp_dir:
+        cache_dir = os.path.join(temp_dir, 'cache')
+        env = dict(os.environ, XDG_CACHE_HOME=cache_dir, LOCALAPPDATA=cache_dir)
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+
+        # Every launch starts from a different working directory, like
+        # starting SnapStack from a shortcut, a terminal or a login item
+        results = []
+        for index in range(args.launches):
+            cwd = os.path.join(temp_dir, f"cwd{index}")
+            os.makedirs(cwd)
+            results.append(launch(env, cwd, args.ratios))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'launch':<8} {'renders':>8} {'sizes':>6} {'load ms':>9}")
+        for index, result in enumerate(results, 1):
+            print(f"{index:<8} {result['renders']:>8} {result['sizes']:>6} {result['load_ms']:>9.2f}")
+
+    problems = []
+    # Without a render on the first launch the cache was never filled, or the counting is broken
+    if not results or not results[0]['renders']:
+        problems.append("The first launch rendered no icons")
+    rerendered = [index for index, result in enumerate(results[1:], 2) if result['renders']]
+    if rerendered:
+        problems.append(f"Icons were rendered again on launch {', '.join(map(str, rerendered))}")
+    incomplete = [index for index, result in enumerate(results, 1) if result['sizes'] != results[0]['sizes']]
+    if results and (not results[0]['sizes'] or incomplete):
+        problems.append("Cached icons do not provide the sizes the first launch rendered")
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Logging overhead benchmark for SnapStack.
+Floods the log with failing snaps and checks that the asynchronous log service keeps snaps fast and memory bounded.
+
+Usage:
+    python -m benchmarks.bench_logging --budget-overhead-us 30
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from backends.fake import FakeBackend
+from benchmarks.harness import print_report, summarize
+from log_service import LogService
+from snapper import WindowSnapper
+
+# Seconds the simulated slow disk or terminal takes per written line
+SLOW_WRITE = 0.0002
+
+
+class FailingBackend(FakeBackend):
+    """Fake backend whose move/resize batches always fail, so every snap logs an error."""
+
+    def apply_geometries(self, changes):
+        self._native_call('apply_geometries')
+        raise OSError("simulated window system failure")
+
+
+class SlowStream:
+    """Stream that takes SLOW_WRITE per write, standing in for a slow disk or terminal."""
+
+    def __init__(self):
+        self.lines = 0
+
+    def write(self, text):
+        time.sleep(SLOW_WRITE)
+        self.lines += 1
+
+    def flush(self):
+        pass
+
+
+def build_snapper(windows):
+    """Create a snapper over a fake desktop where every snap fails."""
+    backend = FailingBackend()
+    for index in range(windows):
+        backend.add_window(title=f"Window {index}", app=f"app{index % 8}", x=index, y=index)
+    return WindowSnapper(backend), backend
+
+
+def time_snaps(snapper, iterations):
+    """
+    Time failing snaps.
+
+    Returns:
+        Tuple of (samples in seconds, total seconds)
+    """
+    samples = []
+    clock = time.perf_counter
+    begin = clock()
+    for index in range(iterations):
+        start = clock()
+        snapper.snap_to_slot('halves', index & 1)
+        samples.append(clock() - start)
+    return samples, clock() - begin
+
+
+def start_service(directory, ring_size):
+    """Start a log service writing to a file in directory and to a slow stream."""
+    service = LogService({'console': False, 'ring_size': ring_size}, os.path.join(directory, 'bench.log'))
+    service.start()
+    service.targets.append(logging.StreamHandler(SlowStream()))
+    return service
+
+
+def run(iterations, windows, ring_size):
+    """
+    Time failing snaps with logging disabled, asynchronous and synchronous.
+
+    Returns:
+        Tuple of (list of result dictionaries, service stats after the flood)
+    """
+    snapper, _ = build_snapper(windows)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        service = start_service(directory, ring_size)
+
+        service.set_level('CRITICAL')
+        for index in range(100):
+            snapper.snap_to_slot('halves', index & 1)
+        samples, total = time_snaps(snapper, iterations)
+        results.append(summarize('failing snap, logging off', samples, total))
+
+        service.set_level('INFO')
+        samples, total = time_snaps(snapper, iterations)
+        stats = service.stats()
+        results.append(summarize('failing snap, async log', samples, total, {'dropped': stats['dropped']}))
+        service.stop()
+
+        # What the flood costs when the snapping thread writes each line itself
+        root = logging.getLogger()
+        handler = logging.StreamHandler(SlowStream())
+        root.addHandler(handler)
+        samples, total = time_snaps(snapper, min(iterations, 1000))
+        root.removeHandler(handler)
+        results.append(summarize('failing snap, sync log', samples, total))
+    snapper.close()
+    return results, stats
+
+
+def measure_memory(iterations, windows, ring_size):
+    """
+    Measure how much memory a flood of failing snaps holds on to.
+
+    Returns:
+        Tuple of (bytes still allocated after the flood, records queued, ring capacity,
+        records queued that still reference their arguments or exception)
+    """
+    snapper, _ = build_snapper(windows)
+    with tempfile.TemporaryDirectory() as directory:
+        service = start_service(directory, ring_size)
+        snapper.snap_to_slot('halves', 0)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for index in range(iterations):
+            snapper.snap_to_slot('halves', index & 1)
+        held = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        records = list(service.ring.records)
+        # Queued records are formatted already and must not keep the snap's objects alive
+        unformatted = sum(1 for record in records if record.args or record.exc_info)
+        service.stop()
+    snapper.close()
+    return held, len(records), ring_size, unformatted
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure the cost of logging a flood of failing snaps.")
+    parser.add_argument('--iterations', type=int, default=20000, help="failing snaps per case")
+    parser.add_argument('--windows', type=int, default=20, help="number of simulated windows")
+    parser.add_argument('--ring-size', type=int, default=1024, help="records the log ring holds")
+    parser.add_argument('--budget-overhead-us', type=float, default=None,
+                        help="fail if asynchronous logging adds more than this to the median failing snap")
+    parser.add_argument('--budget-memory-kb', type=float, default=None,
+                        help="fail if the flood holds on to more memory than this")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results, stats = run(args.iterations, args.windows, args.ring_size)
+    print_report(results, args.json)
+    held, queued, capacity, unformatted = measure_memory(args.iterations, args.windows, args.ring_size)
+    # A bounded ring holds about the same after twice the flood
+    held_double = measure_memory(args.iterations * 2, args.windows, args.ring_size)[0]
+
+    by_name = {result['name']: result for result in results}
+    overhead = (by_name['failing snap, async log']['p50_ms'] - by_name['failing snap, logging off']['p50_ms']) * 1000
+    if not args.json:
+        print(f"async logging adds {overhead:.1f} us at p50, {stats['dropped']} records dropped, {stats['written']} written")
+        print(f"memory held after {args.iterations} failing snaps: {held / 1024:.0f} KB, ring {queued}/{capacity}")
+        print(f"memory held after {args.iterations * 2} failing snaps: {held_double / 1024:.0f} KB")
+
+    failed = False
+    if queued > capacity:
+        print(f"Log ring holds {queued} records, more than its capacity of {capacity}", file=sys.stderr)
+        failed = True
+    if held_double > held * 1.5 + 64 * 1024:
+        print(f"Memory held grew from {held / 1024:.0f} KB to {held_double / 1024:.0f} KB "
+              f"when the flood doubled, the log queue is not bounded", file=sys.stderr)
+        failed = True
+    if unformatted:
+        print(f"{unformatted} queued records still hold their arguments or exception", file=sys.stderr)
+        failed = True
+    if by_name['failing snap, async log']['p50_ms'] >= by_name['failing snap, sync log']['p50_ms']:
+        print("Asynchronous logging is not faster than writing on the snapping thread", file=sys.stderr)
+        failed = True
+    if args.budget_overhead_us is not None and overhead > args.budget_overhead_us:
+        print(f"Logging overhead of {overhead:.1f} us exceeds the {args.budget_overhead_us} us budget", file=sys.stderr)
+        failed = True
+    if args.budget_memory_kb is not None and held / 1024 > args.budget_memory_kb:
+        print(f"Flood held {held / 1024:.0f} KB, over the {args.budget_memory_kb} KB budget", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Monitor lookup benchmark for SnapStack.
+Places windows across synthetic monitor grids to show that lookup cost stays flat as displays are added.
+
+Usage:
+    python -m benchmarks.bench_monitors --lookups 20000
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from benchmarks.harness import print_report, summarize
+from utils.monitor_info import MonitorIndex, MonitorInfo, Rect, overlap_area
+
+# (columns, rows) of the synthetic monitor grids
+GRID_SIZES = ((1, 1), (2, 2), (3, 2), (4, 4), (8, 8), (16, 16), (32, 32))
+
+
+def build_grid(columns, rows, width=1920, height=1080):
+    """
+    Build a grid of identically sized monitors.
+
+    Returns:
+        List of MonitorInfo
+    """
+    monitors = []
+    for row in range(rows):
+        for column in range(columns):
+            rect = Rect(column * width, row * height, width, height)
+            monitors.append(MonitorInfo(len(monitors), f"GRID-{column}-{row}", rect, rect, not monitors))
+    return monitors
+
+
+def random_windows(monitors, count, seed=1):
+    """
+    Place windows at random positions across the monitor grid.
+
+    Returns:
+        List of Rect, some of them straddling monitor edges
+    """
+    rng = random.Random(seed)
+    right = max(monitor.rect.x + monitor.rect.width for monitor in monitors)
+    bottom = max(monitor.rect.y + monitor.rect.height for monitor in monitors)
+    return [
+        Rect(rng.randrange(-200, right), rng.randrange(-200, bottom), rng.randrange(200, 2400), rng.randrange(150, 1400))
+        for _ in range(count)
+    ]
+
+
+def linear_lookup(monitors, rect):
+    """Reference lookup that scans every monitor."""
+    best = max(monitors, key=lambda monitor: overlap_area(monitor.rect, rect))
+    return best if overlap_area(best.rect, rect) else None
+
+
+def time_lookups(name, lookup, windows, batch=100):
+    """
+    Time lookups in batches so timer overhead does not dominate.
+
+    Returns:
+        Result dictionary with per-lookup latencies
+    """
+    samples = []
+    clock = time.perf_counter
+    for start in range(0, len(windows), batch):
+        chunk = windows[start:start + batch]
+        begin = clock()
+        for rect in chunk:
+            lookup(rect)
+        samples.append((clock() - begin) / len(chunk))
+    # Each sample is the mean of one batch, so throughput is 1 / mean sample
+    result = summarize(name, samples, sum(samples))
+    result['iterations'] = len(windows)
+    return result
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure monitor lookup cost across large monitor grids.")
+    parser.add_argument('--lookups', type=int, default=20000, help="window placements per grid")
+    parser.add_argument('--linear', action='store_true', help="also time a linear scan for comparison")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for columns, rows in GRID_SIZES:
+        monitors = build_grid(columns, rows)
+        index = MonitorIndex(monitors)
+        windows = random_windows(monitors, args.lookups)
+
+        label = f"{len(monitors)} monitors"
+        results.append(time_lookups(f"index {label}", index.monitor_for_rect, windows))
+        if args.linear:
+            results.append(time_lookups(f"linear {label}", lambda rect: linear_lookup(monitors, rect), windows))
+
+    print_report(results, args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Workspace profile benchmark for SnapStack.
+Saves the arrangement of many simulated windows, scrambles them and measures how quickly and in how many native calls a profile puts them back.
+
+Usage:
+    python -m benchmarks.bench_profiles --windows 100 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from screeninfo import Monitor
+
+from backends.fake import FakeBackend
+from benchmarks.harness import print_report, summarize
+from profiles import ProfileStore
+from snapper import WindowSnapper
+
+APPS = ('editor', 'terminal', 'browser', 'mail', 'chat', 'music', 'files', 'notes')
+
+
+def open_windows(snapper, backend, count, rng):
+    """
+    Open windows across both monitors, most in layout slots and some placed freely.
+
+    Returns:
+        List of FakeWindow
+    """
+    layouts = list(snapper.layout_engine.layouts.values())
+    monitors = snapper.topology.monitors
+    windows = []
+    for index in range(count):
+        app = rng.choice(APPS)
+        # Some titles repeat, as with several terminals
+        title = f"{app} {index % (count // 4 or 1)}"
+        window = backend.add_window(title, app, focus=False)
+        monitor = rng.choice(monitors)
+        if rng.random() < 0.8:
+            layout = rng.choice(layouts)
+            rect = snapper.layout_engine.slot_rect(monitor, layout.name, rng.randrange(len(layout.ratios)))
+        else:
+            area = monitor.work_area
+            rect = (area.x + rng.randrange(area.width // 2), area.y + rng.randrange(area.height // 2), 640, 480)
+        backend.move_window(window, *rect)
+        windows.append(window)
+    return windows
+
+
+def arrangement(windows):
+    """Group window geometries by application and title, which is all a profile can tell apart."""
+    groups = defaultdict(list)
+    for window in windows:
+        groups[(window.app, window.title)].append((window.x, window.y, window.width, window.height))
+    return {key: sorted(value) for key, value in groups.items()}
+
+
+def run(count, rounds, seed, path):
+    """
+    Save a profile of `count` windows, then scramble and restore it `rounds` times.
+
+    Returns:
+        Tuple of (list of result dictionaries, Boolean: every restore was exact)
+    """
+    rng = random.Random(seed)
+    monitors = [
+        Monitor(x=0, y=0, width=1920, height=1080, name='FAKE-1', is_primary=True),
+        Monitor(x=1920, y=0, width=2560, height=1440, name='FAKE-2', is_primary=False),
+    ]
+    backend = FakeBackend(monitors)
+    snapper = WindowSnapper(backend, profiles=ProfileStore(path))
+    windows = open_windows(snapper, backend, count, rng)
+    expected = arrangement(windows)
+
+    clock = time.perf_counter
+    start = clock()
+    saved = snapper.save_profile('bench')
+    save_seconds = clock() - start
+
+    # A fresh store measures parsing the file as on the next launch
+    start = clock()
+    entries = ProfileStore(path).get('bench')
+    load_seconds = clock() - start
+
+    samples = []
+    calls = 0
+    exact = saved == count and len(entries) == count
+    for _ in range(rounds):
+        for window in windows:
+            backend.move_window(window, rng.randrange(3000), rng.randrange(1000), 500, 400)
+        backend.reset_counters()
+        start = clock()
+        placed = snapper.restore_profile('bench')
+        samples.append(clock() - start)
+        calls += backend.calls_by_op['apply_geometries'] + backend.calls_by_op['set_geometry']
+        exact = exact and placed == count and arrangement(windows) == expected
+
+    restore = summarize(f"restore {count} windows", samples, sum(samples))
+    restore['native_calls_per_op'] = calls / rounds
+    save = summarize(f"save {count} windows", [save_seconds], save_seconds)
+    load = summarize(f"load {count} windows", [load_seconds], load_seconds)
+    load['file_bytes'] = os.path.getsize(path)
+    return [save, load, restore], exact
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure saving and restoring workspace profiles.")
+    parser.add_argument('--windows', type=int, nargs='+', default=[10, 100, 1000], help="window counts")
+    parser.add_argument('--rounds', type=int, default=20, help="scramble and restore rounds")
+    parser.add_argument('--seed', type=int, default=1, help="random seed")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    failed = []
+    with tempfile.TemporaryDirectory(prefix='snapstack-profiles-') as directory:
+        for count in args.windows:
+            path = os.path.join(directory, f"profiles-{count}.json")
+            case, exact = run(count, args.rounds, args.seed, path)
+            results.extend(case)
+            if not exact:
+                failed.append(count)
+
+    print_report(results, args.json)
+    if not args.json:
+        for result in results:
+            if 'file_bytes' in result:
+                print(f"{result['name']}: {result['file_bytes'] / 1024:.1f} KiB profile file")
+    if failed:
+        print(f"Windows not restored to their saved places with {', '.join(map(str, failed))} windows")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Window registry benchmark for SnapStack.
+Feeds synthetic window events into the registry and reports event throughput and memory per window.
+
+Usage:
+    python -m benchmarks.bench_registry --windows 1000 10000
+"""
+
+import argparse
+import sys
+import time
+
+from backends.base import Geometry
+from backends.fake import FakeBackend, FakeWindow
+from benchmarks.harness import print_report, summarize
+from window_registry import WindowRegistry
+
+
+def run(count, moves_per_window):
+    """
+    Track `count` windows and replay focus and move events for each.
+
+    Returns:
+        Tuple of (result dictionary, registry diagnostics)
+    """
+    backend = FakeBackend()
+    registry = WindowRegistry(backend)
+    windows = [FakeWindow(handle, f"Window {handle}", 'app', 0, 0, 800, 600) for handle in range(1, count + 1)]
+
+    samples = []
+    clock = time.perf_counter
+    start = clock()
+    for window in windows:
+        registry.on_created(window, Geometry(0, 0, 800, 600))
+    for step in range(moves_per_window):
+        begin = clock()
+        for window in windows:
+            registry.on_focus(window)
+            registry.on_moved(window, Geometry(step, step, 800, 600))
+        samples.append((clock() - begin) / (2 * count))
+    total = clock() - start
+
+    events = count + 2 * count * moves_per_window
+    result = summarize(f"registry {count} windows", samples, sum(samples))
+    result['iterations'] = events
+    result['ops_per_sec'] = events / total
+    return result, registry.diagnostics()
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure window registry event cost and memory.")
+    parser.add_argument('--windows', type=int, nargs='+', default=[100, 1000, 10000], help="tracked window counts")
+    parser.add_argument('--moves', type=int, default=20, help="focus and move events per window")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for count in args.windows:
+        result, diagnostics = run(count, args.moves)
+        result['memory_bytes'] = diagnostics['memory_bytes']
+        result['bytes_per_window'] = diagnostics['bytes_per_window']
+        results.append(result)
+
+    print_report(results, args.json)
+    if not args.json:
+        for result in results:
+            print(f"{result['name']}: {result['memory_bytes'] / 1024:.1f} KiB, {result['bytes_per_window']:.0f} bytes per window")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Trace replay benchmark for SnapStack.
+Replays sessions recorded with `main.py --record` against a simulated desktop and reports per-command latency and native calls per operation, so recorded production problems become regression benchmarks.
+
+Usage:
+    python main.py --record session.trace.gz
+    python -m benchmarks.bench_replay session.trace.gz --speed 10 --budget-p99-ms 50
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.harness import check_budget, print_report
+from trace_replay import TraceReplayer
+
+
+def action_results(report):
+    """
+    Turn a replay report into one result per command action, as print_report() expects.
+
+    Returns:
+        List of result dictionaries, plus one for all commands together
+    """
+    seconds = report['replay_seconds']
+    executed = report['executor']['executed']
+    rows = [(action, summary) for action, summary in sorted(report['actions'].items())]
+    rows.append(('all', report['phases']['total']))
+    return [
+        {
+            'name': name,
+            'iterations': summary['count'],
+            'p50_ms': summary['p50_ms'],
+            'p99_ms': summary['p99_ms'],
+            'max_ms': summary['max_ms'],
+            'ops_per_sec': summary['count'] / seconds if seconds else 0.0,
+            'native_calls_per_op': report['native_calls'] / executed if name == 'all' and executed else None,
+        }
+        for name, summary in rows
+    ]
+
+
+def print_calls(report):
+    """Print the native calls per operation, as recorded and as replayed."""
+    print(f"{'native op':<32} {'recorded':>9} {'replayed':>9} {'rec p50 ms':>11} {'rec p99 ms':>11}")
+    for op, calls in sorted(report['calls'].items()):
+        print(
+            f"{op:<32} {calls['recorded']:>9} {calls['replayed']:>9} "
+            f"{calls['recorded_p50_ms']:>11.3f} {calls['recorded_p99_ms']:>11.3f}"
+        )
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Replay recorded SnapStack traces as benchmarks.")
+    parser.add_argument('traces', nargs='+', help="trace files written with main.py --record")
+    parser.add_argument('--speed', type=float, default=0.0,
+                        help="replay speed, 1 for real time, 0 for as fast as possible")
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help="factor for the recorded native call times, 0 to measure SnapStack alone")
+    parser.add_argument('--commands', action='store_true',
+                        help="replay the recorded commands instead of feeding key events to the hotkey engine")
+    parser.add_argument('--budget-p99-ms', type=float, default=None, help="fail if a command p99 exceeds this")
+    parser.add_argument('--budget-calls', type=int, default=None,
+                        help="fail if a replay makes more native calls than this")
+    parser.add_argument('--json', action='store_true', help="print the full replay reports as JSON")
+    args = parser.parse_args(argv)
+
+    reports = []
+    problems = []
+    for path in args.traces:
+        replayer = TraceReplayer(path, args.speed, args.latency_scale, hotkeys=not args.commands)
+        try:
+            report = replayer.run()
+        finally:
+            replayer.close()
+        reports.append(report)
+
+        over_budget = check_budget(action_results(report), args.budget_p99_ms)
+        if over_budget:
+            problems.append(f"{path}: p99 budget of {args.budget_p99_ms} ms exceeded by: {', '.join(over_budget)}")
+        if args.budget_calls is not None and report['native_calls'] > args.budget_calls:
+            problems.append(f"{path}: {report['native_calls']} native calls exceed the budget of {args.budget_calls}")
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print(
+                f"{report['trace']}: {report['records']} records, {report['recorded_seconds']:.1f} s recorded "
+                f"on {report['backend']}, replayed in {report['replay_seconds']:.2f} s"
+            )
+            print_report(action_results(report))
+            print_calls(report)
+            print(f"executor: {report['executor']}")
+            if report['hotkeys'] is not None:
+                print(f"hotkeys: {report['hotkeys']}")
+            print(f"replay: {report['replay']}")
+            print()
+
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Window rule benchmark for SnapStack.
+Matches thousands of synthetic window-create events against hundreds of rules and checks the compiled matcher against a linear scan.
+
+Usage:
+    python -m benchmarks.bench_rules --rules 100 500 --events 5000 --linear
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from backends.base import WindowInfo
+from backends.fake import FakeBackend
+from benchmarks.harness import check_budget, print_report, summarize
+from snap_executor import SnapExecutor
+from snapper import WindowSnapper
+from window_rules import RuleEngine, WindowRule
+
+WORDS = (
+    'editor', 'terminal', 'browser', 'mail', 'chat', 'music', 'video', 'notes', 'calendar', 'files',
+    'settings', 'monitor', 'debug', 'console', 'preview', 'player', 'viewer', 'report', 'draft', 'inbox',
+)
+
+
+def random_name(rng, length=8):
+    """Build a random lower-case identifier."""
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(length))
+
+
+def build_rules(count, rng, monitors=4):
+    """
+    Build rules mixing title, application, process and monitor criteria.
+
+    Returns:
+        Tuple of (list of WindowRule, list of application names, list of title tags)
+    """
+    apps = [random_name(rng) for _ in range(count)]
+    tags = [f"{rng.choice(WORDS)}-{random_name(rng, 5)}" for _ in range(count)]
+    rules = []
+    for index in range(count):
+        kind = index % 4
+        title = (tags[index],) if kind in (0, 3) else ()
+        app = (apps[index],) if kind in (1, 3) else ()
+        process = (f"{apps[index]}.exe",) if kind == 2 else ()
+        monitor = (index % monitors,) if kind == 3 else ()
+        rules.append(WindowRule(f"rule {index}", 'halves', index % 2, title, app, process, monitor))
+    return rules, apps, tags
+
+
+def build_events(count, apps, tags, rng, monitors=4):
+    """
+    Build window-create events, about half of them matching some rule.
+
+    Returns:
+        List of (WindowInfo, monitor index)
+    """
+    events = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            app = rng.choice(apps)
+            title = f"{rng.choice(WORDS)} - {rng.choice(tags)} - {random_name(rng, 12)}"
+        else:
+            app = random_name(rng)
+            title = f"{rng.choice(WORDS)} {random_name(rng, 20)} {rng.choice(WORDS)}"
+        process = f"{app}.exe" if rng.random() < 0.5 else random_name(rng)
+        events.append((WindowInfo(title, app, process), rng.randrange(monitors)))
+    return events
+
+
+def linear_match(rules, info, monitor):
+    """Reference matcher that checks every rule in order."""
+    for rule in rules:
+        if rule.matches(info, monitor):
+            return rule
+    return None
+
+
+def time_matches(name, match, events, batch=100):
+    """
+    Time matches in batches so timer overhead does not dominate.
+
+    Returns:
+        Tuple of (result dictionary, list of matched rules)
+    """
+    samples = []
+    matched = []
+    clock = time.perf_counter
+    for start in range(0, len(events), batch):
+        chunk = events[start:start + batch]
+        begin = clock()
+        for info, monitor in chunk:
+            matched.append(match(info, monitor))
+        samples.append((clock() - begin) / len(chunk))
+    result = summarize(name, samples, sum(samples))
+    result['iterations'] = len(events)
+    return result, matched
+
+
+def run_end_to_end(rules, events):
+    """
+    Open windows on the fake backend and let the executor apply the rules.
+
+    Returns:
+        Result dictionary with the time from window creation until every rule was applied
+    """
+    backend = FakeBackend()
+    snapper = WindowSnapper(backend, rules=rules)
+    executor = SnapExecutor(snapper, debounce=0)
+    executor.follow_new_windows()
+    executor.start()
+    backend.reset_counters()
+
+    clock = time.perf_counter
+    start = clock()
+    for info, _ in events:
+        backend.add_window(info.title, info.app, focus=False, process=info.process)
+    executor.wait_idle()
+    total = clock() - start
+    executor.stop()
+
+    result = summarize(f"end to end {len(rules)} rules", [total / len(events)] * len(events), total)
+    result['native_calls_per_op'] = backend.native_calls / len(events)
+    result['matched'] = snapper.rules.matched
+    return result
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure window rule matching against hundreds of rules.")
+    parser.add_argument('--rules', type=int, nargs='+', default=[10, 100, 500, 2000], help="rule counts")
+    parser.add_argument('--events', type=int, default=5000, help="window-create events per rule count")
+    parser.add_argument('--linear', action='store_true', help="also time a linear scan for comparison")
+    parser.add_argument('--budget-p99-ms', type=float, default=None, help="fail if a compiled match p99 exceeds this")
+    parser.add_argument('--seed', type=int, default=1, help="random seed")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    compiled = []
+    mismatches = 0
+    for count in args.rules:
+        rng = random.Random(args.seed)
+        rules, apps, tags = build_rules(count, rng)
+        events = build_events(args.events, apps, tags, rng)
+
+        begin = time.perf_counter()
+        engine = RuleEngine(rules)
+        compile_ms = (time.perf_counter() - begin) * 1000
+
+        result, matched = time_matches(f"compiled {count} rules", engine.match, events)
+        result['compile_ms'] = compile_ms
+        result['matched'] = sum(1 for rule in matched if rule is not None)
+        results.append(result)
+        compiled.append(result)
+
+        # The compiled matcher has to pick exactly the rule a linear scan picks
+        expected = [linear_match(rules, info, monitor) for info, monitor in events]
+        mismatches += sum(1 for got, want in zip(matched, expected) if got is not want)
+        if args.linear:
+            results.append(time_matches(f"linear {count} rules", lambda info, monitor: linear_match(rules, info, monitor), events)[0])
+        results.append(run_end_to_end(rules, events[:1000]))
+
+    print_report(results, args.json)
+    if not args.json:
+        for result in compiled:
+            print(f"{result['name']}: compiled in {result['compile_ms']:.1f} ms, {result['matched']} of {result['iterations']} events matched")
+
+    if mismatches:
+        print(f"Compiled matcher disagreed with the linear scan on {mismatches} events")
+        return 1
+    over_budget = check_budget(compiled, args.budget_p99_ms)
+    if over_budget:
+        print(f"Over the {args.budget_p99_ms} ms p99 budget: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
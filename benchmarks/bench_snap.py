@@ -0,0 +1,101 @@
+"""
+Snap latency benchmark for SnapStack.
+Runs the snap operations against the in-memory backend so it works on a headless machine.
+
+Usage:
+    python -m benchmarks.bench_snap --latency-ms 0.2 --budget-p99-ms 5
+"""
+
+import argparse
+import sys
+
+from backends.fake import FakeBackend
+from benchmarks.harness import check_budget, print_report, run_case
+from snapper import WindowSnapper
+
+
+def build_snapper(windows, latency):
+    """
+    Create a snapper over a fake desktop.
+
+    Args:
+        windows: Number of simulated windows
+        latency: Simulated seconds per native call
+
+    Returns:
+        Tuple of (WindowSnapper, FakeBackend)
+    """
+    backend = FakeBackend(latency=latency)
+    for index in range(windows):
+        backend.add_window(title=f"Window {index}", app=f"app{index % 8}", x=index, y=index)
+    return WindowSnapper(backend), backend
+
+
+def run(iterations, windows, latency):
+    """
+    Run every snap benchmark case.
+
+    Args:
+        iterations: Timed iterations per case
+        windows: Number of simulated windows
+        latency: Simulated seconds per native call
+
+    Returns:
+        List of result dictionaries
+    """
+    snapper, backend = build_snapper(windows, latency)
+
+    toggle = [False]
+
+    def alternate():
+        toggle[0] = not toggle[0]
+        if toggle[0]:
+            snapper.snap_to_top()
+        else:
+            snapper.snap_to_bottom()
+
+    all_windows = list(backend.windows.values())
+    monitor = snapper.monitor
+
+    def move_all_sequentially():
+        for index, window in enumerate(all_windows):
+            backend.set_geometry(window, monitor.x + index, monitor.y + index, 800, 600)
+
+    def move_all_in_transaction():
+        with snapper.begin_transaction() as transaction:
+            for index, window in enumerate(all_windows):
+                transaction.set_geometry(window, monitor.x + index, monitor.y + index, 800, 600)
+
+    cases = [
+        ('snap_to_top', snapper.snap_to_top),
+        ('snap_to_bottom', snapper.snap_to_bottom),
+        ('snap_alternating', alternate),
+        ('bulk_move_sequential', move_all_sequentially),
+        ('bulk_move_transaction', move_all_in_transaction),
+    ]
+
+    return [run_case(name, operation, iterations, backend=backend) for name, operation in cases]
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure SnapStack snap latency against a simulated backend.")
+    parser.add_argument('--iterations', type=int, default=2000, help="timed iterations per case")
+    parser.add_argument('--windows', type=int, default=20, help="number of simulated windows")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="simulated latency per native call")
+    parser.add_argument('--budget-p99-ms', type=float, default=None, help="fail if any case exceeds this p99")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.iterations, args.windows, args.latency_ms / 1000)
+    print_report(results, args.json)
+
+    over_budget = check_budget(results, args.budget_p99_ms)
+    if over_budget:
+        print(f"p99 budget of {args.budget_p99_ms} ms exceeded by: {', '.join(over_budget)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Stack-all benchmark for SnapStack.
+Tiles hundreds of simulated windows with artificial per-call latency to show how bulk stacking scales.
+
+Usage:
+    python -m benchmarks.bench_stack_all --latency-ms 1 --budget-p99-ms 100
+"""
+
+import argparse
+import sys
+
+from backends.fake import FakeBackend
+from benchmarks.harness import check_budget, print_report, run_case
+from snapper import WindowSnapper
+
+# Dispatch strategies compared by the benchmark: (label, batching, max_workers)
+STRATEGIES = (
+    ('native batch', True, 1),
+    ('concurrent', False, 16),
+    ('sequential', False, 1),
+)
+
+
+def build_desktop(windows, latency, batching, max_workers):
+    """
+    Create a snapper over a fake desktop full of windows.
+
+    Returns:
+        Tuple of (WindowSnapper, FakeBackend)
+    """
+    backend = FakeBackend(latency=latency, batching=batching, max_workers=max_workers)
+    for index in range(windows):
+        backend.add_window(
+            title=f"Window {index}", app=f"app{index % 12}",
+            x=(index * 37) % 1200, y=(index * 53) % 700, width=640, height=400,
+        )
+    return WindowSnapper(backend), backend
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure stacking every window on a monitor.")
+    parser.add_argument('--windows', type=int, nargs='+', default=[24, 100, 300], help="window counts to test")
+    parser.add_argument('--latency-ms', type=float, default=1.0, help="simulated latency per native call")
+    parser.add_argument('--iterations', type=int, default=20, help="timed runs per case")
+    parser.add_argument('--sequential', action='store_true', help="include the one-call-per-window baseline")
+    parser.add_argument('--budget-p99-ms', type=float, default=None, help="fail if a batched case exceeds this p99")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for count in args.windows:
+        for label, batching, max_workers in STRATEGIES:
+            if label == 'sequential' and not args.sequential:
+                continue
+            snapper, backend = build_desktop(count, args.latency_ms / 1000, batching, max_workers)
+            monitor = snapper.monitor
+            result = run_case(
+                f"stack_all {count} {label}",
+                lambda: snapper.stack_all(monitor),
+                args.iterations,
+                warmup=2,
+                backend=backend,
+            )
+            result['strategy'] = label
+            results.append(result)
+            backend.close()
+
+    print_report(results, args.json)
+
+    # The baseline is expected to be slow, only the real strategies are budgeted
+    budgeted = [result for result in results if result['strategy'] != 'sequential']
+    over_budget = check_budget(budgeted, args.budget_p99_ms)
+    if over_budget:
+        print(f"p99 budget of {args.budget_p99_ms} ms exceeded by: {', '.join(over_budget)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Startup benchmark for SnapStack.
+Launches the application in fresh interpreters and reports import time, time until the hotkeys are live and time until the UI is built.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_startup --runs 5 --budget-import-ms 100 --budget-hotkeys-ms 500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter. Qt teardown is skipped with os._exit since
+# only startup is measured.
+CHILD_SCRIPT = """
+import json, os, sys, time
+began = time.perf_counter()
+import main
+imported = time.perf_counter()
+app = main.SnapStackApp()
+marks = app.startup_marks
+print(json.dumps({
+    'import_ms': (imported - began) * 1000,
+    'hotkeys_ms': (marks['hotkeys'] - began) * 1000,
+    'ui_ms': (marks['ui'] - began) * 1000,
+}))
+sys.stdout.flush()
+os._exit(0)
+"""
+
+
+def launch(env):
+    """
+    Start the application once in a new interpreter.
+
+    Returns:
+        Dictionary of startup milestones in milliseconds, including the
+        wall time of the whole process
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    lines = [line for line in completed.stdout.splitlines() if line.startswith('{')]
+    if completed.returncode != 0 or not lines:
+        raise RuntimeError(f"Startup run failed:\n{completed.stdout}\n{completed.stderr}")
+    marks = json.loads(lines[-1])
+    marks['process_ms'] = wall_ms
+    return marks
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure application startup.")
+    parser.add_argument('--runs', type=int, default=5, help="warm launches after the first, cold one")
+    parser.add_argument('--budget-import-ms', type=float, default=None, help="fail if the median import time exceeds this")
+    parser.add_argument('--budget-hotkeys-ms', type=float, default=None, help="fail if the median time to live hotkeys exceeds this")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    # A private cache directory makes the first launch a cold one
+    with tempfile.TemporaryDirectory(prefix='snapstack-cache-') as cache_dir:
+        env = dict(os.environ, XDG_CACHE_HOME=cache_dir, LOCALAPPDATA=cache_dir)
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        cold = launch(env)
+        warm = [launch(env) for _ in range(args.runs)]
+
+    keys = ('import_ms', 'hotkeys_ms', 'ui_ms', 'process_ms')
+    summary = {
+        'cold': cold,
+        'warm_median': {key: statistics.median(run[key] for run in warm) for key in keys},
+        'warm_max': {key: max(run[key] for run in warm) for key in keys},
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"{'launch':<14} {'import ms':>10} {'hotkeys ms':>11} {'ui ms':>9} {'process ms':>11}")
+        for name, marks in (('cold', cold), ('warm median', summary['warm_median']), ('warm max', summary['warm_max'])):
+            print(
+                f"{name:<14} {marks['import_ms']:>10.1f} {marks['hotkeys_ms']:>11.1f} "
+                f"{marks['ui_ms']:>9.1f} {marks['process_ms']:>11.1f}"
+            )
+
+    failures = []
+    median = summary['warm_median']
+    if args.budget_import_ms is not None and median['import_ms'] > args.budget_import_ms:
+        failures.append(f"import {median['import_ms']:.1f} ms > {args.budget_import_ms} ms")
+    if args.budget_hotkeys_ms is not None and median['hotkeys_ms'] > args.budget_hotkeys_ms:
+        failures.append(f"hotkeys {median['hotkeys_ms']:.1f} ms > {args.budget_hotkeys_ms} ms")
+    if failures:
+        print(f"Startup budget exceeded: {', '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Snap tracing overhead benchmark for SnapStack.
+Times snaps with the phase tracer on and off to show what the instrumentation costs.
+
+Usage:
+    python -m benchmarks.bench_tracing --budget-overhead-us 20
+"""
+
+import argparse
+import sys
+import time
+
+from benchmarks.bench_snap import build_snapper
+from benchmarks.harness import print_report, summarize
+from snap_executor import SnapExecutor, snap_command
+from tracing import LatencyHistogram
+
+
+def run(iterations, windows):
+    """
+    Time direct and executor snaps with tracing switched on and off.
+
+    Traced and untraced snaps alternate on the same snapper and executor,
+    so thread scheduling and cache effects hit both cases alike.
+
+    Returns:
+        List of result dictionaries, untraced and traced case next to each other
+    """
+    snapper, backend = build_snapper(windows, 0.0)
+    executor = SnapExecutor(snapper, debounce=0, coalesce=False)
+    executor.start()
+    slot = [0]
+
+    def direct():
+        slot[0] ^= 1
+        snapper.snap_to_slot('halves', slot[0])
+
+    def through_executor():
+        slot[0] ^= 1
+        executor.run(snap_command('halves', slot[0]))
+
+    results = []
+    clock = time.perf_counter
+    for kind, operation in (('direct', direct), ('executor', through_executor)):
+        for _ in range(100):
+            operation()
+        samples = {False: [], True: []}
+        for index in range(2 * iterations):
+            enabled = bool(index % 2)
+            snapper.tracer.enabled = enabled
+            begin = clock()
+            operation()
+            samples[enabled].append(clock() - begin)
+        for enabled in (False, True):
+            label = 'traced' if enabled else 'untraced'
+            results.append(summarize(f"{kind} snap {label}", samples[enabled], sum(samples[enabled])))
+    executor.stop()
+    return results
+
+
+def time_record(samples):
+    """
+    Time LatencyHistogram.record on its own.
+
+    Returns:
+        Microseconds per recorded sample
+    """
+    histogram = LatencyHistogram()
+    values = [index * 1e-6 for index in range(1, 5000)]
+    begin = time.perf_counter()
+    for index in range(samples):
+        histogram.record(values[index % len(values)])
+    return (time.perf_counter() - begin) / samples * 1e6
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure the cost of snap phase tracing.")
+    parser.add_argument('--iterations', type=int, default=5000, help="timed snaps per case")
+    parser.add_argument('--windows', type=int, default=20, help="number of simulated windows")
+    parser.add_argument('--budget-overhead-us', type=float, default=None,
+                        help="fail if tracing adds more than this to the median direct snap")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.iterations, args.windows)
+    print_report(results, args.json)
+
+    by_name = {result['name']: result for result in results}
+    overhead = {
+        kind: (by_name[f"{kind} snap traced"]['p50_ms'] - by_name[f"{kind} snap untraced"]['p50_ms']) * 1000
+        for kind in ('direct', 'executor')
+    }
+    if not args.json:
+        print(f"histogram record: {time_record(200000):.2f} us per sample")
+        for kind, micros in overhead.items():
+            print(f"{kind} snap: tracing adds {micros:.1f} us at p50")
+
+    if args.budget_overhead_us is not None and overhead['direct'] > args.budget_overhead_us:
+        print(f"Tracing overhead of {overhead['direct']:.1f} us exceeds the {args.budget_overhead_us} us budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
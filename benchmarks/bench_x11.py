@@ -0,0 +1,124 @@
+"""
+X11 snap benchmark for SnapStack.
+Measures round trips per snap and end-to-end latency against a real X server.
+
+Usage (headless):
+    xvfb-run -a python -m benchmarks.bench_x11
+"""
+
+import argparse
+import sys
+import time
+
+from Xlib import X, display
+
+from backends.x11 import X11Backend
+from benchmarks.harness import check_budget, print_report, summarize
+from snapper import WindowSnapper
+
+
+def create_client_windows(connection, count):
+    """
+    Create and map plain top-level windows from a separate client connection.
+
+    Args:
+        connection: Xlib display used as the simulated application
+        count: Number of windows to create
+
+    Returns:
+        List of the created windows
+    """
+    root = connection.screen().root
+    windows = []
+    for index in range(count):
+        window = root.create_window(
+            20 * index, 20 * index, 640, 480, 0,
+            connection.screen().root_depth,
+            X.InputOutput,
+            X.CopyFromParent,
+            event_mask=X.StructureNotifyMask,
+        )
+        window.set_wm_name(f"SnapStack bench {index}")
+        window.map()
+        windows.append(window)
+    connection.sync()
+    return windows
+
+
+def time_snaps(snapper, backend, iterations, sync):
+    """
+    Alternate top and bottom snaps and collect latency and round trips.
+
+    Args:
+        snapper: WindowSnapper using the X11 backend
+        backend: The X11Backend instance
+        iterations: Number of snaps to time
+        sync: Wait for the X server to process each snap before stopping the clock
+
+    Returns:
+        Result dictionary
+    """
+    backend.reset_counters()
+    samples = []
+    clock = time.perf_counter
+    for index in range(iterations):
+        start = clock()
+        if index % 2:
+            snapper.snap_to_bottom()
+        else:
+            snapper.snap_to_top()
+        if sync:
+            backend.display.sync()
+        samples.append(clock() - start)
+
+    # The sync round trip belongs to the measurement, not the snap
+    snap_round_trips = backend.round_trips - (iterations if sync else 0)
+    name = 'snap_end_to_end' if sync else 'snap_dispatch'
+    return summarize(name, samples, sum(samples), {
+        'round_trips_per_op': snap_round_trips / iterations,
+        'native_calls_per_op': backend.native_calls / iterations,
+    })
+
+
+def main(argv=None):
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Measure SnapStack snap cost on an X server.")
+    parser.add_argument('--display', default=None, help="X display, defaults to $DISPLAY")
+    parser.add_argument('--iterations', type=int, default=1000, help="timed snaps per case")
+    parser.add_argument('--windows', type=int, default=10, help="number of client windows to create")
+    parser.add_argument('--budget-p99-ms', type=float, default=None, help="fail if any case exceeds this p99")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    client = display.Display(args.display)
+    windows = create_client_windows(client, args.windows)
+    client.set_input_focus(windows[-1], X.RevertToParent, X.CurrentTime)
+    client.sync()
+
+    backend = X11Backend(args.display)
+    snapper = WindowSnapper(backend)
+
+    # Warm the frame extent cache the same way a long-running session would
+    snapper.snap_to_top()
+
+    results = [
+        time_snaps(snapper, backend, args.iterations, sync=False),
+        time_snaps(snapper, backend, args.iterations, sync=True),
+    ]
+    print_report(results, args.json)
+    if not args.json:
+        for result in results:
+            print(f"{result['name']}: {result['round_trips_per_op']:.2f} round trips per snap")
+
+    backend.close()
+    client.close()
+
+    over_budget = check_budget(results, args.budget_p99_ms)
+    if over_budget:
+        print(f"p99 budget of {args.budget_p99_ms} ms exceeded by: {', '.join(over_budget)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Shared helpers for SnapStack benchmarks.
+Times operations and reports latency percentiles and throughput.
+"""
+
+import json
+import math
+import time
+
+
+def percentile(samples, fraction):
+    """
+    Get a percentile from a sorted list of samples.
+
+    Args:
+        samples: Sorted list of numbers
+        fraction: Percentile as a fraction, e.g. 0.99
+
+    Returns:
+        The sample at that percentile using the nearest-rank method
+    """
+    if not samples:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(samples)))
+    return samples[rank - 1]
+
+
+def summarize(name, samples, total_seconds, extra=None):
+    """
+    Build a result dictionary from latency samples.
+
+    Args:
+        name: Benchmark case name
+        samples: Latencies in seconds, one per operation
+        total_seconds: Wall time for all operations
+        extra: Optional dictionary of additional values to report
+
+    Returns:
+        Dictionary with latency percentiles in milliseconds and throughput
+    """
+    ordered = sorted(samples)
+    result = {
+        'name': name,
+        'iterations': len(ordered),
+        'p50_ms': percentile(ordered, 0.50) * 1000,
+        'p99_ms': percentile(ordered, 0.99) * 1000,
+        'max_ms': (ordered[-1] if ordered else 0.0) * 1000,
+        'ops_per_sec': len(ordered) / total_seconds if total_seconds else 0.0,
+    }
+    if extra:
+        result.update(extra)
+    return result
+
+
+def run_case(name, operation, iterations, warmup=10, setup=None, backend=None):
+    """
+    Time an operation repeatedly.
+
+    Args:
+        name: Benchmark case name
+        operation: Callable to time, called with no arguments
+        iterations: Number of timed calls
+        warmup: Number of untimed calls made first
+        setup: Optional callable run before every call, outside the timing
+        backend: Optional WindowBackend whose native calls per operation are reported
+
+    Returns:
+        Result dictionary from summarize()
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        operation()
+    if backend:
+        backend.reset_counters()
+
+    samples = []
+    clock = time.perf_counter
+    total = 0.0
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = clock()
+        operation()
+        elapsed = clock() - start
+        samples.append(elapsed)
+        total += elapsed
+
+    extra = None
+    if backend:
+        extra = {'native_calls_per_op': backend.native_calls / iterations if iterations else 0.0}
+    return summarize(name, samples, total, extra)
+
+
+def print_report(results, as_json=False):
+    """
+    Print benchmark results as a table or as JSON.
+
+    Args:
+        results: List of result dictionaries
+        as_json: Print JSON instead of a table
+    """
+    if as_json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'case':<32} {'iters':>8} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10} {'ops/s':>12} {'calls/op':>9}")
+    for result in results:
+        calls = result.get('native_calls_per_op')
+        print(
+            f"{result['name']:<32} {result['iterations']:>8} "
+            f"{result['p50_ms']:>10.3f} {result['p99_ms']:>10.3f} "
+            f"{result['max_ms']:>10.3f} {result['ops_per_sec']:>12.1f} "
+            f"{'-' if calls is None else format(calls, '.1f'):>9}"
+        )
+
+
+def check_budget(results, p99_budget_ms):
+    """
+    Check results against a p99 latency budget.
+
+    Args:
+        results: List of result dictionaries
+        p99_budget_ms: Maximum allowed p99 latency in milliseconds, or None
+
+    Returns:
+        List of names of the cases that exceeded the budget
+    """
+    if p99_budget_ms is None:
+        return []
+    return [result['name'] for result in results if result['p99_ms'] > p99_budget_ms]
@@ -0,0 +1,442 @@
+"""
+Command socket for SnapStack.
+Serves snap commands to scripts over a local Unix-domain socket speaking JSON lines.
+
+Every request is one line holding a JSON object, or a JSON array of objects
+for a batch. Each gets one reply line in the same shape:
+
+    {"id": 1, "op": "snap", "layout": "halves", "slot": 0}
+    {"id": 1, "ok": true, "result": true}
+
+Supported ops: ping, snap, stack_all, undo, redo, restore_all,
+save_profile, restore_profile, layouts, windows, profiles, stats, trace,
+log and log_level.
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+
+from log_service import get_log_service
+from snap_executor import (
+    redo_command, restore_all_command, restore_profile_command, save_profile_command, snap_command,
+    stack_all_command, undo_command,
+)
+
+logger = logging.getLogger(__name__)
+
+# Ops carried out by the snap executor, mapped to their command builders
+COMMAND_OPS = {
+    'snap': snap_command,
+    'stack_all': stack_all_command,
+    'undo': undo_command,
+    'redo': redo_command,
+    'restore_all': restore_all_command,
+    'save_profile': save_profile_command,
+    'restore_profile': restore_profile_command,
+}
+
+# Seconds a request waits for the executor before failing
+REQUEST_TIMEOUT = 10.0
+
+
+class ProtocolError(Exception):
+    """A request that cannot be carried out, reported back to the client."""
+
+
+def _json_key(key):
+    """Make a window key JSON friendly, tuples become lists."""
+    return list(key) if isinstance(key, tuple) else key
+
+
+def _window_key(value):
+    """Turn a window key received as JSON back into a registry key."""
+    return tuple(_window_key(item) for item in value) if isinstance(value, list) else value
+
+
+class CommandDispatcher:
+    """Turns decoded requests into executor commands and replies."""
+
+    def __init__(self, snapper, executor, timeout=REQUEST_TIMEOUT):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            snapper: WindowSnapper providing layouts, windows and diagnostics
+            executor: Running SnapExecutor the snap commands go through
+            timeout: Seconds to wait for a command to finish
+        """
+        self.snapper = snapper
+        self.executor = executor
+        self.timeout = timeout
+        self.queries = {
+            'ping': lambda request: 'pong',
+            'layouts': self._layouts,
+            'windows': self._windows,
+            'profiles': lambda request: self.snapper.profiles.names(),
+            'stats': self._stats,
+            'trace': lambda request: self.snapper.tracer.export(),
+            'log': self._log,
+            'log_level': self._log_level,
+        }
+
+    def _layouts(self, request):
+        """Describe the configured layouts."""
+        return [
+            {'name': layout.name, 'label': layout.label, 'slots': list(layout.slots)}
+            for layout in self.snapper.layout_engine.layouts.values()
+        ]
+
+    def _windows(self, request):
+        """List the tracked windows with the keys snap requests accept."""
+        registry = self.snapper.registry
+        if not registry.live:
+            raise ProtocolError("Window tracking is not available on this backend")
+        records, active_key = registry.snapshot()
+        return [
+            {
+                'window': _json_key(record.key),
+                'geometry': None if record.geometry is None else list(record.geometry),
+                'active': record.key == active_key,
+            }
+            for record in records
+        ]
+
+    def _stats(self, request):
+        """Report executor counters and snapper diagnostics."""
+        return {'executor': self.executor.stats(), 'snapper': self.snapper.diagnostics()}
+
+    def _log(self, request):
+        """Report the log levels and the state of the log queue."""
+        service = get_log_service()
+        if service is None:
+            raise ProtocolError("Logging is not configured")
+        return {**service.levels(), 'stats': service.stats()}
+
+    def _log_level(self, request):
+        """Change the default level, or one module's level with `logger`."""
+        service = get_log_service()
+        if service is None:
+            raise ProtocolError("Logging is not configured")
+        level = request.get('level')
+        logger_name = request.get('logger')
+        if not isinstance(level, str) or not (logger_name is None or isinstance(logger_name, str)):
+            raise ProtocolError("log_level needs a level name and an optional logger name")
+        try:
+            service.set_level(level, logger_name)
+        except ValueError as e:
+            raise ProtocolError(str(e))
+        return service.levels()
+
+    def _target_window(self, request):
+        """Resolve the optional window key of a request to a window object."""
+        if request.get('window') is None:
+            return None
+        registry = self.snapper.registry
+        if not registry.live:
+            raise ProtocolError("Window tracking is not available on this backend")
+        record = registry.records.get(_window_key(request['window']))
+        if record is None:
+            raise ProtocolError(f"Unknown window: {request['window']}")
+        return record.window
+
+    def _command(self, request):
+        """Build the SnapCommand for a request handled by the executor."""
+        op = request.get('op')
+        if op in ('stack_all', 'restore_all'):
+            return COMMAND_OPS[op]()
+        if op in ('undo', 'redo'):
+            return COMMAND_OPS[op](self._target_window(request))
+        if op in ('save_profile', 'restore_profile'):
+            name = request.get('name')
+            if not isinstance(name, str) or not name:
+                raise ProtocolError(f"{op} needs a profile name")
+            return COMMAND_OPS[op](name)
+
+        layout = request.get('layout')
+        slot = request.get('slot')
+        # bool is an int subclass, so true and false would pass as slots 1 and 0
+        if not isinstance(layout, str) or isinstance(slot, bool) or not isinstance(slot, int):
+            raise ProtocolError("snap needs a layout name and an integer slot")
+        try:
+            slots = self.snapper.layout_engine.get_layout(layout).slots
+        except KeyError:
+            raise ProtocolError(f"Unknown layout: {layout}")
+        if not 0 <= slot < len(slots):
+            raise ProtocolError(f"Layout {layout} has no slot {slot}")
+        return snap_command(layout, slot, self._target_window(request))
+
+    def _reply(self, request, ok, value):
+        """Build a reply carrying the request id."""
+        key = 'result' if ok else 'error'
+        return {'id': request.get('id') if isinstance(request, dict) else None, 'ok': ok, key: value}
+
+    def dispatch_batch(self, requests):
+        """
+        Carry out a list of requests.
+
+        Snap commands are queued on the executor together and run back to
+        back, so a batch costs one wake-up of the worker thread.
+
+        Args:
+            requests: List of decoded request dictionaries
+
+        Returns:
+            List of reply dictionaries in request order
+        """
+        replies = [None] * len(requests)
+        commands = []
+        for index, request in enumerate(requests):
+            try:
+                if not isinstance(request, dict):
+                    raise ProtocolError("Request must be a JSON object")
+                op = request.get('op')
+                if op in self.queries:
+                    replies[index] = self._reply(request, True, self.queries[op](request))
+                elif op in COMMAND_OPS:
+                    commands.append((index, self._command(request)))
+                else:
+                    raise ProtocolError(f"Unknown op: {op}")
+            except ProtocolError as e:
+                replies[index] = self._reply(request, False, str(e))
+            except Exception as e:
+                logger.exception("Error handling socket request %r", request)
+                replies[index] = self._reply(request, False, f"Internal error: {e}")
+
+        if commands:
+            try:
+                results = self.executor.run_batch([command for _, command in commands], self.timeout)
+            except Exception as e:
+                results = [None] * len(commands)
+                logger.error("Error running socket commands: %s", e)
+            for (index, _), result in zip(commands, results):
+                if result is None:
+                    replies[index] = self._reply(requests[index], False, "Command did not finish")
+                elif result.success:
+                    replies[index] = self._reply(requests[index], True, result.value)
+                else:
+                    replies[index] = self._reply(requests[index], False, f"{result.command.action} failed")
+        return replies
+
+    def dispatch_line(self, line):
+        """
+        Handle one request line.
+
+        Args:
+            line: Bytes or string holding a JSON object or array
+
+        Returns:
+            Reply line as bytes, newline terminated
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            reply = self._reply(None, False, f"Invalid JSON: {e}")
+        else:
+            if isinstance(request, list):
+                reply = self.dispatch_batch(request)
+            else:
+                reply = self.dispatch_batch([request])[0]
+        try:
+            encoded = json.dumps(reply, separators=(',', ':'))
+        except (TypeError, ValueError) as e:
+            # A result that is not JSON serialisable must not cost the client its connection
+            logger.error("Error encoding socket reply: %s", e)
+            if isinstance(reply, list):
+                reply = [self._encodable(item) for item in reply]
+            else:
+                reply = self._encodable(reply)
+            encoded = json.dumps(reply, separators=(',', ':'))
+        return encoded.encode('utf-8') + b'\n'
+
+    def _encodable(self, reply):
+        """Return a reply as is if it encodes as JSON, or an error reply with the same id."""
+        try:
+            json.dumps(reply)
+        except (TypeError, ValueError) as e:
+            return {'id': reply.get('id'), 'ok': False, 'error': f"Result could not be encoded: {e}"}
+        return reply
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    """Reads request lines from one client connection and writes the replies."""
+
+    def handle(self):
+        dispatcher = self.server.dispatcher
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = dispatcher.dispatch_line(line)
+            except Exception as e:
+                logger.exception("Error handling socket request line")
+                reply = json.dumps({'id': None, 'ok': False, 'error': f"Internal error: {e}"}).encode('utf-8') + b'\n'
+            self.wfile.write(reply)
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CommandServer:
+    """Unix-domain socket server feeding a SnapExecutor."""
+
+    def __init__(self, snapper, executor, path):
+        """
+        Initialize the server.
+
+        Args:
+            snapper: WindowSnapper the commands act on
+            executor: Running SnapExecutor the snap commands go through
+            path: Filesystem path of the socket
+        """
+        self.path = path
+        self.dispatcher = CommandDispatcher(snapper, executor)
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """
+        Bind the socket and serve clients on a background thread.
+
+        Returns:
+            Boolean: True if the server is listening
+        """
+        if not hasattr(socket, 'AF_UNIX'):
+            logger.warning("Command socket is not supported on this platform")
+            return False
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            if os.path.exists(self.path):
+                # Left behind by a previous run, refuse if someone still listens on it
+                if _socket_in_use(self.path):
+                    logger.warning("Command socket %s is already in use", self.path)
+                    return False
+                os.unlink(self.path)
+            self._server = _ThreadingUnixServer(self.path, _CommandHandler)
+            os.chmod(self.path, 0o600)
+        except OSError as e:
+            logger.error("Failed to open command socket %s: %s", self.path, e)
+            return False
+
+        self._server.dispatcher = self.dispatcher
+        self._thread = threading.Thread(target=self._server.serve_forever, name='snapstack-socket', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop serving and remove the socket file."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def _socket_in_use(path):
+    """Check whether a server is accepting connections on a socket path."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+class CommandClient:
+    """Client side of the command socket."""
+
+    def __init__(self, path, timeout=REQUEST_TIMEOUT):
+        """
+        Connect to a running daemon.
+
+        Args:
+            path: Filesystem path of the socket
+            timeout: Seconds to wait for a reply
+
+        Raises:
+            OSError: If the daemon is not reachable
+        """
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(path)
+        self._reader = self._socket.makefile('rb')
+        self._next_id = 0
+
+    def close(self):
+        """Close the connection."""
+        self._reader.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _with_id(self, request):
+        """Copy a request, assigning an id if it has none."""
+        request = dict(request)
+        if 'id' not in request:
+            self._next_id += 1
+            request['id'] = self._next_id
+        return request
+
+    def _read_reply(self):
+        """Read and decode one reply line."""
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Command socket closed by the daemon")
+        return json.loads(line)
+
+    def request(self, request):
+        """
+        Send one request and wait for its reply.
+
+        Args:
+            request: Dictionary with an op and its arguments
+
+        Returns:
+            Reply dictionary
+        """
+        self._socket.sendall(json.dumps(self._with_id(request)).encode('utf-8') + b'\n')
+        return self._read_reply()
+
+    def batch(self, requests):
+        """
+        Send requests as one batch line and wait for the combined reply.
+
+        Returns:
+            List of reply dictionaries in request order
+        """
+        requests = [self._with_id(request) for request in requests]
+        self._socket.sendall(json.dumps(requests).encode('utf-8') + b'\n')
+        return self._read_reply()
+
+    def pipeline(self, requests):
+        """
+        Send every request on its own line without waiting, then read all replies.
+
+        Returns:
+            List of reply dictionaries in request order
+        """
+        lines = b''.join(
+            json.dumps(self._with_id(request)).encode('utf-8') + b'\n' for request in requests
+        )
+        # Send from another thread so neither side blocks on a full socket buffer
+        sender = threading.Thread(target=self._socket.sendall, args=(lines,), daemon=True)
+        sender.start()
+        replies = [self._read_reply() for _ in requests]
+        sender.join()
+        return replies
@@ -0,0 +1,209 @@
+"""
+Configuration file handling for SnapStack.
+Loads user settings from a JSON file in the platform's config directory.
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+
+from utils.monitor_info import get_system_platform
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the config file for changes
+CONFIG_POLL_SECONDS = 1.0
+
+# Settings used when the config file is missing or leaves a key out
+DEFAULT_CONFIG = {
+    'layouts': None,  # None selects the built-in layouts
+    'rules': [],  # Window rules snapping new windows automatically
+    'hotkeys': None,  # None selects the built-in hotkeys
+    'drag': {
+        'enabled': True,  # Snap windows dropped at a monitor's top or bottom edge
+        'layout': 'halves',  # Layout whose first and last slots the edges snap to
+        'edge': 8,  # Depth of the edge zones in logical pixels
+        'preview': True,  # Show where the window will go while it is held at an edge
+    },
+    'animation': {
+        'enabled': False,  # Move windows to their slot over a short transition instead of at once
+        'duration_ms': 150,
+        'frame_rate': None,  # Frames per second, None follows the display refresh rate
+    },
+    'log': {
+        'level': 'INFO',  # Default level for every module
+        'modules': {},  # Per-module levels, e.g. {"backends.x11": "DEBUG"}
+        'file': None,  # None selects get_log_path()
+        'max_bytes': 1024 * 1024,  # Size at which the log file is rotated
+        'backups': 3,  # Rotated files kept
+        'console': True,  # Also write to stderr when there is one
+        'console_level': 'INFO',
+        'ring_size': 4096,  # Records queued before the oldest are dropped
+    },
+}
+
+
+def get_config_dir():
+    """
+    Get the directory SnapStack keeps its settings in.
+
+    Returns:
+        String path, which may not exist yet
+    """
+    system = get_system_platform()
+    if system == 'Windows':
+        base = os.environ.get('APPDATA') or os.path.expanduser('~')
+    elif system == 'Darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+    return os.path.join(base, 'SnapStack')
+
+
+def get_cache_dir():
+    """
+    Get the directory SnapStack keeps regenerable files in, such as rendered icons.
+
+    Returns:
+        String path, which may not exist yet
+    """
+    system = get_system_platform()
+    if system == 'Windows':
+        base = os.environ.get('LOCALAPPDATA') or os.environ.get('APPDATA') or os.path.expanduser('~')
+    elif system == 'Darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'SnapStack')
+
+
+def get_log_path():
+    """Get the path of the log file, SNAPSTACK_LOG if set, else in the cache directory."""
+    return os.environ.get('SNAPSTACK_LOG') or os.path.join(get_cache_dir(), 'logs', 'snapstack.log')
+
+
+def get_config_path():
+    """Get the path of the JSON config file."""
+    return os.environ.get('SNAPSTACK_CONFIG') or os.path.join(get_config_dir(), 'config.json')
+
+
+def get_socket_path():
+    """
+    Get the path of the daemon's command socket.
+
+    Uses SNAPSTACK_SOCKET if set, otherwise the per-user runtime directory
+    when there is one and the config directory elsewhere.
+    """
+    path = os.environ.get('SNAPSTACK_SOCKET')
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'snapstack.sock')
+    return os.path.join(get_config_dir(), 'snapstack.sock')
+
+
+def load_config(path=None):
+    """
+    Load the user configuration merged over the defaults.
+
+    Args:
+        path: Config file to read, defaults to get_config_path()
+
+    Returns:
+        Dictionary of settings
+    """
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    path = path or get_config_path()
+    if not os.path.exists(path):
+        return config
+
+    try:
+        config.update(_read_user_config(path))
+    except (OSError, ValueError) as e:
+        logger.error("Error reading config file %s: %s", path, e)
+    return config
+
+
+def _read_user_config(path):
+    """
+    Read the settings in a config file.
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If it does not hold a JSON object
+    """
+    with open(path, 'r', encoding='utf-8') as config_file:
+        user_config = json.load(config_file)
+    if not isinstance(user_config, dict):
+        raise ValueError("expected a JSON object")
+    return user_config
+
+
+class ConfigWatcher(threading.Thread):
+    """
+    Thread that reloads the config file when it changes on disk.
+
+    Polls the file's modification time and size, which costs one stat()
+    per interval. A file that fails to parse is reported and skipped, so a
+    half-saved edit never replaces working settings with the defaults.
+    """
+
+    def __init__(self, listener, path=None, interval=CONFIG_POLL_SECONDS):
+        """
+        Initialize the watcher without starting it.
+
+        Args:
+            listener: Callable taking the reloaded config dictionary
+            path: Config file to watch, defaults to get_config_path()
+            interval: Seconds between checks
+        """
+        super().__init__(name='snapstack-config-watcher', daemon=True)
+        self.listener = listener
+        self.path = path or get_config_path()
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.signature = self._signature()
+
+    def _signature(self):
+        """Get what identifies the file's current contents, None if it does not exist."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        """
+        Reload the config if the file changed since the last check.
+
+        Returns:
+            Boolean: True if the listener was called
+        """
+        signature = self._signature()
+        if signature == self.signature:
+            return False
+        self.signature = signature
+
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        if signature is not None:
+            try:
+                config.update(_read_user_config(self.path))
+            except (OSError, ValueError) as e:
+                logger.error("Not reloading config file %s: %s", self.path, e)
+                return False
+        self.listener(config)
+        return True
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error("Error reloading config file %s: %s", self.path, e)
+
+    def stop(self):
+        """Stop watching."""
+        self.stopped.set()
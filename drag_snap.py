@@ -0,0 +1,203 @@
+"""
+Drag-to-edge snapping for SnapStack.
+Snaps a window into the top or bottom slot of a layout when the user drops it at a monitor's top or bottom edge.
+"""
+
+import logging
+from collections import namedtuple
+
+from snap_executor import snap_command
+
+logger = logging.getLogger(__name__)
+
+# Logical pixels from a monitor's top or bottom edge where a drop snaps
+EDGE_THRESHOLD = 8
+
+# A hit zone: dropping a window in it snaps it into `slot` of the layout on
+# `monitor`, which moves it to `rect`. `edge` is 'top' or 'bottom'.
+EdgeZone = namedtuple('EdgeZone', ['monitor', 'edge', 'slot', 'rect'])
+
+
+class EdgeZones:
+    """
+    Top and bottom edge hit zones of every monitor.
+
+    Built once per topology rebuild, with the slot each zone snaps to
+    and the rectangle it fills already resolved, so testing a pointer
+    position is a grid lookup and two comparisons however many monitors
+    and layouts there are.
+    """
+
+    def __init__(self, topology, layout_engine, layout_name, threshold=EDGE_THRESHOLD):
+        """
+        Compute the zones for the current monitors.
+
+        Args:
+            topology: MonitorTopology to build the zones for
+            layout_engine: LayoutEngine holding the layout to snap into
+            layout_name: Layout whose first and last slots the top and bottom edges snap to
+            threshold: Depth of each zone in logical pixels
+        """
+        monitors = topology.monitors
+        self.index = topology.index
+        self.bands = {}
+
+        layout = layout_engine.layouts.get(layout_name)
+        if layout is None:
+            logger.warning("Drag snapping disabled: unknown layout %r", layout_name)
+            return
+        last = len(layout.slots) - 1
+        for monitor in monitors:
+            rects = layout_engine.slot_table(monitor)[layout_name]
+            depth = max(1, monitor.native_length(threshold))
+            rect = monitor.rect
+            self.bands[monitor.index] = (
+                rect.y + depth,
+                rect.y + rect.height - depth,
+                EdgeZone(monitor, 'top', 0, rects[0]),
+                EdgeZone(monitor, 'bottom', last, rects[last]),
+            )
+
+    def hit(self, x, y):
+        """
+        Get the zone a pointer position is in.
+
+        Returns:
+            EdgeZone, or None if the pointer is away from every edge
+        """
+        monitor = self.index.monitor_at(x, y)
+        if monitor is None:
+            return None
+        band = self.bands.get(monitor.index)
+        if band is None:
+            return None
+        top, bottom, top_zone, bottom_zone = band
+        if y < top:
+            return top_zone
+        if y >= bottom:
+            return bottom_zone
+        return None
+
+
+class DragSnapper:
+    """
+    Follows window drags reported by the backend and snaps on drop.
+
+    Nothing runs between drags: the backend's move start, drag and move
+    end events drive everything, and the pointer is only looked at while a
+    window is held. The zones are checked against the topology when a drag
+    starts, not per pointer sample. Drags that change the window's size
+    are resizes and never snap.
+
+    Events arrive on the backend's event thread; the snap itself is
+    submitted to the executor and a preview, if any, is told on each
+    change of zone.
+    """
+
+    def __init__(self, snapper, submit, layout='halves', threshold=EDGE_THRESHOLD, preview=None):
+        """
+        Initialize a drag snapper without listening to drags.
+
+        Args:
+            snapper: WindowSnapper whose registry reports the drags
+            submit: Callable taking the SnapCommand of a drop, e.g. SnapExecutor.submit
+            layout: Layout whose first and last slots the top and bottom edges snap to
+            threshold: Depth of each edge zone in logical pixels
+            preview: Optional object with show_zone(zone) and hide_zone() methods
+        """
+        self.snapper = snapper
+        self.submit = submit
+        self.layout = layout
+        self.threshold = threshold
+        self.preview = preview
+        self.zones = None
+        self.window = None
+        self.size = None
+        self.zone = None
+        self.counters = {'drags': 0, 'samples': 0, 'zone_changes': 0, 'snapped': 0, 'resizes': 0}
+
+    def attach(self):
+        """
+        Start listening to window drags.
+
+        Returns:
+            Boolean: True if the backend reports drags
+        """
+        registry = self.snapper.registry
+        if not (registry.live and self.snapper.backend.reports_drags):
+            logger.info("Drag snapping is not available with the %s backend", self.snapper.backend.name)
+            return False
+        if self not in registry.drag_listeners:
+            registry.drag_listeners.append(self)
+        return True
+
+    def detach(self):
+        """Stop listening to window drags."""
+        if self in self.snapper.registry.drag_listeners:
+            self.snapper.registry.drag_listeners.remove(self)
+
+    def current_zones(self):
+        """Get the edge zones, rebuilding them if the monitors changed since the last drag."""
+        topology = self.snapper.topology
+        # Every rebuild of the topology makes a new monitor index
+        if self.zones is None or self.zones.index is not topology.index:
+            self.zones = EdgeZones(topology, self.snapper.layout_engine, self.layout, self.threshold)
+        return self.zones
+
+    def _window_size(self, window):
+        """Get the tracked size of a window, None if unknown."""
+        geometry = self.snapper.registry.geometry(window)
+        return None if geometry is None else (geometry.width, geometry.height)
+
+    def on_move_start(self, window, x, y):
+        """Begin following a drag."""
+        self.window = window
+        self.size = self._window_size(window)
+        self.zone = None
+        self.counters['drags'] += 1
+        self.current_zones()
+        self.on_drag(window, x, y)
+
+    def on_drag(self, window, x, y):
+        """Update the preview when the pointer enters or leaves a zone."""
+        if self.window is None:
+            return
+        self.counters['samples'] += 1
+        zone = self.zones.hit(x, y)
+        if zone is not None and self._window_size(window) != self.size:
+            # The user is resizing by an edge, not moving the window
+            zone = None
+        if zone is self.zone:
+            return
+        self.zone = zone
+        self.counters['zone_changes'] += 1
+        if self.preview is not None:
+            if zone is None:
+                self.preview.hide_zone()
+            else:
+                self.preview.show_zone(zone)
+
+    def on_move_end(self, window, x, y):
+        """Snap the dropped window if it was released in a zone."""
+        if self.window is None:
+            return
+        zone = self.zones.hit(x, y)
+        resized = self._window_size(window) != self.size
+        if self.zone is not None and self.preview is not None:
+            self.preview.hide_zone()
+        self.window = self.size = self.zone = None
+        if resized:
+            self.counters['resizes'] += 1
+            return
+        if zone is not None:
+            self.counters['snapped'] += 1
+            self.submit(snap_command(self.layout, zone.slot, window, zone.monitor))
+
+    def stats(self):
+        """
+        Get the drag counters.
+
+        Returns:
+            Dictionary with drags, pointer samples, zone changes, snaps and ignored resizes
+        """
+        return dict(self.counters, dragging=self.window is not None)
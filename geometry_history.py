@@ -0,0 +1,230 @@
+"""
+Geometry history for SnapStack.
+Remembers where windows were before they were snapped so snaps can be undone, redone and bulk restored.
+"""
+
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+
+from backends.base import Geometry
+
+# Geometries remembered per window in each direction
+DEFAULT_DEPTH = 16
+
+# Windows with history kept at once, the least recently snapped are dropped first
+DEFAULT_MAX_WINDOWS = 1024
+
+
+class GeometryRing:
+    """
+    Bounded stack of geometries stored in a flat integer array.
+
+    Pushing onto a full ring overwrites the oldest geometry, so push and
+    pop are O(1) and the memory never grows past the capacity.
+    """
+
+    __slots__ = ('data', 'capacity', 'top', 'count')
+
+    def __init__(self, capacity):
+        self.data = array('i', bytes(16 * capacity))
+        self.capacity = capacity
+        self.top = 0
+        self.count = 0
+
+    def push(self, geometry):
+        """Store a geometry as the newest entry."""
+        offset = self.top * 4
+        self.data[offset:offset + 4] = array('i', map(int, geometry))
+        self.top = (self.top + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def pop(self):
+        """
+        Remove the newest entry.
+
+        Returns:
+            Geometry, or None if the ring is empty
+        """
+        if not self.count:
+            return None
+        self.top = (self.top - 1) % self.capacity
+        self.count -= 1
+        offset = self.top * 4
+        return Geometry(*self.data[offset:offset + 4])
+
+    def clear(self):
+        """Forget every entry."""
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def memory_bytes(self):
+        """Approximate memory used by the ring."""
+        return sys.getsizeof(self) + sys.getsizeof(self.data)
+
+
+class WindowHistory:
+    """Undo and redo geometries of one window. The redo ring is created on first undo."""
+
+    __slots__ = ('window', 'undo', 'redo')
+
+    def __init__(self, window, depth):
+        self.window = window
+        self.undo = GeometryRing(depth)
+        self.redo = None
+
+    def memory_bytes(self):
+        """Approximate memory used by this window's history."""
+        size = sys.getsizeof(self) + self.undo.memory_bytes()
+        if self.redo is not None:
+            size += self.redo.memory_bytes()
+        return size
+
+
+class GeometryHistory:
+    """
+    Per-window undo and redo of geometry changes, with a fixed memory cap.
+
+    Each window keeps at most `depth` geometries per direction, and at most
+    `max_windows` windows are tracked, evicting the least recently changed.
+    Closed windows should be dropped with forget().
+    """
+
+    def __init__(self, depth=DEFAULT_DEPTH, max_windows=DEFAULT_MAX_WINDOWS):
+        """
+        Initialize an empty history.
+
+        Args:
+            depth: Geometries remembered per window in each direction
+            max_windows: Windows kept at once
+        """
+        self.depth = depth
+        self.max_windows = max_windows
+        self.evicted = 0
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._windows)
+
+    def record(self, key, window, previous):
+        """
+        Remember a window's geometry before it is changed.
+
+        A new change makes the window's redo entries obsolete.
+
+        Args:
+            key: Window key from the backend
+            window: Window object from the backend
+            previous: Geometry the window had before the change
+        """
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is None:
+                entry = self._windows[key] = WindowHistory(window, self.depth)
+                if len(self._windows) > self.max_windows:
+                    self._windows.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._windows.move_to_end(key)
+                entry.window = window
+            entry.undo.push(previous)
+            if entry.redo is not None:
+                entry.redo.clear()
+
+    def _step(self, key, current, undo):
+        """Move one step back or forward, saving the current geometry in the other direction."""
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is None:
+                return None
+            source = entry.undo if undo else entry.redo
+            target = source.pop() if source is not None else None
+            if target is None:
+                return None
+            if current is not None:
+                if undo and entry.redo is None:
+                    entry.redo = GeometryRing(self.depth)
+                (entry.redo if undo else entry.undo).push(current)
+            return entry.window, target
+
+    def undo(self, key, current):
+        """
+        Take the geometry a window had before its last change.
+
+        Args:
+            key: Window key from the backend
+            current: Geometry the window has now, kept for redo, or None
+
+        Returns:
+            Tuple of (window, Geometry to restore), or None if there is no history
+        """
+        return self._step(key, current, True)
+
+    def redo(self, key, current):
+        """
+        Take the geometry a window had before its last undo.
+
+        Args:
+            key: Window key from the backend
+            current: Geometry the window has now, kept for undo, or None
+
+        Returns:
+            Tuple of (window, Geometry to restore), or None if there is nothing to redo
+        """
+        return self._step(key, current, False)
+
+    def undo_all(self, current_geometries):
+        """
+        Take one undo step for every window with history.
+
+        Args:
+            current_geometries: Dictionary of window key to current Geometry,
+                windows missing from it get no redo entry
+
+        Returns:
+            List of (window, Geometry to restore)
+        """
+        with self._lock:
+            keys = [key for key, entry in self._windows.items() if entry.undo.count]
+        restores = []
+        for key in keys:
+            step = self._step(key, current_geometries.get(key), True)
+            if step is not None:
+                restores.append(step)
+        return restores
+
+    def forget(self, key):
+        """Drop the history of a window, e.g. because it was closed."""
+        with self._lock:
+            self._windows.pop(key, None)
+
+    def clear(self):
+        """Drop all history."""
+        with self._lock:
+            self._windows.clear()
+
+    def memory_bytes(self):
+        """Approximate memory used by the history."""
+        with self._lock:
+            entries = list(self._windows.values())
+        return sys.getsizeof(self._windows) + sum(entry.memory_bytes() for entry in entries)
+
+    def diagnostics(self):
+        """
+        Describe the history for troubleshooting.
+
+        Returns:
+            Dictionary with tracked windows, limits, evictions and memory use
+        """
+        return {
+            'windows': len(self._windows),
+            'depth': self.depth,
+            'max_windows': self.max_windows,
+            'evicted': self.evicted,
+            'memory_bytes': self.memory_bytes(),
+        }
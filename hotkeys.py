@@ -0,0 +1,403 @@
+"""
+Global hotkeys for SnapStack.
+Maps configured key chords and chord sequences to snap commands through a prefix trie, and rebinds them in place when the config changes.
+"""
+
+import logging
+import threading
+import time
+
+from snap_executor import (
+    redo_command, restore_all_command, restore_profile_command, save_profile_command, snap_command,
+    stack_all_command, undo_command,
+)
+
+logger = logging.getLogger(__name__)
+
+# Modifier bits of a chord, in the order chords are written
+MODIFIERS = ('ctrl', 'alt', 'shift', 'super')
+MODIFIER_BITS = {name: 1 << index for index, name in enumerate(MODIFIERS)}
+
+# Key names reported by the keyboard library, or written in the config, for the same key
+KEY_ALIASES = {
+    'control': 'ctrl', 'left ctrl': 'ctrl', 'right ctrl': 'ctrl',
+    'left alt': 'alt', 'right alt': 'alt', 'alt gr': 'alt', 'option': 'alt',
+    'left shift': 'shift', 'right shift': 'shift',
+    'windows': 'super', 'left windows': 'super', 'right windows': 'super', 'win': 'super',
+    'command': 'super', 'cmd': 'super', 'meta': 'super',
+    '+': 'plus', ',': 'comma', 'return': 'enter', 'escape': 'esc',
+    'up arrow': 'up', 'down arrow': 'down', 'left arrow': 'left', 'right arrow': 'right',
+}
+
+# Names the macOS poll asks keyboard.is_pressed() about for each modifier
+MODIFIER_POLL_NAMES = {'ctrl': 'ctrl', 'alt': 'alt', 'shift': 'shift', 'super': 'command'}
+
+# Seconds a chord sequence waits for its next chord
+SEQUENCE_TIMEOUT = 1.5
+
+# Built-in bindings, used when the config has no 'hotkeys'
+DEFAULT_HOTKEYS = [
+    {'keys': 'ctrl+alt+up', 'action': 'snap', 'layout': 'halves', 'slot': 0},
+    {'keys': 'ctrl+alt+down', 'action': 'snap', 'layout': 'halves', 'slot': 1},
+    {'keys': 'ctrl+alt+z', 'action': 'undo'},
+    {'keys': 'ctrl+alt+shift+z', 'action': 'redo'},
+]
+
+
+def normalize_key(name):
+    """Get the canonical lower-case name of a key."""
+    name = name.strip().lower()
+    return KEY_ALIASES.get(name, name)
+
+
+def parse_chord(text):
+    """
+    Parse one chord such as 'ctrl+alt+up'.
+
+    Returns:
+        Tuple of (modifier bits, key name)
+
+    Raises:
+        ValueError: If the chord has no key besides modifiers, or several
+    """
+    mask = 0
+    key = None
+    for part in text.split('+'):
+        name = normalize_key(part)
+        if not name:
+            raise ValueError(f"Empty key in chord {text!r}")
+        if name in MODIFIER_BITS:
+            mask |= MODIFIER_BITS[name]
+        elif key is None:
+            key = name
+        else:
+            raise ValueError(f"Chord {text!r} has more than one key besides modifiers")
+    if key is None:
+        raise ValueError(f"Chord {text!r} has no key besides modifiers")
+    return mask, key
+
+
+def parse_keys(text):
+    """
+    Parse a chord sequence such as 'ctrl+alt+k, 2'.
+
+    Returns:
+        Tuple of chords from parse_chord()
+    """
+    return tuple(parse_chord(chord) for chord in str(text).split(','))
+
+
+def format_keys(sequence):
+    """Write a parsed chord sequence back in config syntax."""
+    chords = []
+    for mask, key in sequence:
+        names = [name for name in MODIFIERS if mask & MODIFIER_BITS[name]]
+        chords.append('+'.join(names + [key]))
+    return ', '.join(chords)
+
+
+def binding_command(data):
+    """
+    Build the snap command a hotkey definition runs.
+
+    Args:
+        data: Dictionary with 'action' and the fields the action needs
+
+    Returns:
+        SnapCommand
+    """
+    action = data.get('action', 'snap')
+    if action == 'snap':
+        return snap_command(str(data['layout']), int(data['slot']))
+    if action == 'undo':
+        return undo_command()
+    if action == 'redo':
+        return redo_command()
+    if action == 'stack_all':
+        return stack_all_command()
+    if action == 'restore_all':
+        return restore_all_command()
+    if action in ('save_profile', 'restore_profile'):
+        name = data['name']
+        if not isinstance(name, str) or not name:
+            raise ValueError(f"{action} needs a profile name")
+        return save_profile_command(name) if action == 'save_profile' else restore_profile_command(name)
+    raise ValueError(f"Unknown hotkey action: {action!r}")
+
+
+def load_hotkeys(definitions=None):
+    """
+    Build hotkey bindings from config definitions.
+
+    Invalid definitions are reported and skipped; when a key sequence is
+    bound twice the later definition wins.
+
+    Args:
+        definitions: List of dictionaries with 'keys' and an action, None for DEFAULT_HOTKEYS
+
+    Returns:
+        Dictionary mapping chord sequence tuples to SnapCommand
+    """
+    bindings = {}
+    for data in DEFAULT_HOTKEYS if definitions is None else definitions:
+        try:
+            bindings[parse_keys(data['keys'])] = binding_command(data)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.warning("Skipping invalid hotkey %r: %s", data, e)
+    return bindings
+
+
+class TrieNode:
+    """One chord of a bound sequence: the command bound here and the chords that may follow."""
+
+    __slots__ = ('children', 'command')
+
+    def __init__(self):
+        self.children = {}
+        self.command = None
+
+
+class HotkeyEngine:
+    """
+    Dispatches key events to the commands bound to them.
+
+    Bindings live in a trie keyed by chords, so a key press costs one
+    dictionary lookup however many bindings exist, and sequences such as
+    'ctrl+alt+k, 2' share their prefix. The engine sees every key event
+    through one keyboard hook, so rebinding only edits the trie: unchanged
+    bindings are left alone and nothing is registered with the OS again.
+
+    Events arrive on the keyboard library's thread and config reloads on
+    the watcher's, so both go through one lock.
+    """
+
+    def __init__(self, submit, clock=time.monotonic, sequence_timeout=SEQUENCE_TIMEOUT):
+        """
+        Initialize an engine without bindings.
+
+        Args:
+            submit: Callable taking the SnapCommand of a completed binding, e.g. SnapExecutor.submit
+            clock: Callable returning seconds, used for the sequence timeout
+            sequence_timeout: Seconds a sequence waits for its next chord
+        """
+        self.submit = submit
+        self.clock = clock
+        self.sequence_timeout = sequence_timeout
+        self.root = TrieNode()
+        self.bindings = {}
+        self.modifiers = 0
+        self.node = self.root
+        self.last_chord = 0.0
+        self.keys = {}
+        self.pressed = {}
+        self.hook = None
+        # Optional RecordingBackend writing the key events of hotkey chords to a trace
+        self.recorder = None
+        self.listeners = []
+        self._lock = threading.Lock()
+        self.counters = {'events': 0, 'dispatched': 0, 'rebinds': 0, 'added': 0, 'removed': 0, 'unchanged': 0}
+
+    def _insert(self, sequence, command):
+        """Bind a sequence in the trie. Must be called with the lock held."""
+        node = self.root
+        for chord in sequence:
+            if node.command is not None and node is not self.root:
+                logger.warning("Hotkey %s is never reached, a shorter binding fires first", format_keys(sequence))
+            node = node.children.setdefault(chord, TrieNode())
+            self.keys[chord[1]] = self.keys.get(chord[1], 0) + 1
+        if node.children:
+            logger.warning("Hotkey %s hides the longer bindings starting with it", format_keys(sequence))
+        node.command = command
+
+    def _remove(self, sequence):
+        """Unbind a sequence and prune the nodes left empty. Must be called with the lock held."""
+        path = [self.root]
+        for chord in sequence:
+            path.append(path[-1].children[chord])
+            count = self.keys[chord[1]] - 1
+            if count:
+                self.keys[chord[1]] = count
+            else:
+                del self.keys[chord[1]]
+        path[-1].command = None
+        for depth in range(len(sequence), 0, -1):
+            node = path[depth]
+            if node.command is not None or node.children:
+                break
+            del path[depth - 1].children[sequence[depth - 1]]
+
+    def add_listener(self, listener):
+        """
+        Register a callable receiving the bindings after every rebind that changed them.
+
+        Args:
+            listener: Callable taking the bindings dictionary, called on the rebinding thread
+        """
+        self.listeners.append(listener)
+
+    def rebind(self, bindings):
+        """
+        Replace the bindings, touching only the ones that changed.
+
+        Args:
+            bindings: Dictionary from load_hotkeys()
+
+        Returns:
+            Tuple of (added, removed, unchanged) binding counts
+        """
+        with self._lock:
+            removed = [sequence for sequence, command in self.bindings.items() if bindings.get(sequence) != command]
+            added = [sequence for sequence, command in bindings.items() if self.bindings.get(sequence) != command]
+            for sequence in removed:
+                self._remove(sequence)
+            for sequence in added:
+                self._insert(sequence, bindings[sequence])
+            self.bindings = dict(bindings)
+            # A half-typed sequence may point at a node that no longer exists
+            self.node = self.root
+            unchanged = len(bindings) - len(added)
+            self.counters['rebinds'] += 1
+            self.counters['added'] += len(added)
+            self.counters['removed'] += len(removed)
+            self.counters['unchanged'] += unchanged
+        if added or removed:
+            logger.info("Hotkeys rebound: %d added, %d removed, %d unchanged", len(added), len(removed), unchanged)
+            for listener in self.listeners:
+                try:
+                    listener(dict(bindings))
+                except Exception as e:
+                    logger.error("Error delivering hotkey bindings: %s", e)
+        return len(added), len(removed), unchanged
+
+    def feed(self, down, name):
+        """
+        Handle one key event.
+
+        Args:
+            down: True for a key press or repeat, False for a release
+            name: Key name as reported by the keyboard library
+
+        Returns:
+            The SnapCommand submitted, or None
+        """
+        name = KEY_ALIASES.get(name, name)
+        with self._lock:
+            self.counters['events'] += 1
+            bit = MODIFIER_BITS.get(name)
+            if bit is not None:
+                before = self.modifiers
+                self.modifiers = before | bit if down else before & ~bit
+                if self.recorder is not None:
+                    self._record_modifier(before, down, name)
+                return None
+            if not down:
+                return None
+
+            chord = (self.modifiers, name)
+            node = self.node
+            if self.recorder is not None and (chord in node.children or chord in self.root.children):
+                # Only chords that continue or start a binding are written, never ordinary typing
+                self.recorder.record_key(down, name)
+            if node is not self.root and self.clock() - self.last_chord > self.sequence_timeout:
+                node = self.root
+            child = node.children.get(chord)
+            if child is None and node is not self.root:
+                # A chord that breaks a sequence may still start a binding of its own
+                child = self.root.children.get(chord)
+            if child is None:
+                self.node = self.root
+                return None
+            if child.command is not None:
+                self.node = self.root
+                command = child.command
+                self.counters['dispatched'] += 1
+            else:
+                self.node = child
+                self.last_chord = self.clock()
+                return None
+        self.submit(command)
+        return command
+
+    def _record_modifier(self, before, down, name):
+        """
+        Write a modifier event to the recorder while a non-Shift modifier is held.
+
+        Shift alone is ordinary typing and is left out; a Shift held when
+        the first other modifier goes down is written then, and released
+        with the last one, so a replay sees the same chords.
+        Must be called with the lock held.
+        """
+        shift = MODIFIER_BITS['shift']
+        held_before = before & ~shift
+        held_after = self.modifiers & ~shift
+        if not (held_before or held_after):
+            return
+        if not held_before and before & shift:
+            self.recorder.record_key(True, 'shift')
+        self.recorder.record_key(down, name)
+        if not held_after and self.modifiers & shift:
+            self.recorder.record_key(False, 'shift')
+
+    def on_event(self, event):
+        """keyboard.hook() callback."""
+        if event.name:
+            self.feed(event.event_type == 'down', event.name.lower())
+
+    def attach(self):
+        """
+        Start receiving key events from the keyboard library.
+
+        Returns:
+            Boolean: True if the hook was installed
+        """
+        try:
+            # Loaded here rather than at startup, it installs OS hooks on import
+            import keyboard
+            self.hook = keyboard.hook(self.on_event)
+        except Exception as e:
+            logger.error("Failed to register global hotkeys: %s", e)
+            return False
+        logger.info("Global hotkeys registered: %s", ', '.join(format_keys(sequence) for sequence in self.bindings))
+        return True
+
+    def detach(self):
+        """Stop receiving key events."""
+        if self.hook is None:
+            return
+        import keyboard
+        keyboard.unhook(self.hook)
+        self.hook = None
+
+    def poll(self, is_pressed):
+        """
+        Turn the pressed state of the bound keys into key events.
+
+        For platforms where keys are polled rather than hooked. Only the
+        modifiers and the keys that appear in a binding are asked about.
+
+        Args:
+            is_pressed: Callable taking a key name, e.g. keyboard.is_pressed
+        """
+        with self._lock:
+            keys = list(self.keys)
+        for modifier, poll_name in MODIFIER_POLL_NAMES.items():
+            self._poll_key(modifier, poll_name, is_pressed)
+        for key in keys:
+            self._poll_key(key, key, is_pressed)
+
+    def _poll_key(self, name, poll_name, is_pressed):
+        """Feed a press or release when a polled key changed state."""
+        state = bool(is_pressed(poll_name))
+        if state != self.pressed.get(name, False):
+            self.pressed[name] = state
+            self.feed(state, name)
+
+    def stats(self):
+        """
+        Get the engine counters.
+
+        Returns:
+            Dictionary with events seen, commands dispatched, bindings and rebind counts
+        """
+        with self._lock:
+            return dict(self.counters, bindings=len(self.bindings))
@@ -0,0 +1,240 @@
+"""
+Stack layout engine for SnapStack.
+Describes vertical stacks as ratios and precomputes the slot rectangles for every monitor.
+"""
+
+import logging
+
+from utils.monitor_info import Rect
+
+logger = logging.getLogger(__name__)
+
+# Built-in layouts, used when the config file does not define any
+DEFAULT_LAYOUTS = [
+    {'name': 'halves', 'label': 'Halves', 'ratios': [1, 1], 'slots': ['Top', 'Bottom']},
+    {'name': 'thirds', 'label': 'Thirds', 'ratios': [1, 1, 1], 'slots': ['Top third', 'Middle third', 'Bottom third']},
+    {'name': 'top_two_thirds', 'label': 'Two thirds top', 'ratios': [2, 1], 'slots': ['Top two thirds', 'Bottom third']},
+    {'name': 'bottom_two_thirds', 'label': 'Two thirds bottom', 'ratios': [1, 2], 'slots': ['Top third', 'Bottom two thirds']},
+]
+
+
+def split_rect(area, ratios, gap=0):
+    """
+    Split a rectangle into a vertical stack.
+
+    Slot heights are proportional to the ratios, separated by `gap` pixels,
+    and always add up exactly to the available height.
+
+    Args:
+        area: Rect to split
+        ratios: Relative height of each slot, top to bottom
+        gap: Pixels between neighbouring slots
+
+    Returns:
+        Tuple of Rect, one per ratio
+    """
+    count = len(ratios)
+    available = max(0, area.height - gap * (count - 1))
+    total = sum(ratios)
+
+    rects = []
+    cumulative = 0
+    top = 0
+    for index, ratio in enumerate(ratios):
+        cumulative += ratio
+        bottom = round(available * cumulative / total)
+        y = area.y + top + gap * index
+        rects.append(Rect(area.x, y, area.width, bottom - top))
+        top = bottom
+    return tuple(rects)
+
+
+class Layout:
+    """A vertical stack of slots with relative heights."""
+
+    def __init__(self, name, label, ratios, slots=None, gap=0):
+        """
+        Initialize a layout.
+
+        Args:
+            name: Identifier used by commands and hotkeys
+            label: Name shown in the UI
+            ratios: Relative height of each slot, top to bottom
+            slots: Optional UI label for each slot
+            gap: Logical pixels between neighbouring slots
+        """
+        if not ratios or any(ratio <= 0 for ratio in ratios):
+            raise ValueError(f"Layout {name!r} needs at least one positive ratio")
+
+        self.name = name
+        self.label = label
+        self.ratios = tuple(ratios)
+        self.gap = gap
+        self.slots = tuple(slots) if slots else tuple(
+            f"Slot {index + 1} of {len(ratios)}" for index in range(len(ratios))
+        )
+        if len(self.slots) != len(self.ratios):
+            raise ValueError(f"Layout {name!r} has {len(self.ratios)} ratios but {len(self.slots)} slot labels")
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a layout from its config file representation.
+
+        Args:
+            data: Dictionary with name, ratios and optional label, slots and gap
+
+        Returns:
+            Layout instance
+        """
+        return cls(
+            data['name'],
+            data.get('label', data['name']),
+            data['ratios'],
+            data.get('slots'),
+            data.get('gap', 0),
+        )
+
+    def slot_rects(self, area, gap=None):
+        """
+        Get the rectangle of every slot within an area.
+
+        Args:
+            area: Rect to split
+            gap: Pixels between slots in the area's coordinates, defaults to the layout's gap
+        """
+        return split_rect(area, self.ratios, self.gap if gap is None else gap)
+
+    def __repr__(self):
+        return f"Layout(name={self.name!r}, ratios={self.ratios}, gap={self.gap})"
+
+
+def load_layouts(definitions=None):
+    """
+    Build layouts from config definitions.
+
+    Invalid definitions are reported and skipped.
+
+    Args:
+        definitions: List of layout dictionaries, defaults to DEFAULT_LAYOUTS
+
+    Returns:
+        List of Layout
+    """
+    layouts = []
+    for data in definitions or DEFAULT_LAYOUTS:
+        try:
+            layouts.append(Layout.from_dict(data))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Skipping invalid layout %r: %s", data, e)
+    return layouts or [Layout.from_dict(data) for data in DEFAULT_LAYOUTS]
+
+
+class LayoutEngine:
+    """
+    Precomputed slot tables for every layout on every monitor.
+
+    The tables are rebuilt only when the monitor topology generation
+    changes, so resolving a slot is a dictionary and tuple lookup.
+    """
+
+    def __init__(self, topology, layouts=None):
+        """
+        Initialize the engine.
+
+        Args:
+            topology: MonitorTopology providing monitors and work areas
+            layouts: List of Layout, defaults to the built-in layouts
+        """
+        self.topology = topology
+        self.layouts = {}
+        self._tables = {}
+        self._stacks = {}
+        self._generation = None
+        self.set_layouts(layouts or load_layouts())
+
+    def _current_tables(self):
+        """Get the slot tables, rebuilding them if the topology changed."""
+        monitors = self.topology.monitors
+        if self._generation != self.topology.generation:
+            self._tables = {
+                monitor.index: {
+                    name: layout.slot_rects(monitor.work_area, monitor.native_length(layout.gap))
+                    for name, layout in self.layouts.items()
+                }
+                for monitor in monitors
+            }
+            self._stacks = {}
+            self._generation = self.topology.generation
+        return self._tables
+
+    def set_layouts(self, layouts):
+        """
+        Replace the configured layouts.
+
+        Args:
+            layouts: List of Layout
+        """
+        self.layouts = {layout.name: layout for layout in layouts}
+
+        # The snap to top/bottom commands always need the halves layout
+        if 'halves' not in self.layouts:
+            self.layouts['halves'] = Layout.from_dict(DEFAULT_LAYOUTS[0])
+        self._generation = None
+
+    def get_layout(self, name):
+        """
+        Get a layout by name.
+
+        Raises:
+            KeyError: If no layout has that name
+        """
+        return self.layouts[name]
+
+    def slot_rect(self, monitor, layout_name, slot):
+        """
+        Get the rectangle of one slot on a monitor.
+
+        Args:
+            monitor: MonitorInfo from the topology
+            layout_name: Name of the layout
+            slot: Index of the slot, top to bottom
+
+        Returns:
+            Rect of the slot
+
+        Raises:
+            KeyError: If the layout does not exist
+            IndexError: If the layout has no such slot
+        """
+        return self._current_tables()[monitor.index][layout_name][slot]
+
+    def stack_rects(self, monitor, count, gap=0):
+        """
+        Get the slots of an N-way stack of equal heights on a monitor.
+
+        Tables are cached per window count until the topology changes.
+
+        Args:
+            monitor: MonitorInfo from the topology
+            count: Number of slots
+            gap: Pixels between neighbouring slots
+
+        Returns:
+            Tuple of Rect, top to bottom
+        """
+        self._current_tables()
+        key = (monitor.index, count, gap)
+        rects = self._stacks.get(key)
+        if rects is None:
+            rects = self._stacks[key] = split_rect(monitor.work_area, (1,) * count, monitor.native_length(gap))
+        return rects
+
+    def slot_table(self, monitor):
+        """
+        Get every layout's slot rectangles on a monitor.
+
+        Returns:
+            Dictionary mapping layout name to a tuple of Rect
+        """
+        return self._current_tables()[monitor.index]
@@ -0,0 +1,307 @@
+"""
+Structured logging for SnapStack.
+Queues log records in a bounded in-memory ring and writes them from a background thread, so logging never blocks a snap.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import sys
+import threading
+from collections import deque
+
+from config import DEFAULT_CONFIG, get_log_path
+
+# Seconds the writer sleeps between drains when few records arrive
+FLUSH_INTERVAL = 0.25
+
+# LogRecord attributes that are not structured fields passed with `extra`
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+# Format of lines written to the console
+CONSOLE_FORMAT = '%(levelname)s %(name)s: %(message)s'
+
+# Renders tracebacks when records are queued
+_exception_formatter = logging.Formatter()
+
+# The service installed by configure_logging(), for runtime changes
+_active_service = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, including its `extra` fields."""
+
+    def format(self, record):
+        data = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, default=repr, ensure_ascii=False)
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Handler that only stores records in a bounded ring.
+
+    Emitting renders the message and any traceback to text and appends
+    to a deque without taking the handler lock, so queued records keep no
+    arguments or exception frames alive and later changes to mutable
+    arguments do not show up in the log. When the ring is full the
+    oldest record is dropped and counted, so memory stays bounded however
+    fast records arrive. The writer is woken once the ring is a quarter
+    full and otherwise drains it on its own schedule.
+    """
+
+    def __init__(self, capacity):
+        """
+        Initialize an empty ring.
+
+        Args:
+            capacity: Records held before the oldest are dropped
+        """
+        super().__init__()
+        self.capacity = capacity
+        self.records = deque(maxlen=capacity)
+        self.wake_threshold = max(1, capacity // 4)
+        self.dropped = 0
+        self.ready = threading.Event()
+
+    def handle(self, record):
+        # deque.append is atomic, so the handler lock of the base class is not needed
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def prepare(self, record):
+        """
+        Copy a record with its message and traceback rendered, as QueueHandler.prepare() does.
+
+        Returns:
+            LogRecord without args or exc_info
+        """
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            record = self.prepare(record)
+        except Exception:
+            self.handleError(record)
+            return
+        records = self.records
+        if len(records) >= self.capacity:
+            self.dropped += 1
+        records.append(record)
+        if len(records) >= self.wake_threshold:
+            self.ready.set()
+
+
+class LogWriter(threading.Thread):
+    """Thread that moves records from the ring to the real handlers."""
+
+    def __init__(self, ring, targets):
+        super().__init__(name='snapstack-log-writer', daemon=True)
+        self.ring = ring
+        self.targets = targets
+        self.written = 0
+        self.stopping = False
+
+    def run(self):
+        while not self.stopping:
+            self.ring.ready.wait(FLUSH_INTERVAL)
+            self.ring.ready.clear()
+            self.drain()
+        self.drain()
+
+    def drain(self):
+        """Write every queued record."""
+        records = self.ring.records
+        wrote = False
+        while True:
+            try:
+                record = records.popleft()
+            except IndexError:
+                break
+            for target in self.targets:
+                if record.levelno >= target.level:
+                    target.handle(record)
+            self.written += 1
+            wrote = True
+        if wrote:
+            for target in self.targets:
+                target.flush()
+
+    def stop(self, timeout):
+        """Write what is queued and end the thread."""
+        self.stopping = True
+        self.ring.ready.set()
+        self.join(timeout)
+
+
+class LogService:
+    """
+    SnapStack's logging setup: levels, the ring and the writer thread.
+
+    Modules log through logging.getLogger(__name__) as usual. Level checks
+    happen in the calling thread and are cheap for disabled levels;
+    enabled records are only appended to the ring. The writer formats them
+    as JSON lines into a rotating file and as plain text on the console.
+    """
+
+    def __init__(self, settings=None, path=None):
+        """
+        Initialize the service without installing it.
+
+        Args:
+            settings: The config's 'log' dictionary, missing keys fall back to the defaults
+            path: Log file, defaults to settings['file'] or get_log_path()
+        """
+        self.settings = dict(DEFAULT_CONFIG['log'])
+        self.settings.update(settings or {})
+        self.path = path or self.settings['file'] or get_log_path()
+        self.ring = RingBufferHandler(self.settings['ring_size'])
+        self.targets = []
+        self.writer = None
+        self.module_levels = {}
+
+    def _open_targets(self):
+        """Create the file and console handlers the writer feeds."""
+        # Only needed once the service starts, which keeps it off the import path
+        from logging.handlers import RotatingFileHandler
+
+        targets = []
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            file_handler = RotatingFileHandler(
+                self.path,
+                maxBytes=self.settings['max_bytes'],
+                backupCount=self.settings['backups'],
+                encoding='utf-8',
+                delay=True,
+            )
+            file_handler.setFormatter(JsonFormatter())
+            targets.append(file_handler)
+        except OSError as e:
+            if sys.stderr is not None:
+                sys.stderr.write(f"Cannot open log file {self.path}: {e}\n")
+
+        # GUI launches on Windows have no console at all
+        if self.settings['console'] and sys.stderr is not None:
+            console = logging.StreamHandler(sys.stderr)
+            console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            console.setLevel(self.settings['console_level'])
+            targets.append(console)
+        return targets
+
+    def start(self):
+        """Route every logger through the ring and start the writer."""
+        if self.writer is not None:
+            return
+        self.targets = self._open_targets()
+        self.writer = LogWriter(self.ring, self.targets)
+        self.writer.start()
+
+        root = logging.getLogger()
+        root.addHandler(self.ring)
+        self.set_level(self.settings['level'])
+        for name, level in self.settings['modules'].items():
+            self.set_level(level, name)
+        atexit.register(self.stop)
+
+    def stop(self, timeout=1.0):
+        """Write the queued records, close the log file and detach from the loggers."""
+        if self.writer is None:
+            return
+        logging.getLogger().removeHandler(self.ring)
+        self.writer.stop(timeout)
+        self.writer = None
+        for target in self.targets:
+            target.close()
+        self.targets = []
+
+    def set_level(self, level, logger=None):
+        """
+        Change a level at runtime.
+
+        Args:
+            level: Level name such as 'DEBUG' or 'WARNING'
+            logger: Module name such as 'snapper' or 'backends', None for the default level
+
+        Raises:
+            ValueError: If the level name is unknown
+        """
+        level = str(level).upper()
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Unknown log level: {level}")
+        logging.getLogger(logger).setLevel(level)
+        if logger:
+            self.module_levels[logger] = level
+        else:
+            self.settings['level'] = level
+
+    def levels(self):
+        """
+        Get the configured levels.
+
+        Returns:
+            Dictionary with the default level and the per-module overrides
+        """
+        return {'level': self.settings['level'], 'modules': dict(self.module_levels)}
+
+    def stats(self):
+        """
+        Describe the ring and writer for troubleshooting.
+
+        Returns:
+            Dictionary with queued, dropped and written record counts and the log file
+        """
+        return {
+            'queued': len(self.ring.records),
+            'capacity': self.ring.capacity,
+            'dropped': self.ring.dropped,
+            'written': self.writer.written if self.writer else 0,
+            'path': self.path,
+        }
+
+
+def configure_logging(settings=None, path=None):
+    """
+    Install the log service, replacing one installed earlier.
+
+    Args:
+        settings: The config's 'log' dictionary
+        path: Log file, defaults to the configured or platform path
+
+    Returns:
+        The running LogService
+    """
+    global _active_service
+    if _active_service is not None:
+        _active_service.stop()
+    _active_service = LogService(settings, path)
+    _active_service.start()
+    return _active_service
+
+
+def get_log_service():
+    """Get the service installed by configure_logging(), or None."""
+    return _active_service
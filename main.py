@@ -5,74 +5,231 @@ SnapStack - Window Management Utility
 A lightweight tool for snapping windows to the top or bottom half of the screen.
 """
 
+import argparse
+import logging
 import sys
 import signal
-import keyboard
-from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import QTimer
+import threading
+import time
 
+from config import DEFAULT_CONFIG, ConfigWatcher, get_socket_path, load_config
+from drag_snap import DragSnapper
+from hotkeys import HotkeyEngine, load_hotkeys
+from layouts import load_layouts
+from log_service import configure_logging
+from snap_executor import SnapExecutor
 from snapper import WindowSnapper
-from ui.main_window import MainWindow
 from utils.monitor_info import get_system_platform, is_supported_platform
+from window_rules import load_rules
+
+logger = logging.getLogger(__name__)
+
+# How often the daemon checks for display changes, it has no Qt screen signals
+TOPOLOGY_POLL_SECONDS = 2.0
+
+def start_hotkeys(executor, config):
+    """
+    Bind the configured hotkeys and keep them in step with the config file.
+    
+    Args:
+        executor: SnapExecutor the hotkeys submit commands to
+        config: Loaded config dictionary
+    
+    Returns:
+        Tuple of (HotkeyEngine, ConfigWatcher)
+    """
+    engine = HotkeyEngine(executor.submit)
+    engine.rebind(load_hotkeys(config['hotkeys']))
+    
+    # Edits to the config file rebind only the hotkeys that changed
+    watcher = ConfigWatcher(lambda new_config: engine.rebind(load_hotkeys(new_config['hotkeys'])))
+    watcher.start()
+    return engine, watcher
+
+def start_drag_snapping(snapper, executor, config):
+    """
+    Snap windows the user drops at a monitor's top or bottom edge.
+    
+    Args:
+        snapper: WindowSnapper whose backend reports the drags
+        executor: SnapExecutor the drops submit commands to
+        config: Loaded config dictionary
+    
+    Returns:
+        DragSnapper, or None if drag snapping is disabled or unavailable
+    """
+    settings = dict(DEFAULT_CONFIG['drag'])
+    settings.update(config['drag'] or {})
+    if not settings['enabled']:
+        return None
+    drag_snapper = DragSnapper(snapper, executor.submit, settings['layout'], settings['edge'])
+    return drag_snapper if drag_snapper.attach() else None
+
+def start_animation(snapper, config, refresh_rate=None):
+    """
+    Turn on animated snaps if the config asks for them.
+    
+    Args:
+        snapper: WindowSnapper to animate
+        config: Loaded config dictionary
+        refresh_rate: Display refresh rate in Hz, used unless the config sets a frame rate
+    """
+    settings = dict(DEFAULT_CONFIG['animation'])
+    settings.update(config['animation'] or {})
+    if settings['enabled']:
+        snapper.set_animation(settings['duration_ms'] / 1000, settings['frame_rate'] or refresh_rate)
+
+def start_recording(path, config):
+    """
+    Wrap the native backend so the session is written to a replayable trace.
+    
+    Args:
+        path: Trace file to write
+        config: Loaded config dictionary, stored in the trace so a replay uses the same settings
+    
+    Returns:
+        RecordingBackend to create the WindowSnapper with
+    """
+    from backends.base import create_backend
+    from backends.recording import RecordingBackend, TraceWriter
+    from profiles import ProfileStore
+    
+    backend = create_backend()
+    store = ProfileStore()
+    header = {
+        'backend': backend.name,
+        'platform': get_system_platform(),
+        'coordinate_space': backend.coordinate_space,
+        'reports_drags': backend.reports_drags,
+        'config': config,
+        'profiles': {name: [list(entry) for entry in store.get(name)] for name in store.names()},
+    }
+    logger.info("Recording a trace to %s", path)
+    return RecordingBackend(backend, TraceWriter(path, header))
+
+def attach_recorder(snapper, executor, hotkeys):
+    """Also record the commands and key events, if the snapper's backend is recording."""
+    if hasattr(snapper.backend, 'record_command'):
+        executor.recorder = snapper.backend
+        hotkeys.recorder = snapper.backend
 
 class SnapStackApp:
     """Main SnapStack application class."""
     
-    def __init__(self):
-        """Initialize the SnapStack application."""
-        # Create the Qt Application
-        self.app = QApplication(sys.argv)
-        self.app.setApplicationName("SnapStack")
-        self.app.setOrganizationName("Dawson Murray")
+    def __init__(self, record=None):
+        """
+        Initialize the SnapStack application.
+        
+        Args:
+            record: Optional trace file to record the session to
+        """
+        # perf_counter() timestamps of the startup milestones, for diagnostics
+        self.startup_marks = {'start': time.perf_counter()}
         
         # Handle Ctrl+C in terminal
         signal.signal(signal.SIGINT, signal.SIG_DFL)
         
+        # Load user settings
+        self.config = load_config()
+        
+        # Log records are written on a background thread from here on
+        configure_logging(self.config['log'])
+        
         # Create the window snapper
-        self.snapper = WindowSnapper()
+        self.snapper = WindowSnapper(
+            start_recording(record, self.config) if record else None,
+            layouts=load_layouts(self.config['layouts']),
+            rules=load_rules(self.config['rules']),
+        )
         
-        # Create the main window
-        self.main_window = MainWindow(self.snapper)
+        # Snaps run on a worker thread so hotkey hooks and the GUI never block
+        self.executor = SnapExecutor(self.snapper)
+        self.executor.follow_new_windows()
+        self.executor.start()
+        self.hotkeys, self.config_watcher = start_hotkeys(self.executor, self.config)
+        attach_recorder(self.snapper, self.executor, self.hotkeys)
+        self.drag_snapper = start_drag_snapping(self.snapper, self.executor, self.config)
         
-        # Set up global keyboard shortcuts (if supported on platform)
+        # Hotkeys on Windows and Linux do not need Qt, so they go live before
+        # the comparatively slow Qt import
         self.setup_global_shortcuts()
+        if get_system_platform() != 'Darwin':
+            self.startup_marks['hotkeys'] = time.perf_counter()
+        
+        # Qt is only needed for the GUI, the daemon runs without it
+        from PySide6.QtWidgets import QApplication
+        
+        # Create the Qt Application
+        self.app = QApplication(sys.argv)
+        self.app.setApplicationName("SnapStack")
+        self.app.setOrganizationName("Dawson Murray")
+        self.app.aboutToQuit.connect(self.shutdown)
+        
+        # Rebuild the cached monitor layout only when the displays change
+        self.snapper.topology.attach_qt(self.app)
+        
+        # Animation frames follow the refresh rate of the primary display
+        screen = self.app.primaryScreen()
+        start_animation(self.snapper, self.config, screen.refreshRate() if screen else None)
+        
+        # The macOS hotkey poll runs on a Qt timer
+        if get_system_platform() == 'Darwin':
+            self.setup_mac_hotkeys()
+            self.startup_marks['hotkeys'] = time.perf_counter()
+        
+        # Create the main window and tray icon
+        self.build_ui()
+    
+    def shutdown(self):
+        """Stop the hotkeys, drag snapping and worker threads, then close the backend."""
+        self.config_watcher.stop()
+        self.hotkeys.detach()
+        if self.drag_snapper:
+            self.drag_snapper.detach()
+        self.executor.stop()
+        # Closing the backend also finishes the trace file when recording
+        self.snapper.close()
+    
+    def build_ui(self):
+        """Create the main window and its tray icon."""
+        from ui.main_window import MainWindow
+        
+        self.main_window = MainWindow(self.snapper, self.executor, self.hotkeys)
+        if self.drag_snapper and (self.config['drag'] or {}).get('preview', True):
+            from ui.snap_preview import SnapPreview
+            self.drag_snapper.preview = SnapPreview()
+        self.startup_marks['ui'] = time.perf_counter()
     
     def setup_global_shortcuts(self):
         """Set up global keyboard shortcuts for window snapping."""
         system = get_system_platform()
         
         if system == 'Windows' or system == 'Linux':
-            # Direct keyboard library usage for Windows and Linux
-            try:
-                keyboard.add_hotkey('ctrl+alt+up', self.snapper.snap_to_top)
-                keyboard.add_hotkey('ctrl+alt+down', self.snapper.snap_to_bottom)
-                print("Global hotkeys registered: Ctrl+Alt+Up/Down")
-            except Exception as e:
-                print(f"Failed to register global hotkeys: {e}")
-        elif system == 'Darwin':
-            # For macOS, we'll check periodically if keys are pressed
-            # This is a workaround, in a real app, use a native macOS solution
-            self.key_timer = QTimer()
-            self.key_timer.setInterval(100)  # check every 100ms
-            self.key_timer.timeout.connect(self.check_mac_hotkeys)
-            self.key_timer.start()
-            print("Mac hotkey checker started")
+            # One keyboard hook feeds every binding on Windows and Linux
+            self.hotkeys.attach()
+    
+    def setup_mac_hotkeys(self):
+        """Start polling for the hotkeys on macOS, needs the QApplication."""
+        from PySide6.QtCore import QTimer
+        
+        # For macOS, we'll check periodically if keys are pressed
+        # This is a workaround, in a real app, use a native macOS solution
+        self.key_timer = QTimer()
+        self.key_timer.setInterval(100)  # check every 100ms
+        self.key_timer.timeout.connect(self.check_mac_hotkeys)
+        self.key_timer.start()
+        logger.info("Mac hotkey checker started")
     
     def check_mac_hotkeys(self):
         """Check for hotkey combinations on macOS."""
         try:
-            # This is not ideal for production use
-            # A better solution would use macOS frameworks like Carbon
-            is_ctrl = keyboard.is_pressed('ctrl')
-            is_alt = keyboard.is_pressed('alt')
+            import keyboard
             
-            if is_ctrl and is_alt:
-                if keyboard.is_pressed('up'):
-                    self.snapper.snap_to_top()
-                elif keyboard.is_pressed('down'):
-                    self.snapper.snap_to_bottom()
+            # Only the modifiers and the keys used by a binding are polled,
+            # and the engine reacts when a chord goes down, not while held
+            self.hotkeys.poll(keyboard.is_pressed)
         except Exception as e:
-            print(f"Error checking Mac hotkeys: {e}")
+            logger.error("Error checking Mac hotkeys: %s", e)
     
     def run(self):
         """Run the application."""
@@ -82,15 +239,92 @@ class SnapStackApp:
         # Start the event loop
         return self.app.exec()
 
-def main():
+class SnapStackDaemon:
+    """Headless SnapStack: the snapper, hotkeys and the command socket, without Qt."""
+    
+    def __init__(self, socket_path=None, record=None):
+        """
+        Initialize the daemon.
+        
+        Args:
+            socket_path: Command socket path, defaults to get_socket_path()
+            record: Optional trace file to record the session to
+        """
+        from command_server import CommandServer
+        
+        self.config = load_config()
+        configure_logging(self.config['log'])
+        self.snapper = WindowSnapper(
+            start_recording(record, self.config) if record else None,
+            layouts=load_layouts(self.config['layouts']),
+            rules=load_rules(self.config['rules']),
+        )
+        self.executor = SnapExecutor(self.snapper)
+        self.executor.follow_new_windows()
+        self.hotkeys, self.config_watcher = start_hotkeys(self.executor, self.config)
+        attach_recorder(self.snapper, self.executor, self.hotkeys)
+        self.drag_snapper = start_drag_snapping(self.snapper, self.executor, self.config)
+        start_animation(self.snapper, self.config)
+        self.server = CommandServer(self.snapper, self.executor, socket_path or get_socket_path())
+        self.stopped = threading.Event()
+    
+    def stop(self, *args):
+        """Ask the daemon to shut down, usable as a signal handler."""
+        self.stopped.set()
+    
+    def run(self):
+        """
+        Serve commands until stopped.
+        
+        Returns:
+            Exit status
+        """
+        self.executor.start()
+        if not self.server.start():
+            self.executor.stop()
+            self.snapper.close()
+            return 1
+        logger.info("SnapStack daemon listening on %s", self.server.path)
+        
+        if get_system_platform() in ('Windows', 'Linux'):
+            self.hotkeys.attach()
+        else:
+            logger.warning("Global hotkeys need the GUI on this platform, use the command socket")
+        
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        try:
+            while not self.stopped.wait(TOPOLOGY_POLL_SECONDS):
+                self.snapper.topology.check()
+        finally:
+            self.config_watcher.stop()
+            self.hotkeys.detach()
+            if self.drag_snapper:
+                self.drag_snapper.detach()
+            self.server.stop()
+            self.executor.stop()
+            self.snapper.close()
+        return 0
+
+def main(argv=None):
     """Application entry point."""
+    parser = argparse.ArgumentParser(description="Snap windows to stacked screen layouts.")
+    parser.add_argument('--daemon', action='store_true', help="run headless and accept commands on a local socket")
+    parser.add_argument('--socket', default=None, help="command socket path for --daemon")
+    parser.add_argument('--record', metavar='TRACE', default=None,
+                        help="write window, hotkey and snap activity to a trace for benchmarks.bench_replay")
+    args = parser.parse_args(argv)
+    
     # Check if platform is supported
     if not is_supported_platform():
-        print(f"Platform {get_system_platform()} is not fully supported yet.")
-        print("Basic functionality may be limited.")
+        logger.warning("Platform %s is not fully supported yet.", get_system_platform())
+        logger.warning("Basic functionality may be limited.")
+    
+    if args.daemon:
+        sys.exit(SnapStackDaemon(args.socket, args.record).run())
     
     # Create and run the application
-    app = SnapStackApp()
+    app = SnapStackApp(args.record)
     sys.exit(app.run())
 
 if __name__ == "__main__":
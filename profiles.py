@@ -0,0 +1,236 @@
+"""
+Workspace profiles for SnapStack.
+Saves which window sits in which slot on which monitor under a name, and puts every window back in one batch later.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import deque, namedtuple
+
+from config import get_config_dir
+
+logger = logging.getLogger(__name__)
+
+# Version of the profile file layout
+PROFILE_FORMAT = 1
+
+# Columns of a saved window. The file lists them once and stores each window
+# as a plain array, so it stays small and loads with a single json.loads.
+ENTRY_FIELDS = ('app', 'title', 'monitor', 'monitor_name', 'layout', 'slot', 'x', 'y', 'width', 'height')
+
+# One saved window. `layout` and `slot` are set when the window filled a
+# layout slot; x, y, width and height are its position within the monitor's
+# work area in ten-thousandths, used when it did not or the layout is gone.
+ProfileEntry = namedtuple('ProfileEntry', ENTRY_FIELDS)
+
+# Resolution of the relative geometry
+SCALE = 10000
+
+
+def get_profiles_path():
+    """Get the path of the profiles file."""
+    return os.path.join(get_config_dir(), 'profiles.json')
+
+
+def relative_rect(geometry, area):
+    """
+    Express a geometry in ten-thousandths of a work area.
+
+    Returns:
+        Tuple of (x, y, width, height), or None if the work area has no size
+    """
+    if not area.width or not area.height:
+        return None
+    return (
+        round((geometry.x - area.x) * SCALE / area.width),
+        round((geometry.y - area.y) * SCALE / area.height),
+        round(geometry.width * SCALE / area.width),
+        round(geometry.height * SCALE / area.height),
+    )
+
+
+def absolute_rect(entry, area):
+    """Turn the relative geometry of an entry back into screen coordinates on a work area."""
+    return (
+        area.x + round(entry.x * area.width / SCALE),
+        area.y + round(entry.y * area.height / SCALE),
+        round(entry.width * area.width / SCALE),
+        round(entry.height * area.height / SCALE),
+    )
+
+
+class ProfileMatcher:
+    """
+    Index of a profile's entries for matching live windows to them.
+
+    Entries are keyed by application and title, and by application alone,
+    so each window is matched with two dictionary lookups. Exact matches
+    are handed out before any window falls back to its application, and
+    every entry is used at most once.
+    """
+
+    def __init__(self, entries):
+        """
+        Index entries.
+
+        Args:
+            entries: List of ProfileEntry
+        """
+        self.by_title = {}
+        self.by_app = {}
+        for position, entry in enumerate(entries):
+            app = entry.app.lower()
+            self.by_title.setdefault((app, entry.title.lower()), deque()).append(position)
+            self.by_app.setdefault(app, deque()).append(position)
+        self.entries = entries
+        self.used = set()
+
+    def _take(self, queue):
+        """Take the first unused entry from a queue of positions."""
+        while queue:
+            position = queue.popleft()
+            if position not in self.used:
+                self.used.add(position)
+                return self.entries[position]
+        return None
+
+    def match(self, windows):
+        """
+        Pair live windows with profile entries.
+
+        Args:
+            windows: List of (window, WindowInfo, Geometry)
+
+        Returns:
+            List of (window, Geometry, ProfileEntry)
+        """
+        pairs = []
+        unmatched = []
+        for window, info, geometry in windows:
+            queue = self.by_title.get((info.app.lower(), info.title.lower()))
+            entry = self._take(queue) if queue else None
+            if entry is None:
+                unmatched.append((window, info, geometry))
+            else:
+                pairs.append((window, geometry, entry))
+
+        # Titles change, e.g. with the open document, so fall back to the application
+        for window, info, geometry in unmatched:
+            queue = self.by_app.get(info.app.lower())
+            entry = self._take(queue) if queue else None
+            if entry is not None:
+                pairs.append((window, geometry, entry))
+        return pairs
+
+
+class ProfileStore:
+    """
+    Named profiles kept in one JSON file in the config directory.
+
+    The file is parsed on first use and again only when it changes on disk.
+    Writes replace the whole file atomically.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the store.
+
+        Args:
+            path: Profiles file, defaults to get_profiles_path()
+        """
+        self.path = path or get_profiles_path()
+        self._profiles = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Get the parsed profiles, reading the file if it changed. Must be called with the lock held."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            self._profiles, self._mtime = {}, None
+            return self._profiles
+        if self._profiles is not None and mtime == self._mtime:
+            return self._profiles
+
+        profiles = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as profiles_file:
+                data = json.load(profiles_file)
+            if data.get('format') != PROFILE_FORMAT:
+                logger.warning("Ignoring profiles file %s: unknown format %r", self.path, data.get('format'))
+            else:
+                fields = tuple(data['fields'])
+                for name, rows in data['profiles'].items():
+                    if fields == ENTRY_FIELDS:
+                        profiles[name] = list(map(ProfileEntry._make, rows))
+                    else:
+                        # Written with other columns, matched up by name
+                        profiles[name] = [ProfileEntry(**dict(zip(fields, row))) for row in rows]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.error("Error reading profiles file %s: %s", self.path, e)
+        self._profiles, self._mtime = profiles, mtime
+        return profiles
+
+    def _write(self, profiles):
+        """Write every profile to disk. Must be called with the lock held."""
+        data = {
+            'format': PROFILE_FORMAT,
+            'fields': list(ENTRY_FIELDS),
+            'profiles': {name: [list(entry) for entry in entries] for name, entries in profiles.items()},
+        }
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as profiles_file:
+                json.dump(data, profiles_file, separators=(',', ':'), ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._profiles = profiles
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def names(self):
+        """Get the saved profile names, sorted."""
+        with self._lock:
+            return sorted(self._load())
+
+    def get(self, name):
+        """
+        Get a saved profile.
+
+        Returns:
+            List of ProfileEntry, or None if there is no such profile
+        """
+        with self._lock:
+            return self._load().get(name)
+
+    def save(self, name, entries):
+        """
+        Save a profile, replacing any with the same name.
+
+        Args:
+            name: Profile name
+            entries: List of ProfileEntry
+        """
+        with self._lock:
+            profiles = dict(self._load())
+            profiles[name] = list(entries)
+            self._write(profiles)
+
+    def delete(self, name):
+        """
+        Remove a saved profile.
+
+        Returns:
+            Boolean: True if the profile existed
+        """
+        with self._lock:
+            profiles = dict(self._load())
+            if profiles.pop(name, None) is None:
+                return False
+            self._write(profiles)
+            return True
@@ -0,0 +1,381 @@
+"""
+Snap command execution for SnapStack.
+Runs snaps on a dedicated worker thread so hotkey hooks and the GUI event loop never wait on native calls.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+
+# A request to move windows. `action` is 'snap', 'stack_all', 'undo', 'redo',
+# 'restore_all', 'apply_rules', 'save_profile' or 'restore_profile'; layout
+# and slot only apply to 'snap'. `window` targets a specific window instead
+# of the active one, `name` is the profile name. `monitor` snaps onto a given
+# MonitorInfo instead of the one the window is on.
+SnapCommand = namedtuple(
+    'SnapCommand', ['action', 'layout', 'slot', 'window', 'name', 'monitor'], defaults=(None, None, None)
+)
+
+# Outcome of a command. `value` is what the snapper returned.
+SnapResult = namedtuple('SnapResult', ['command', 'success', 'value'])
+
+logger = logging.getLogger(__name__)
+
+
+def snap_command(layout, slot, window=None, monitor=None):
+    """Build a command snapping a window, by default the active one, into a layout slot."""
+    return SnapCommand('snap', layout, slot, window, monitor=monitor)
+
+
+def stack_all_command():
+    """Build a command stacking every window on the active monitor."""
+    return SnapCommand('stack_all', None, None)
+
+
+def undo_command(window=None):
+    """Build a command putting a window, by default the active one, back where it was."""
+    return SnapCommand('undo', None, None, window)
+
+
+def redo_command(window=None):
+    """Build a command repeating a window's last undone change."""
+    return SnapCommand('redo', None, None, window)
+
+
+def restore_all_command():
+    """Build a command undoing the last snap of every window in one batch."""
+    return SnapCommand('restore_all', None, None)
+
+
+def save_profile_command(name):
+    """Build a command saving where every window is as a named profile."""
+    return SnapCommand('save_profile', None, None, name=name)
+
+
+def restore_profile_command(name):
+    """Build a command putting every window back where a named profile has it."""
+    return SnapCommand('restore_profile', None, None, name=name)
+
+
+def rules_command(window):
+    """Build a command placing a new window as the first matching window rule says."""
+    return SnapCommand('apply_rules', None, None, window)
+
+
+class SnapExecutor:
+    """
+    Single worker thread that executes snap commands in order.
+
+    submit() only enqueues, so it is safe to call from keyboard hook
+    callbacks and the Qt GUI thread. Results are passed to listeners on
+    the worker thread; GUI code has to forward them to its own thread,
+    for example with a Qt signal.
+
+    Hotkey floods are thinned out before they reach the snapper:
+
+    - A command identical to the previous one that arrives within the
+      debounce interval is dropped. The interval restarts on every repeat,
+      so holding a hotkey snaps once.
+    - Commands still waiting for the worker are coalesced per target
+      window: a newer snap for the same window replaces the queued one.
+    - A snap for a window already in the target slot finishes without any
+      native call.
+
+    Commands passed to run() and run_batch() are explicit requests, for
+    example from the command socket, and skip debouncing and coalescing.
+    """
+
+    # Seconds in which a repeated identical command is dropped
+    DEBOUNCE_SECONDS = 0.15
+
+    def __init__(self, snapper, debounce=DEBOUNCE_SECONDS, coalesce=True, clock=time.monotonic):
+        """
+        Initialize the executor.
+
+        Args:
+            snapper: WindowSnapper that carries out the commands
+            debounce: Seconds in which a repeated identical command is dropped, 0 to disable
+            coalesce: Replace queued commands for the same window with newer ones
+            clock: Callable returning the current time in seconds
+        """
+        self.snapper = snapper
+        self.tracer = snapper.tracer
+        self.debounce = debounce
+        self.coalesce = coalesce
+        self.clock = clock
+        self.listeners = []
+        # Optional RecordingBackend writing every command received to a trace
+        self.recorder = None
+        self.handlers = {
+            'snap': self._snap,
+            'stack_all': lambda command: self.snapper.stack_all(),
+            'undo': lambda command: self.snapper.undo(command.window),
+            'redo': lambda command: self.snapper.redo(command.window),
+            'restore_all': lambda command: self.snapper.restore_all(),
+            'apply_rules': lambda command: self.snapper.apply_rules(command.window),
+            'save_profile': lambda command: self.snapper.save_profile(command.name),
+            'restore_profile': lambda command: self.snapper.restore_profile(command.name),
+        }
+        self.counters = {'received': 0, 'debounced': 0, 'coalesced': 0, 'executed': 0, 'noop': 0}
+        self._pending = OrderedDict()
+        self._sequence = 0
+        self._busy = False
+        self._stopping = False
+        self._last_command = None
+        self._last_received = None
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """Start the worker thread."""
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='snapstack-executor', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        Stop the worker thread after the commands already queued.
+
+        Args:
+            timeout: Seconds to wait for the worker to finish
+        """
+        if self._thread is not None:
+            with self._condition:
+                self._stopping = True
+                self._condition.notify_all()
+            self._thread.join(timeout)
+            self._thread = None
+
+    def add_listener(self, listener):
+        """
+        Register a callable receiving every SnapResult.
+
+        Args:
+            listener: Callable taking one SnapResult, called on the worker thread
+        """
+        self.listeners.append(listener)
+
+    def follow_new_windows(self):
+        """
+        Queue the snapper's window rules for every window the registry sees appear.
+
+        Window events arrive on backend threads; only the rule command is
+        queued there, reading the window and snapping it runs on the worker.
+
+        Returns:
+            Boolean: True if there are rules to apply
+        """
+        if not len(self.snapper.rules):
+            return False
+        self.snapper.registry.creation_listeners.append(lambda window: self.submit(rules_command(window)))
+        return True
+
+    def _target_key(self, command):
+        """Get the key commands are coalesced under, one per target window, or None."""
+        if command.action in ('undo', 'redo', 'restore_all', 'save_profile'):
+            # Every step through the history and every save counts, none may replace another
+            return None
+        if command.action == 'apply_rules':
+            return ('apply_rules', self.snapper.backend.window_key(command.window))
+        if command.action == 'snap':
+            if command.window is not None:
+                return ('snap', self.snapper.backend.window_key(command.window))
+            # Only reached without a live registry, where every pending snap
+            # targets whatever window is active when it runs
+            return ('snap', None)
+        return (command.action,)
+
+    def _resolve_target(self, command):
+        """
+        Pin a snap of the active window to the window active right now.
+
+        The registry knows the focused window without a native call, so a
+        snap queued behind others still moves the window that was focused
+        when its hotkey was pressed, and is coalesced only with snaps of
+        that same window.
+
+        Returns:
+            SnapCommand, with `window` filled in when the registry knows it
+        """
+        if command.action != 'snap' or command.window is not None:
+            return command
+        registry = self.snapper.registry
+        window = registry.active_window() if registry.live else None
+        return command if window is None else command._replace(window=window)
+
+    def submit(self, command):
+        """
+        Queue a command without waiting for it to run.
+
+        Args:
+            command: SnapCommand to execute
+
+        Returns:
+            Boolean: False if the command was dropped as a repeat
+        """
+        if self.recorder is not None:
+            self.recorder.record_command(command)
+        command = self._resolve_target(command)
+        key = self._target_key(command)
+        received = self.tracer.clock()
+        with self._condition:
+            self.counters['received'] += 1
+            now = self.clock()
+            repeated = (
+                command == self._last_command
+                and self._last_received is not None
+                and now - self._last_received < self.debounce
+            )
+            self._last_command = command
+            self._last_received = now
+            if repeated:
+                self.counters['debounced'] += 1
+                return False
+
+            if not self.coalesce or key is None:
+                # Unique keys keep every command in the queue
+                self._sequence += 1
+                key = (command.action, self._sequence)
+            elif key in self._pending:
+                self.counters['coalesced'] += 1
+                del self._pending[key]
+            self._pending[key] = (command, None, received)
+            self._condition.notify_all()
+        return True
+
+    def run_batch(self, commands, timeout=None):
+        """
+        Queue commands in order and wait for all of their results.
+
+        Args:
+            commands: List of SnapCommand
+            timeout: Seconds to wait for each result, None to wait indefinitely
+
+        Returns:
+            List of SnapResult in the order of the commands
+
+        Raises:
+            concurrent.futures.TimeoutError: If a command did not finish in time
+        """
+        if self.recorder is not None:
+            self.recorder.record_batch(commands)
+        futures = []
+        received = self.tracer.clock()
+        with self._condition:
+            for command in commands:
+                self.counters['received'] += 1
+                self._sequence += 1
+                future = Future()
+                self._pending[('call', self._sequence)] = (command, future, received)
+                futures.append(future)
+            self._condition.notify_all()
+        return [future.result(timeout) for future in futures]
+
+    def run(self, command, timeout=None):
+        """
+        Queue one command and wait for its result.
+
+        Args:
+            command: SnapCommand to execute
+            timeout: Seconds to wait, None to wait indefinitely
+
+        Returns:
+            SnapResult
+        """
+        return self.run_batch([command], timeout)[0]
+
+    def stats(self):
+        """
+        Get the command counters.
+
+        Returns:
+            Dictionary with received, debounced, coalesced, executed and
+            noop counts and the number of commands still queued
+        """
+        with self._condition:
+            stats = dict(self.counters)
+            stats['pending'] = len(self._pending)
+        return stats
+
+    def reset_counters(self):
+        """Reset the command counters to zero."""
+        with self._condition:
+            for name in self.counters:
+                self.counters[name] = 0
+
+    def wait_idle(self, timeout=None):
+        """
+        Wait until every queued command has run.
+
+        Args:
+            timeout: Seconds to wait at most, None to wait indefinitely
+
+        Returns:
+            Boolean: True if the executor is idle
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def execute(self, command):
+        """
+        Run a command on the calling thread.
+
+        Args:
+            command: SnapCommand to execute
+
+        Returns:
+            SnapResult
+        """
+        handler = self.handlers.get(command.action)
+        if handler is None:
+            logger.warning("Unknown snap command: %s", command.action)
+            return SnapResult(command, False, None)
+
+        try:
+            value = handler(command)
+        except Exception as e:
+            logger.error(
+                "Error running snap command %s: %s", command.action, e,
+                extra={'action': command.action, 'layout': command.layout, 'slot': command.slot},
+            )
+            return SnapResult(command, False, None)
+        return SnapResult(command, bool(value), value)
+
+    def _snap(self, command):
+        """Snap the target window, skipping the move if it is already in the slot."""
+        window = command.window or self.snapper.get_active_window()
+        if not window:
+            logger.warning("Cannot snap: No active window available")
+            return False
+        if self.snapper.window_in_slot(window, command.layout, command.slot, command.monitor):
+            with self._condition:
+                self.counters['noop'] += 1
+            return True
+        return self.snapper.snap_window_to_slot(window, command.layout, command.slot, command.monitor)
+
+    def _run(self):
+        """Worker loop: execute queued commands until stopped."""
+        while True:
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+                self._condition.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    break
+                _, (command, future, received) = self._pending.popitem(last=False)
+                self._busy = True
+                self.counters['executed'] += 1
+
+            self.tracer.begin(command.action, received)
+            result = self.execute(command)
+            self.tracer.finish(result.success)
+            if future is not None:
+                future.set_result(result)
+            for listener in self.listeners:
+                try:
+                    listener(result)
+                except Exception as e:
+                    logger.error("Error delivering snap result: %s", e)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+snapctl - command line client for the SnapStack daemon.
+
+Examples:
+    python snapctl.py snap halves 0
+    python snapctl.py snap thirds 2 --window 12345
+    python snapctl.py stack-all
+    python snapctl.py undo
+    python snapctl.py windows
+    python snapctl.py trace > snap-trace.json
+    python snapctl.py save-profile docked
+    python snapctl.py restore-profile docked
+    python snapctl.py log-level DEBUG --logger backends
+    python snapctl.py batch < commands.jsonl
+"""
+
+import argparse
+import json
+import sys
+
+from command_server import CommandClient
+from config import get_socket_path
+
+
+def build_requests(args):
+    """
+    Turn the parsed command line into protocol requests.
+
+    Returns:
+        List of request dictionaries
+    """
+    if args.command == 'snap':
+        request = {'op': 'snap', 'layout': args.layout, 'slot': args.slot}
+        if args.window is not None:
+            request['window'] = json.loads(args.window)
+        return [request]
+    if args.command in ('undo', 'redo'):
+        request = {'op': args.command}
+        if args.window is not None:
+            request['window'] = json.loads(args.window)
+        return [request]
+    if args.command in ('save-profile', 'restore-profile'):
+        return [{'op': args.command.replace('-', '_'), 'name': args.name}]
+    if args.command in ('stack-all', 'restore-all'):
+        return [{'op': args.command.replace('-', '_')}]
+    if args.command == 'log-level':
+        request = {'op': 'log_level', 'level': args.level}
+        if args.logger is not None:
+            request['logger'] = args.logger
+        return [request]
+    if args.command == 'batch':
+        return [json.loads(line) for line in sys.stdin if line.strip()]
+    return [{'op': args.command}]
+
+
+def main(argv=None):
+    """Client entry point."""
+    parser = argparse.ArgumentParser(description="Send commands to a running SnapStack daemon.")
+    parser.add_argument('--socket', default=None, help="command socket path")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    snap = commands.add_parser('snap', help="snap a window into a layout slot")
+    snap.add_argument('layout', help="layout name, e.g. halves")
+    snap.add_argument('slot', type=int, help="slot index, top to bottom")
+    snap.add_argument('--window', default=None, help="window key from 'windows' as JSON, defaults to the active window")
+    commands.add_parser('stack-all', help="stack every window on the active monitor")
+    for step in ('undo', 'redo'):
+        history = commands.add_parser(step, help=f"{step} the last snap of a window")
+        history.add_argument('--window', default=None, help="window key from 'windows' as JSON, defaults to the active window")
+    commands.add_parser('restore-all', help="undo the last snap of every window")
+    save_profile = commands.add_parser('save-profile', help="save where every window is as a named profile")
+    save_profile.add_argument('name', help="profile name")
+    restore_profile = commands.add_parser('restore-profile', help="put every window back where a profile has it")
+    restore_profile.add_argument('name', help="profile name")
+    log_level = commands.add_parser('log-level', help="change a log level while the daemon runs")
+    log_level.add_argument('level', help="level name, e.g. DEBUG or WARNING")
+    log_level.add_argument('--logger', default=None, help="module to change, e.g. snapper, defaults to every module")
+    commands.add_parser('batch', help="send JSON request lines from stdin as one batch")
+    for query in ('ping', 'layouts', 'windows', 'profiles', 'stats', 'trace', 'log'):
+        commands.add_parser(query, help=f"print the daemon's {query} reply")
+    args = parser.parse_args(argv)
+
+    try:
+        requests = build_requests(args)
+    except ValueError as e:
+        print(f"Invalid JSON: {e}", file=sys.stderr)
+        return 2
+
+    path = args.socket or get_socket_path()
+    try:
+        with CommandClient(path) as client:
+            replies = client.batch(requests) if args.command == 'batch' else [client.request(requests[0])]
+    except OSError as e:
+        print(f"Cannot reach the SnapStack daemon at {path}: {e}", file=sys.stderr)
+        return 2
+
+    for reply in replies:
+        if reply.get('ok'):
+            print(json.dumps(reply.get('result'), indent=2))
+        else:
+            print(f"Error: {reply.get('error')}", file=sys.stderr)
+    return 0 if all(reply.get('ok') for reply in replies) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,150 +3,719 @@ Core window snapping functionality for SnapStack.
 Handles the logic for capturing and resizing windows to specific screen positions.
 """
 
-import platform
-import sys
-from utils.monitor_info import get_primary_monitor, get_system_platform
-
-# Import platform-specific modules
-system = get_system_platform()
-
-if system == 'Windows':
-    import pygetwindow as gw
-    from pywinauto import Desktop
-elif system == 'Darwin':  # macOS
-    # For macOS, we'll need to implement with system-specific commands
-    import subprocess
-    import re
-    import os
-elif system == 'Linux':
-    # For Linux, implementation will depend on the window manager
-    pass
-else:
-    print(f"Unsupported platform: {system}")
-    sys.exit(1)
+import logging
+from collections import OrderedDict, namedtuple
+
+from animation import DEFAULT_FRAME_RATE, AnimationScheduler
+from backends.base import create_backend
+from geometry_history import GeometryHistory
+from layouts import LayoutEngine
+from profiles import ProfileEntry, ProfileMatcher, ProfileStore, absolute_rect, relative_rect
+from tracing import SnapTracer
+from utils.monitor_info import MonitorTopology
+from window_registry import WindowRegistry
+from window_rules import RuleEngine
+
+# Outcome of committing a geometry transaction
+CommitResult = namedtuple('CommitResult', ['windows', 'native_calls'])
+
+logger = logging.getLogger(__name__)
+
+# Windows remembered as already placed by a rule, so showing one again does not re-snap it
+RULED_WINDOWS_KEPT = 1024
+
+
+class GeometryTransaction:
+    """
+    Queue of geometry changes applied to the backend as one batch.
+
+    Changes are merged per window, so a move followed by a resize of the
+    same window becomes a single move+resize. Nothing reaches the window
+    system until commit() is called, or the with-block exits cleanly.
+    """
+
+    def __init__(self, snapper, record_history=True):
+        """
+        Initialize an empty transaction.
+
+        Args:
+            snapper: WindowSnapper whose backend and counters are used
+            record_history: Remember the previous geometries so the changes can be undone
+        """
+        self.snapper = snapper
+        self.backend = snapper.backend
+        self.record_history = record_history
+        self._changes = {}
+        self._previous = {}
+        self.committed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and not self.committed:
+            self.commit()
+        return False
+
+    def __len__(self):
+        return len(self._changes)
+
+    def _change_for(self, window):
+        """Get the pending [window, x, y, width, height] entry for a window."""
+        key = self.backend.window_key(window)
+        change = self._changes.get(key)
+        if change is None:
+            change = self._changes[key] = [window, None, None, None, None]
+        return change
+
+    def move(self, window, x, y):
+        """Queue moving a window's top-left corner to (x, y)."""
+        change = self._change_for(window)
+        change[1] = x
+        change[2] = y
+
+    def resize(self, window, width, height):
+        """Queue resizing a window."""
+        change = self._change_for(window)
+        change[3] = width
+        change[4] = height
+
+    def set_geometry(self, window, x, y, width, height, previous=None):
+        """
+        Queue moving and resizing a window.
+
+        Args:
+            window: Window object from the backend
+            x, y, width, height: New geometry
+            previous: Geometry the window has now, if the caller already knows it
+        """
+        self._change_for(window)[1:] = [x, y, width, height]
+        if previous is not None:
+            self._previous[self.backend.window_key(window)] = previous
+
+    def _current_geometries(self):
+        """
+        Get the geometry every changed window has before the commit, by window key.
+
+        Geometries passed to set_geometry() and those the window registry
+        tracks cost nothing. Without a live registry the missing ones are
+        read with one enumeration when there are several, and a single
+        window with one get_geometry() call.
+        """
+        snapper = self.snapper
+        live = snapper.registry.live
+        geometries = {}
+        missing = []
+        for key, change in self._changes.items():
+            previous = self._previous.get(key)
+            if previous is None and live:
+                previous = snapper.current_geometry(change[0])
+            if previous is not None:
+                geometries[key] = previous
+            elif not live:
+                missing.append(key)
+        if len(missing) > 1:
+            try:
+                read = {
+                    self.backend.window_key(window): geometry
+                    for window, geometry in self.backend.enumerate_window_geometries()
+                }
+            except Exception as e:
+                logger.error("Error reading window geometries: %s", e)
+                read = {}
+            for key in missing:
+                if key in read:
+                    geometries[key] = read[key]
+        elif missing:
+            previous = snapper.current_geometry(self._changes[missing[0]][0])
+            if previous is not None:
+                geometries[missing[0]] = previous
+        return geometries
+
+    def _record_history(self, geometries):
+        """Store the geometry every changed window has before the commit."""
+        history = self.snapper.history
+        for key, previous in geometries.items():
+            history.record(key, self._changes[key][0], previous)
+
+    def commit(self):
+        """
+        Apply all queued changes in a single backend batch.
+
+        With animation on, the changes are handed to the snapper's
+        animation scheduler instead and reach the window system over the
+        following frames.
+
+        Returns:
+            CommitResult with the number of windows changed and the native
+            calls the backend made for them during the commit
+        """
+        if self.committed:
+            raise RuntimeError("Geometry transaction already committed")
+        self.committed = True
+
+        animator = self.snapper.animator
+        geometries = None
+        if (self.record_history or animator is not None) and self._changes:
+            geometries = self._current_geometries()
+        if self.record_history and geometries:
+            self._record_history(geometries)
+        changes = [tuple(change) for change in self._changes.values()]
+        self._changes.clear()
+        self._previous.clear()
+        if not changes:
+            return CommitResult(0, 0)
+
+        calls_before = self.backend.native_calls
+        tracer = self.snapper.tracer
+        start = tracer.clock()
+        immediate = animator.animate(changes, geometries) if animator is not None else changes
+        if immediate:
+            self.backend.apply_geometries(immediate)
+        tracer.mark('native', start)
+        self.snapper.registry.record_geometries(changes)
+        result = CommitResult(len(changes), self.backend.native_calls - calls_before)
+        self.snapper.record_commit(result)
+        return result
+
 
 class WindowSnapper:
     """Main class to handle window snapping operations."""
-    
-    def __init__(self):
-        """Initialize the window snapper."""
-        self.monitor = get_primary_monitor()
-    
+
+    def __init__(self, backend=None, layouts=None, track_windows=True, rules=None, profiles=None):
+        """
+        Initialize the window snapper.
+
+        Args:
+            backend: WindowBackend to control windows with, defaults to the native one
+            layouts: List of Layout to offer, defaults to the built-in layouts
+            track_windows: Keep a window registry updated from backend events
+                so snaps can skip the active window query
+            rules: List of WindowRule placing new windows, defaults to none
+            profiles: ProfileStore for saved workspaces, defaults to the one in the config directory
+        """
+        self.backend = backend or create_backend()
+        self.topology = MonitorTopology(
+            self.backend.get_monitors,
+            self.backend.get_work_areas,
+            self.backend.topology_token,
+            self.backend.get_scale_factors,
+            self.backend.coordinate_space,
+        )
+        self.layout_engine = LayoutEngine(self.topology, layouts)
+        self.commit_stats = {'commits': 0, 'windows': 0, 'native_calls': 0, 'last_native_calls': 0}
+        self.tracer = SnapTracer()
+        self.history = GeometryHistory()
+        self.rules = RuleEngine(rules)
+        self._ruled_windows = OrderedDict()
+        self.profiles = profiles or ProfileStore()
+        self.animator = None
+        self.registry = WindowRegistry(self.backend)
+        self.registry.removal_listeners.append(self.history.forget)
+        if track_windows:
+            self.registry.start()
+
+    @property
+    def monitor(self):
+        """Cached MonitorInfo of the primary monitor."""
+        return self.topology.primary
+
+    def begin_transaction(self, record_history=True):
+        """
+        Start a batch of geometry changes.
+
+        Args:
+            record_history: Remember the previous geometries so the changes can be undone
+
+        Returns:
+            GeometryTransaction to queue changes on and commit
+        """
+        return GeometryTransaction(self, record_history)
+
+    def set_animation(self, duration, frame_rate=None):
+        """
+        Animate geometry changes instead of applying them at once.
+
+        Args:
+            duration: Seconds each transition takes, 0 or None to snap instantly
+            frame_rate: Frames per second, usually the display refresh rate,
+                None for DEFAULT_FRAME_RATE
+        """
+        if self.animator is not None:
+            self.animator.stop()
+            self.animator = None
+        if duration:
+            self.animator = AnimationScheduler(self.backend, duration, frame_rate or DEFAULT_FRAME_RATE)
+            self.animator.start()
+
+    def record_commit(self, result):
+        """
+        Add a committed transaction to the commit counters.
+
+        Args:
+            result: CommitResult returned by the commit
+        """
+        stats = self.commit_stats
+        stats['commits'] += 1
+        stats['windows'] += result.windows
+        stats['native_calls'] += result.native_calls
+        stats['last_native_calls'] = result.native_calls
+
+    def diagnostics(self):
+        """
+        Describe the snapper state for troubleshooting.
+
+        Returns:
+            Dictionary with backend, commit and window registry details
+        """
+        return {
+            'backend': self.backend.name,
+            'native_calls': self.backend.native_calls,
+            'commits': dict(self.commit_stats),
+            'monitors': len(self.topology.monitors),
+            'monitor_scales': [monitor.scale for monitor in self.topology.monitors],
+            'topology_generation': self.topology.generation,
+            'registry': self.registry.diagnostics(),
+            'history': self.history.diagnostics(),
+            'rules': self.rules.diagnostics(),
+            'latency': self.tracer.summary(),
+            'animation': self.animator.stats() if self.animator is not None else None,
+        }
+
+    def close(self):
+        """Stop event tracking and release the backend."""
+        if self.animator is not None:
+            self.animator.stop()
+        self.registry.stop()
+        self.backend.close()
+
     def get_active_window(self):
         """
         Get the currently active/focused window.
-        
+
         Returns:
             Window object or identifier depending on the platform
         """
-        if system == 'Windows':
+        start = self.tracer.clock()
+        window = self.registry.active_window() if self.registry.live else None
+        if window is None:
             try:
-                return gw.getActiveWindow()
+                window = self.backend.get_active_window()
             except Exception as e:
-                print(f"Error getting active window: {e}")
-                return None
-        elif system == 'Darwin':  # macOS
+                logger.error("Error getting active window: %s", e)
+        self.tracer.mark('lookup', start)
+        return window
+
+    def current_geometry(self, window):
+        """
+        Get a window's geometry, from the registry when it is tracked.
+
+        Returns:
+            Geometry, or None if it cannot be determined
+        """
+        geometry = self.registry.geometry(window) if self.registry.live else None
+        if geometry is None:
             try:
-                # Get the active window info using AppleScript
-                script = '''
-                tell application "System Events"
-                    set frontApp to name of first application process whose frontmost is true
-                    set frontWindow to name of front window of application process frontApp
-                    return {frontApp, frontWindow}
-                end tell
-                '''
-                result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
-                if result.returncode == 0:
-                    app_name, window_name = result.stdout.strip().split(", ")
-                    return {"app": app_name, "window": window_name}
-                return None
+                geometry = self.backend.get_geometry(window)
             except Exception as e:
-                print(f"Error getting active window: {e}")
-                return None
-        else:
-            # Linux implementation
-            return None
-    
-    def snap_to_top(self):
-        """Snap the active window to the top half of the screen."""
-        window = self.get_active_window()
-        if not window or not self.monitor:
-            print("Cannot snap: No active window or monitor information available")
+                logger.error("Error getting window geometry: %s", e)
+        return geometry
+
+    def monitor_for_window(self, window):
+        """
+        Get the monitor a window is on.
+
+        Args:
+            window: Window object from the backend
+
+        Returns:
+            MonitorInfo containing or mostly overlapping the window
+        """
+        return self._monitor_and_geometry(window)[0]
+
+    def _monitor_and_geometry(self, window):
+        """
+        Get the monitor a window is on, and its geometry if that had to be read.
+
+        Returns:
+            Tuple of (MonitorInfo, Geometry or None)
+        """
+        monitors = self.topology.monitors
+        if len(monitors) < 2:
+            # Nothing to choose between, so skip reading the window geometry
+            return self.topology.primary, None
+
+        geometry = self.current_geometry(window)
+        if geometry is None:
+            return self.topology.primary, None
+        return self.topology.monitor_for_rect(geometry), geometry
+
+    def window_in_slot(self, window, layout_name, slot, monitor=None):
+        """
+        Check from memory whether a window already fills a layout slot.
+
+        Only the window registry is consulted, so this never makes a native
+        call and answers False when the geometry is not tracked.
+
+        Args:
+            window: Window object from the backend
+            layout_name: Name of the layout
+            slot: Index of the slot, top to bottom
+            monitor: MonitorInfo of the slot, defaults to the window's monitor
+
+        Returns:
+            Boolean: True if the window's known geometry equals the slot
+        """
+        if not self.registry.live:
             return False
-        
+        geometry = self.registry.geometry(window)
+        if geometry is None:
+            return False
+        start = self.tracer.clock()
+        monitor = monitor or self.monitor_for_window(window)
         try:
-            if system == 'Windows':
-                x = self.monitor.x
-                y = self.monitor.y
-                width = self.monitor.width
-                height = self.monitor.height // 2
-                window.moveTo(x, y)
-                window.resizeTo(width, height)
-            elif system == 'Darwin':  # macOS
-                if window:
-                    screen_width = subprocess.getoutput("system_profiler SPDisplaysDataType | grep Resolution | awk '{print $2}'")
-                    screen_height = subprocess.getoutput("system_profiler SPDisplaysDataType | grep Resolution | awk '{print $4}'")
-                    
-                    # Convert to integers and calculate top half
-                    try:
-                        width = int(screen_width)
-                        height = int(screen_height) // 2
-                        x = 0
-                        y = 0
-                        
-                        # Use AppleScript to position and resize the window
-                        script = f'''
-                        tell application "{window['app']}"
-                            set bounds of front window to {{{x}, {y}, {width}, {height}}}
-                        end tell
-                        '''
-                        subprocess.run(['osascript', '-e', script])
-                    except Exception as e:
-                        print(f"Error resizing window: {e}")
-            
+            return geometry == self.layout_engine.slot_rect(monitor, layout_name, slot)
+        except (KeyError, IndexError):
+            return False
+        finally:
+            self.tracer.mark('compute', start)
+
+    def snap_window_to_slot(self, window, layout_name, slot, monitor=None):
+        """
+        Snap a window into one slot of a layout.
+
+        Args:
+            window: Window object from the backend
+            layout_name: Name of the layout
+            slot: Index of the slot, top to bottom
+            monitor: MonitorInfo to snap on, defaults to the window's monitor
+
+        Returns:
+            Boolean: True if the window was moved
+        """
+        start = self.tracer.clock()
+        geometry = None
+        if monitor is None:
+            monitor, geometry = self._monitor_and_geometry(window)
+        if not monitor:
+            logger.warning("Cannot snap: No monitor information available")
+            return False
+
+        try:
+            x, y, width, height = self.layout_engine.slot_rect(monitor, layout_name, slot)
+            self.tracer.mark('compute', start)
+            with self.begin_transaction() as transaction:
+                # The geometry read to find the monitor is what undo goes back to
+                transaction.set_geometry(window, x, y, width, height, previous=geometry)
             return True
         except Exception as e:
-            print(f"Error snapping window to top: {e}")
+            logger.error(
+                "Error snapping window to %s slot %s: %s", layout_name, slot, e,
+                extra={'layout': layout_name, 'slot': slot, 'window': self.backend.window_key(window)},
+            )
             return False
-    
-    def snap_to_bottom(self):
-        """Snap the active window to the bottom half of the screen."""
+
+    def snap_to_slot(self, layout_name, slot):
+        """
+        Snap the active window into one slot of a layout on the monitor it is on.
+
+        Args:
+            layout_name: Name of the layout
+            slot: Index of the slot, top to bottom
+
+        Returns:
+            Boolean: True if the window was moved
+        """
         window = self.get_active_window()
-        if not window or not self.monitor:
-            print("Cannot snap: No active window or monitor information available")
+        if not window:
+            logger.warning("Cannot snap: No active window available")
+            return False
+        return self.snap_window_to_slot(window, layout_name, slot)
+
+    def stack_all(self, monitor=None, gap=0):
+        """
+        Tile every visible window on a monitor into one vertical stack.
+
+        Windows are enumerated once, keep their current top-to-bottom order
+        and are all moved in a single committed batch.
+
+        Args:
+            monitor: MonitorInfo to stack, defaults to the active window's monitor
+            gap: Pixels between neighbouring windows
+
+        Returns:
+            Number of windows stacked
+        """
+        if monitor is None:
+            window = self.get_active_window()
+            monitor = self.monitor_for_window(window) if window else self.monitor
+        if not monitor:
+            logger.warning("Cannot stack: No monitor information available")
+            return 0
+
+        start = self.tracer.clock()
+        try:
+            windows = self.backend.enumerate_window_geometries()
+        except Exception as e:
+            logger.error("Error enumerating windows: %s", e)
+            return 0
+        self.tracer.mark('lookup', start)
+
+        # Both the index lookup and the sort work on data already in memory
+        start = self.tracer.clock()
+        on_monitor = []
+        for index, (window, geometry) in enumerate(windows):
+            # Skip windows the topology cannot place, e.g. while monitors are unknown
+            window_monitor = self.topology.monitor_for_rect(geometry)
+            if window_monitor is not None and window_monitor.index == monitor.index:
+                on_monitor.append((geometry.y, geometry.x, index, window))
+        if not on_monitor:
+            return 0
+        on_monitor.sort(key=lambda item: item[:3])
+
+        try:
+            slots = self.layout_engine.stack_rects(monitor, len(on_monitor), gap)
+            self.tracer.mark('compute', start)
+            with self.begin_transaction() as transaction:
+                for (_, _, index, window), slot in zip(on_monitor, slots):
+                    transaction.set_geometry(window, *slot, previous=windows[index][1])
+            return len(on_monitor)
+        except Exception as e:
+            logger.error("Error stacking windows: %s", e)
+            return 0
+
+    def snap_to_top(self):
+        """Snap the active window to the top half of the monitor it is on."""
+        return self.snap_to_slot('halves', 0)
+
+    def snap_to_bottom(self):
+        """Snap the active window to the bottom half of the monitor it is on."""
+        return self.snap_to_slot('halves', 1)
+
+    def apply_rules(self, window):
+        """
+        Snap a new window into the slot of the first window rule it matches.
+
+        A window is placed by a rule once; when it is hidden and shown
+        again it stays where the user left it.
+
+        Args:
+            window: Window object from the backend
+
+        Returns:
+            Boolean: True if a rule matched and the window is in its slot
+        """
+        if not len(self.rules):
+            return False
+        key = self.backend.window_key(window)
+        if key in self._ruled_windows:
             return False
-        
+
         try:
-            if system == 'Windows':
-                x = self.monitor.x
-                y = self.monitor.y + (self.monitor.height // 2)
-                width = self.monitor.width
-                height = self.monitor.height // 2
-                window.moveTo(x, y)
-                window.resizeTo(width, height)
-            elif system == 'Darwin':  # macOS
-                if window:
-                    screen_width = subprocess.getoutput("system_profiler SPDisplaysDataType | grep Resolution | awk '{print $2}'")
-                    screen_height = subprocess.getoutput("system_profiler SPDisplaysDataType | grep Resolution | awk '{print $4}'")
-                    
-                    # Convert to integers and calculate bottom half
+            info = self.backend.describe_window(window)
+        except Exception as e:
+            logger.error("Error reading window details: %s", e)
+            return False
+        monitor = self.monitor_for_window(window)
+        rule = self.rules.match(info, monitor.index if monitor else None)
+        if rule is None:
+            return False
+
+        self._ruled_windows[key] = rule.name
+        if len(self._ruled_windows) > RULED_WINDOWS_KEPT:
+            self._ruled_windows.popitem(last=False)
+        if self.window_in_slot(window, rule.layout, rule.slot, monitor):
+            return True
+        return self.snap_window_to_slot(window, rule.layout, rule.slot, monitor)
+
+    def window_geometries(self):
+        """
+        Get every window with its geometry, from the registry when it is live.
+
+        Returns:
+            List of (window, Geometry)
+        """
+        start = self.tracer.clock()
+        if self.registry.live:
+            records, _ = self.registry.snapshot()
+            windows = [(record.window, record.geometry) for record in records if record.geometry is not None]
+        else:
+            # One enumeration instead of a geometry query per window
+            try:
+                windows = self.backend.enumerate_window_geometries()
+            except Exception as e:
+                logger.error("Error enumerating windows: %s", e)
+                windows = []
+        self.tracer.mark('lookup', start)
+        return windows
+
+    def _describe_windows(self, windows):
+        """Add the WindowInfo to (window, Geometry) pairs, dropping windows that cannot be read."""
+        described = []
+        for window, geometry in windows:
+            try:
+                described.append((window, self.backend.describe_window(window), geometry))
+            except Exception as e:
+                logger.error("Error reading window details: %s", e)
+        return described
+
+    def capture_profile(self):
+        """
+        Record where every window is.
+
+        Returns:
+            List of ProfileEntry, one per window
+        """
+        # Reverse slot tables turn "which slot is this window in" into one lookup
+        slot_lookup = {}
+        for monitor in self.topology.monitors:
+            lookup = slot_lookup[monitor.index] = {}
+            for layout_name, rects in self.layout_engine.slot_table(monitor).items():
+                for slot, rect in enumerate(rects):
+                    lookup.setdefault(tuple(rect), (layout_name, slot))
+
+        entries = []
+        for window, info, geometry in self._describe_windows(self.window_geometries()):
+            monitor = self.topology.monitor_for_rect(geometry)
+            if monitor is None:
+                continue
+            # A monitor reporting an empty work area, e.g. while it is being
+            # switched off, gives no position to save
+            rect = relative_rect(geometry, monitor.work_area)
+            if rect is None:
+                continue
+            layout_name, slot = slot_lookup[monitor.index].get(tuple(geometry), (None, None))
+            entries.append(ProfileEntry(
+                info.app, info.title, monitor.index, monitor.name, layout_name, slot, *rect,
+            ))
+        return entries
+
+    def apply_profile(self, entries):
+        """
+        Move every window matching a profile entry back into place in a single batch.
+
+        Windows are matched by application and title, then by application
+        alone. Entries are placed on the monitor with the saved name, else
+        the one with the saved index, else the primary monitor.
+
+        Args:
+            entries: List of ProfileEntry
+
+        Returns:
+            Number of windows placed
+        """
+        monitors = self.topology.monitors
+        if not entries or not monitors:
+            return 0
+        by_name = {monitor.name: monitor for monitor in monitors if monitor.name}
+        by_index = {monitor.index: monitor for monitor in monitors}
+
+        pairs = ProfileMatcher(entries).match(self._describe_windows(self.window_geometries()))
+        try:
+            with self.begin_transaction() as transaction:
+                for window, geometry, entry in pairs:
+                    monitor = by_name.get(entry.monitor_name) or by_index.get(entry.monitor) or self.topology.primary
                     try:
-                        width = int(screen_width)
-                        height = int(screen_height) // 2
-                        x = 0
-                        y = height  # Start from the middle of the screen
-                        
-                        # Use AppleScript to position and resize the window
-                        script = f'''
-                        tell application "{window['app']}"
-                            set bounds of front window to {{{x}, {y}, {width}, {y + height}}}
-                        end tell
-                        '''
-                        subprocess.run(['osascript', '-e', script])
-                    except Exception as e:
-                        print(f"Error resizing window: {e}")
-            
+                        rect = self.layout_engine.slot_rect(monitor, entry.layout, entry.slot)
+                    except (KeyError, IndexError, TypeError):
+                        rect = absolute_rect(entry, monitor.work_area)
+                    if tuple(rect) != tuple(geometry):
+                        transaction.set_geometry(window, *rect, previous=geometry)
+            return len(pairs)
+        except Exception as e:
+            logger.error("Error applying profile: %s", e)
+            return 0
+
+    def save_profile(self, name):
+        """
+        Save where every window is as a named profile.
+
+        Returns:
+            Number of windows saved
+        """
+        entries = self.capture_profile()
+        try:
+            self.profiles.save(name, entries)
+        except OSError as e:
+            logger.error("Error saving profile %s: %s", name, e)
+            return 0
+        return len(entries)
+
+    def restore_profile(self, name):
+        """
+        Put every window back where a named profile has it.
+
+        Returns:
+            Number of windows placed, 0 if there is no such profile
+        """
+        entries = self.profiles.get(name)
+        if entries is None:
+            logger.warning("Unknown profile: %s", name)
+            return 0
+        return self.apply_profile(entries)
+
+    def _step_history(self, window, undo):
+        """Undo or redo the last geometry change of a window."""
+        window = window or self.get_active_window()
+        if not window:
+            logger.warning("Cannot restore: No active window available")
+            return False
+
+        key = self.backend.window_key(window)
+        current = self.current_geometry(window)
+        step = self.history.undo(key, current) if undo else self.history.redo(key, current)
+        if step is None:
+            return False
+
+        try:
+            with self.begin_transaction(record_history=False) as transaction:
+                transaction.set_geometry(step[0], *step[1])
             return True
         except Exception as e:
-            print(f"Error snapping window to bottom: {e}")
-            return False 
\ No newline at end of file
+            logger.error("Error restoring window geometry: %s", e)
+            return False
+
+    def undo(self, window=None):
+        """
+        Put a window back where it was before its last snap.
+
+        Args:
+            window: Window object from the backend, defaults to the active window
+
+        Returns:
+            Boolean: True if the window was moved
+        """
+        return self._step_history(window, True)
+
+    def redo(self, window=None):
+        """
+        Repeat the last geometry change a window had undone.
+
+        Args:
+            window: Window object from the backend, defaults to the active window
+
+        Returns:
+            Boolean: True if the window was moved
+        """
+        return self._step_history(window, False)
+
+    def restore_all(self):
+        """
+        Undo the last snap of every window with history in a single batch.
+
+        Returns:
+            Number of windows restored
+        """
+        key_of = self.backend.window_key
+        current = {key_of(window): geometry for window, geometry in self.window_geometries()}
+        restores = self.history.undo_all(current)
+        if not restores:
+            return 0
+        try:
+            with self.begin_transaction(record_history=False) as transaction:
+                for window, geometry in restores:
+                    transaction.set_geometry(window, *geometry)
+            return len(restores)
+        except Exception as e:
+            logger.error("Error restoring windows: %s", e)
+            return 0
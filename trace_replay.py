@@ -0,0 +1,464 @@
+"""
+Trace replay for SnapStack.
+Drives the snapper, executor, hotkeys, drag snapping and window rules headlessly from a recorded trace, so a production session becomes a repeatable benchmark.
+"""
+
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+
+from screeninfo import Monitor
+
+from backends.fake import FakeBackend
+from backends.recording import encode_command, read_trace
+from config import DEFAULT_CONFIG
+from hotkeys import HotkeyEngine, load_hotkeys
+from layouts import load_layouts
+from main import start_animation, start_drag_snapping
+from profiles import ProfileEntry, ProfileStore
+from snap_executor import SnapCommand, SnapExecutor, rules_command
+from snapper import WindowSnapper
+from tracing import LatencyHistogram
+from utils.monitor_info import PHYSICAL, Rect
+from window_rules import load_rules
+
+logger = logging.getLogger(__name__)
+
+# The fake backend counts both enumeration calls under one name
+OP_ALIASES = {'enumerate_window_geometries': 'enumerate_windows'}
+
+# How far ahead an active window lookup may be to say which window a command or key was meant for
+FOCUS_LOOKAHEAD_SECONDS = 1.0
+
+# Commands the replayed app submitted itself, kept to match against the recorded ones
+GENERATED_KEPT = 256
+
+# Geometry of a window the trace never reports one for
+DEFAULT_GEOMETRY = (0, 0, 800, 600)
+
+_UNKNOWN = object()
+
+
+def _key(value):
+    """Turn a window key read back from JSON into a hashable value."""
+    return tuple(_key(item) for item in value) if isinstance(value, list) else value
+
+
+def _monitors(rows):
+    """Turn recorded get_monitors() rows back into monitor objects."""
+    return [
+        Monitor(x=x, y=y, width=width, height=height, name=name, is_primary=is_primary)
+        for x, y, width, height, name, is_primary in rows
+    ]
+
+
+class TraceReplayer:
+    """
+    Replays a trace written by a RecordingBackend.
+
+    The desktop is simulated with a FakeBackend: windows, focus, moves,
+    drags and monitor changes are taken from the trace, and every native
+    call takes the median time the same call took while recording. On
+    top of it runs the same snapper, executor, hotkey engine, drag snapper
+    and window rules the app builds, configured from the config stored in
+    the trace.
+
+    Key events are fed to the hotkey engine, window events to the fake
+    desktop, and recorded commands to the executor. Commands the replayed
+    app submits itself, from a hotkey, a rule or a drop, are matched with
+    the recorded ones so they run once.
+
+    Records are replayed on the calling thread, in order, paced by their
+    timestamps divided by the speed; with speed 0 they are replayed as
+    fast as the snapper keeps up, each record waiting for the commands
+    the previous one queued, so nothing is coalesced that the recording
+    ran separately and the window events a snap caused arrive after it,
+    as they did when recorded. The executor and hotkey engine are
+    clocked by trace time, so debouncing and sequence timeouts behave as
+    recorded at any speed.
+    """
+
+    def __init__(self, path, speed=1.0, latency_scale=1.0, hotkeys=True):
+        """
+        Load a trace and build the app around a simulated desktop.
+
+        Args:
+            path: Trace file written by a RecordingBackend
+            speed: Replay speed, 1.0 for real time, 0 for as fast as possible
+            latency_scale: Factor for the recorded native call times, 0 to leave them out
+            hotkeys: Replay key events through the hotkey engine; when False
+                the commands they produced are replayed instead
+
+        Raises:
+            ValueError: If the file is not a SnapStack trace of a known version
+        """
+        self.path = path
+        self.speed = speed
+        self.header, self.records = read_trace(path)
+        self.config = dict(DEFAULT_CONFIG)
+        self.config.update(self.header.get('config') or {})
+        self.now = 0.0
+        self.counters = Counter()
+        self.generated = deque(maxlen=GENERATED_KEPT)
+        self.actions = {}
+        self.recorded_ops = {}
+        self._scan()
+
+        medians = {op: statistics.median(samples) * latency_scale for op, samples in self._op_seconds.items()}
+        self.backend = FakeBackend(
+            latency=lambda op: medians.get(op, 0.0),
+            coordinate_space=self.header.get('coordinate_space', PHYSICAL),
+        )
+        self.backend.reports_drags = self.header.get('reports_drags', True)
+        self._topology = None
+        self._apply_topology(0)
+        for key in self._initial_windows:
+            self._add_window(key)
+        if self._initial_active not in (_UNKNOWN, None):
+            self.backend.focus(self.backend.windows[self._initial_active])
+
+        self._profile_dir = tempfile.mkdtemp(prefix='snapstack-replay-')
+        profiles = ProfileStore(os.path.join(self._profile_dir, 'profiles.json'))
+        for name, rows in (self.header.get('profiles') or {}).items():
+            profiles.save(name, [ProfileEntry(*row) for row in rows])
+
+        self.snapper = WindowSnapper(
+            self.backend,
+            layouts=load_layouts(self.config['layouts']),
+            rules=load_rules(self.config['rules']),
+            profiles=profiles,
+        )
+        self.executor = SnapExecutor(self.snapper, clock=self.clock)
+        # Sees every command submitted, recorded or generated
+        self.executor.recorder = self
+        self.executor.add_listener(self._on_result)
+        if len(self.snapper.rules):
+            self.snapper.registry.creation_listeners.append(
+                lambda window: self.executor.submit(rules_command(window))
+            )
+        self.hotkeys = None
+        if hotkeys:
+            self.hotkeys = HotkeyEngine(self.executor.submit, clock=self.clock)
+            self.hotkeys.rebind(load_hotkeys(self.config['hotkeys']))
+        self.drag_snapper = start_drag_snapping(self.snapper, self.executor, self.config)
+        start_animation(self.snapper, self.config)
+        self._replaying = None
+        self._batches = []
+        self.seconds = 0.0
+
+    def clock(self):
+        """Trace time of the record being replayed."""
+        return self.now
+
+    def _scan(self):
+        """Collect what the replay needs to know before it starts: windows, topologies, call times."""
+        self._op_seconds = {}
+        self._geometries = {}
+        self._descriptions = {}
+        self._topologies = {}
+        self._initial_windows = []
+        self._initial_active = _UNKNOWN
+        self._next_active = [_UNKNOWN] * len(self.records)
+        seen = set()
+        topology = None
+        # Like MonitorTopology, the token before the first check is None
+        token = None
+        changed_at = None
+
+        def see(key, created=False):
+            key = _key(key)
+            if key is not None and key not in seen:
+                seen.add(key)
+                if not created:
+                    self._initial_windows.append(key)
+            return key
+
+        for index, record in enumerate(self.records):
+            kind = record[0]
+            if kind == 'op':
+                _, t, name, args, result, seconds = record
+                op = OP_ALIASES.get(name, name)
+                self._op_seconds.setdefault(op, []).append(seconds)
+                self.recorded_ops.setdefault(name, LatencyHistogram()).record(seconds)
+                if isinstance(result, dict):
+                    continue
+                if name == 'get_monitors':
+                    # The displays changed when the token did, the monitors are only read at the next snap
+                    topology = self._topologies[index if changed_at is None else changed_at] = [result, None, None]
+                    changed_at = None
+                elif name == 'topology_token':
+                    if result != token:
+                        changed_at = index
+                    token = result
+                elif name == 'get_work_areas' and topology is not None:
+                    topology[1] = result
+                elif name == 'get_scale_factors' and topology is not None:
+                    topology[2] = result
+                elif name == 'get_active_window':
+                    key = see(result)
+                    if self._initial_active is _UNKNOWN:
+                        self._initial_active = key
+                elif name == 'enumerate_windows':
+                    for key in result:
+                        see(key)
+                elif name == 'enumerate_window_geometries':
+                    for row in result:
+                        self._geometries.setdefault(see(row[0]), row[1:])
+                elif name == 'get_geometry' and result is not None:
+                    self._geometries.setdefault(see(args[0]), result)
+                elif name == 'set_geometry':
+                    self._geometries.setdefault(see(args[0]), args[1:])
+                elif name == 'apply_geometries':
+                    for change in args:
+                        see(change[0])
+                elif name == 'describe_window':
+                    self._descriptions.setdefault(see(args[0]), result)
+            elif kind == 'event':
+                _, t, name, args = record
+                key = see(args[0], created=name == 'created')
+                if name == 'focus' and self._initial_active is _UNKNOWN:
+                    # Focus came from an event, so the window focused at the start is not known
+                    self._initial_active = None
+                if name in ('created', 'moved') and args[1] is not None:
+                    self._geometries.setdefault(key, args[1])
+            elif kind == 'command':
+                see(record[5])
+            elif kind == 'batch':
+                for command in record[2]:
+                    see(command[3])
+
+        # Which window the next active window lookup found, for every record
+        upcoming = (None, _UNKNOWN)
+        for index in range(len(self.records) - 1, -1, -1):
+            record = self.records[index]
+            if record[0] == 'op' and record[2] == 'get_active_window' and not isinstance(record[4], dict):
+                upcoming = (record[1], _key(record[4]))
+            elif upcoming[0] is not None and upcoming[0] - record[1] <= FOCUS_LOOKAHEAD_SECONDS:
+                self._next_active[index] = upcoming[1]
+
+    def _add_window(self, key):
+        """Create the simulated window for a key, with what the trace says about it."""
+        title, app, process = self._descriptions.get(key) or ('', '', '')
+        x, y, width, height = self._geometries.get(key) or DEFAULT_GEOMETRY
+        self.counters['windows'] += 1
+        return self.backend.add_window(
+            title, app, x, y, width, height, focus=False, process=process or None, handle=key,
+        )
+
+    def _window(self, key):
+        """Get the simulated window for a key, creating it if the trace never reported it."""
+        key = _key(key)
+        if key is None:
+            return None
+        window = self.backend.windows.get(key)
+        return window if window is not None else self._add_window(key)
+
+    def _apply_topology(self, index):
+        """Switch the simulated displays to the ones read at a record, if they changed."""
+        topology = self._topologies.get(index)
+        if topology is None and index == 0 and self._topologies:
+            # Monitors as first read, even if other calls were recorded before
+            topology = self._topologies[min(self._topologies)]
+        if topology is None or topology == self._topology:
+            return
+        first = self._topology is None
+        self._topology = topology
+        rows, work_areas, scales = topology
+        self.backend.set_monitors(
+            _monitors(rows), [Rect(*area) for area in work_areas] if work_areas else None, scales,
+        )
+        if not first:
+            self.counters['topology_changes'] += 1
+            self.snapper.topology.check()
+
+    def _focus_for(self, index):
+        """Focus the window the app found active right after a record, if the trace says."""
+        key = self._next_active[index]
+        if key is _UNKNOWN or key == self.backend.active_handle:
+            return
+        self.backend.focus(self._window(key) if key is not None else None)
+
+    def _decode(self, fields):
+        """Turn recorded command fields back into a SnapCommand."""
+        action, layout, slot, window, name, monitor = fields
+        monitors = self.snapper.topology.monitors
+        return SnapCommand(
+            action, layout, slot, self._window(window), name,
+            monitors[monitor] if monitor is not None and monitor < len(monitors) else None,
+        )
+
+    def record_command(self, command):
+        """Executor hook: remember commands the replayed app submitted itself."""
+        if self._replaying is not command:
+            self.generated.append(encode_command(command, self.backend.window_key))
+
+    def record_batch(self, commands):
+        """Executor hook for run_batch(), only called for recorded batches."""
+        pass
+
+    def _on_result(self, result):
+        """Add a finished command's total latency to its action's histogram."""
+        # Listeners run on the worker right after the tracer closed the command's trace
+        recent = self.snapper.tracer.recent
+        if recent:
+            total = recent[-1]['phases'].get('total')
+            if total is not None:
+                self.actions.setdefault(result.command.action, LatencyHistogram()).record(total)
+
+    def _replay_event(self, name, args):
+        """Apply a recorded window event to the simulated desktop."""
+        backend = self.backend
+        key = _key(args[0])
+        window = backend.windows.get(key)
+        if name == 'created':
+            if window is None:
+                self._add_window(key)
+        elif name == 'destroyed':
+            if window is not None:
+                backend.close_window(window)
+        elif name == 'focus':
+            backend.focus(self._window(key))
+        elif window is None:
+            # Moves and drags of a window that is already gone
+            return
+        elif name == 'moved':
+            # Moves caused by the snaps themselves are already applied
+            if args[1] is not None and list(args[1]) != [window.x, window.y, window.width, window.height]:
+                backend.move_window(window, *args[1])
+        elif name == 'move_start':
+            backend.start_drag(window, args[1], args[2])
+        elif name == 'drag':
+            if backend.dragging is not None:
+                backend.drag_to(args[1], args[2])
+        elif name == 'move_end':
+            if backend.dragging is not None:
+                backend.end_drag(args[1], args[2])
+
+    def _replay_command(self, fields):
+        """Submit a recorded command, unless the replay already generated it."""
+        fields = list(fields)
+        fields[3] = _key(fields[3])
+        try:
+            self.generated.remove(fields)
+        except ValueError:
+            pass
+        else:
+            self.counters['regenerated'] += 1
+            return
+        command = self._decode(fields)
+        self._replaying = command
+        self.executor.submit(command)
+        self._replaying = None
+        self.counters['commands'] += 1
+
+    def _replay_batch(self, rows):
+        """Run a recorded batch on its own thread, as a command socket connection would."""
+        commands = [self._decode(fields) for fields in rows]
+        thread = threading.Thread(target=self.executor.run_batch, args=(commands,), daemon=True)
+        thread.start()
+        self._batches.append(thread)
+        self.counters['batches'] += 1
+
+    def _settle(self, timeout):
+        """Wait for the batches and commands queued so far to finish."""
+        for thread in self._batches:
+            thread.join(timeout)
+        self._batches.clear()
+        if not self.executor.wait_idle(timeout):
+            logger.warning("Replay of %s did not finish within %.0f s", self.path, timeout)
+
+    def run(self, timeout=60.0):
+        """
+        Replay every record, then wait for the executor to finish.
+
+        Args:
+            timeout: Seconds to wait for the queued commands at the end
+
+        Returns:
+            Report dictionary, see report()
+        """
+        self.executor.start()
+        self.snapper.tracer.reset()
+        start = time.perf_counter()
+        try:
+            for index, record in enumerate(self.records):
+                kind = record[0]
+                self.now = record[1]
+                if self.speed:
+                    delay = start + record[1] / self.speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                if kind == 'op':
+                    self._apply_topology(index)
+                elif kind == 'event':
+                    self.counters['events'] += 1
+                    self._replay_event(record[2], record[3])
+                elif kind == 'key':
+                    if self.hotkeys is not None:
+                        self.counters['keys'] += 1
+                        if record[2]:
+                            self._focus_for(index)
+                        self.hotkeys.feed(record[2], record[3])
+                elif kind == 'command':
+                    self._focus_for(index)
+                    self._replay_command(record[2:])
+                elif kind == 'batch':
+                    self._replay_batch(record[2])
+                if not self.speed:
+                    self._settle(timeout)
+            for thread in self._batches:
+                thread.join(timeout)
+            if not self.executor.wait_idle(timeout):
+                logger.warning("Replay of %s did not finish within %.0f s", self.path, timeout)
+        finally:
+            self.seconds = time.perf_counter() - start
+            self.executor.stop()
+        return self.report()
+
+    def report(self):
+        """
+        Summarize the replay.
+
+        Returns:
+            Dictionary with the phase and per-action latency summaries, the
+            native calls per operation as recorded and as replayed, and the
+            executor, hotkey, drag and replay counters
+        """
+        replayed = self.backend.calls_by_op
+        calls = {}
+        for name, histogram in self.recorded_ops.items():
+            calls[name] = {
+                'recorded': histogram.count,
+                'recorded_p50_ms': histogram.percentile(0.50),
+                'recorded_p99_ms': histogram.percentile(0.99),
+                'replayed': replayed.get(OP_ALIASES.get(name, name), 0),
+            }
+        for op, count in replayed.items():
+            if op not in calls and not any(OP_ALIASES.get(name) == op for name in calls):
+                calls[op] = {'recorded': 0, 'recorded_p50_ms': 0.0, 'recorded_p99_ms': 0.0, 'replayed': count}
+        return {
+            'trace': self.path,
+            'backend': self.header.get('backend'),
+            'records': len(self.records),
+            'recorded_seconds': self.records[-1][1] if self.records else 0.0,
+            'replay_seconds': self.seconds,
+            'phases': self.snapper.tracer.summary(),
+            'actions': {action: histogram.summary() for action, histogram in self.actions.items()},
+            'calls': calls,
+            'native_calls': self.backend.native_calls,
+            'executor': self.executor.stats(),
+            'hotkeys': self.hotkeys.stats() if self.hotkeys is not None else None,
+            'drag': self.drag_snapper.stats() if self.drag_snapper is not None else None,
+            'replay': dict(self.counters),
+        }
+
+    def close(self):
+        """Stop the snapper and remove the temporary profiles."""
+        self.executor.stop()
+        self.snapper.close()
+        shutil.rmtree(self._profile_dir, ignore_errors=True)
@@ -0,0 +1,246 @@
+"""
+Snap tracing for SnapStack.
+Times each phase of a snap into fixed-size latency histograms and keeps the most recent traces for diagnostics.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+
+# Phases of a command, in the order they happen:
+# queue    hotkey or click received until the worker picks the command up
+# lookup   finding the target windows (active window, enumeration)
+# compute  monitor lookup and slot geometry
+# native   the backend's move/resize batch
+# total    received until the command completed
+PHASES = ('queue', 'lookup', 'compute', 'native', 'total')
+
+# Sub-buckets per power of two, the histogram's relative precision is 1/16
+SUB_BUCKETS = 16
+
+# Powers of two covered above the linear range, enough for over a minute in microseconds
+MAX_SHIFT = 24
+
+# Finished traces kept for the diagnostics panel
+RECENT_TRACES = 64
+
+
+def bucket_index(micros):
+    """Get the histogram bucket of a latency in whole microseconds."""
+    if micros < SUB_BUCKETS:
+        return max(micros, 0)
+    shift = min(micros.bit_length() - 5, MAX_SHIFT)
+    return SUB_BUCKETS * (shift + 1) + min((micros >> shift) - SUB_BUCKETS, SUB_BUCKETS - 1)
+
+
+def bucket_bounds(index):
+    """Get the (lowest, highest) microseconds of a histogram bucket."""
+    if index < SUB_BUCKETS:
+        return index, index
+    shift, sub = divmod(index - SUB_BUCKETS, SUB_BUCKETS)
+    low = (SUB_BUCKETS + sub) << shift
+    return low, low + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram with a fixed number of buckets.
+
+    Recording is an index computation and an increment, and memory does
+    not grow with the number of samples. Percentiles are accurate to one
+    bucket, about 6%. Intended for a single writer; readers may see a
+    sample that is half recorded, which only skews a report by one count.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (SUB_BUCKETS * (MAX_SHIFT + 2))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds):
+        """Add one latency sample."""
+        micros = int(seconds * 1000000)
+        self.counts[bucket_index(micros)] += 1
+        self.count += 1
+        self.total += micros
+        if micros > self.max:
+            self.max = micros
+
+    def percentile(self, fraction):
+        """
+        Get a latency percentile.
+
+        Args:
+            fraction: Percentile as a fraction, e.g. 0.99
+
+        Returns:
+            Upper bound of the bucket holding the percentile, in milliseconds
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bucket_bounds(index)[1], self.max) / 1000
+        return self.max / 1000
+
+    def clear(self):
+        """Forget every sample."""
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def summary(self):
+        """
+        Summarize the histogram.
+
+        Returns:
+            Dictionary with count, mean, p50, p90, p99 and max in milliseconds
+        """
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count / 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p90_ms': self.percentile(0.90),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.max / 1000,
+        }
+
+    def to_dict(self):
+        """
+        Export the histogram.
+
+        Returns:
+            Summary dictionary plus the non-empty buckets as [low_us, high_us, count]
+        """
+        data = self.summary()
+        data['buckets'] = [[*bucket_bounds(index), count] for index, count in enumerate(self.counts) if count]
+        return data
+
+
+class SnapTracer:
+    """
+    Phase histograms for every snap, plus the last few traces.
+
+    The executor opens a trace per command with begin() and closes it with
+    finish(); the snapper reports phases in between with mark(). Phases
+    marked outside a trace, e.g. when the snapper is driven directly, still
+    reach the histograms. Traces are opened and closed on the executor's
+    worker thread only.
+    """
+
+    def __init__(self, enabled=True, clock=time.perf_counter):
+        """
+        Initialize empty histograms.
+
+        Args:
+            enabled: Record anything at all
+            clock: Callable returning seconds, must match the timestamps passed in
+        """
+        self.enabled = enabled
+        self.clock = clock
+        self.histograms = {phase: LatencyHistogram() for phase in PHASES}
+        self.recent = deque(maxlen=RECENT_TRACES)
+        self.current = None
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def begin(self, action, received):
+        """
+        Open the trace of a command the worker is about to run.
+
+        Args:
+            action: Command action, e.g. 'snap'
+            received: clock() timestamp of when the command was submitted
+        """
+        if not self.enabled:
+            return
+        now = self.clock()
+        self.current = {'action': action, 'received': received, 'phases': {}}
+        self.mark('queue', received, now)
+
+    def mark(self, phase, start, end=None):
+        """
+        Record the duration of one phase.
+
+        Args:
+            phase: Name from PHASES
+            start: clock() timestamp of the start of the phase
+            end: clock() timestamp of the end, defaults to now
+        """
+        if not self.enabled:
+            return
+        elapsed = (self.clock() if end is None else end) - start
+        self.histograms[phase].record(elapsed)
+        trace = self.current
+        if trace is not None:
+            phases = trace['phases']
+            phases[phase] = phases.get(phase, 0.0) + elapsed
+
+    def finish(self, success):
+        """
+        Close the open trace.
+
+        Args:
+            success: Whether the command succeeded
+        """
+        trace = self.current
+        if trace is None:
+            return
+        self.mark('total', trace['received'])
+        self.current = None
+        trace['success'] = success
+        with self._lock:
+            self.recent.append(trace)
+
+    def reset(self):
+        """Forget every sample and trace."""
+        with self._lock:
+            for histogram in self.histograms.values():
+                histogram.clear()
+            self.recent.clear()
+            self.started = time.time()
+
+    def summary(self):
+        """
+        Summarize each phase.
+
+        Returns:
+            Dictionary mapping phase name to its histogram summary
+        """
+        return {phase: histogram.summary() for phase, histogram in self.histograms.items()}
+
+    def export(self):
+        """
+        Export histograms and recent traces.
+
+        Returns:
+            JSON-serializable dictionary
+        """
+        with self._lock:
+            recent = list(self.recent)
+        return {
+            'started': self.started,
+            'exported': time.time(),
+            'phases': {phase: histogram.to_dict() for phase, histogram in self.histograms.items()},
+            'recent': [
+                {
+                    'action': trace['action'],
+                    'success': trace['success'],
+                    'phases_ms': {phase: seconds * 1000 for phase, seconds in trace['phases'].items()},
+                }
+                for trace in recent
+            ],
+        }
+
+    def write_json(self, path):
+        """Write export() to a file."""
+        with open(path, 'w', encoding='utf-8') as trace_file:
+            json.dump(self.export(), trace_file, indent=2)
@@ -0,0 +1,111 @@
+"""
+Diagnostics panel for SnapStack.
+Shows the snap phase latency histograms and exports them as JSON.
+"""
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import (
+    QFileDialog, QHBoxLayout, QHeaderView, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QVBoxLayout, QWidget
+)
+
+from tracing import PHASES
+
+# Table columns and the histogram summary keys they show
+COLUMNS = (
+    ('Count', 'count'),
+    ('p50 ms', 'p50_ms'),
+    ('p90 ms', 'p90_ms'),
+    ('p99 ms', 'p99_ms'),
+    ('Max ms', 'max_ms'),
+)
+
+# Milliseconds between refreshes while the panel is visible
+REFRESH_INTERVAL_MS = 1000
+
+
+class DiagnosticsPanel(QWidget):
+    """Table of snap phase latencies with export and reset buttons."""
+
+    def __init__(self, snapper, executor, parent=None):
+        """
+        Initialize the panel.
+
+        Args:
+            snapper: WindowSnapper whose tracer is shown
+            executor: SnapExecutor whose command counters are shown
+            parent: Optional parent widget
+        """
+        super().__init__(parent)
+        self.snapper = snapper
+        self.executor = executor
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.table = QTableWidget(len(PHASES), len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([label for label, _ in COLUMNS])
+        self.table.setVerticalHeaderLabels([phase.capitalize() for phase in PHASES])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.counters_label = QLabel()
+        layout.addWidget(self.counters_label)
+
+        buttons = QHBoxLayout()
+        export_button = QPushButton("Export JSON...")
+        export_button.clicked.connect(self.on_export)
+        buttons.addWidget(export_button)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.on_reset)
+        buttons.addWidget(reset_button)
+        layout.addLayout(buttons)
+
+        # Histograms are read on a timer, snaps never wait for the panel
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        """Show the current histograms and counters."""
+        summary = self.snapper.tracer.summary()
+        for row, phase in enumerate(PHASES):
+            values = summary[phase]
+            for column, (_, key) in enumerate(COLUMNS):
+                value = values[key]
+                text = str(value) if key == 'count' else f"{value:.2f}"
+                self.table.setItem(row, column, QTableWidgetItem(text))
+
+        stats = self.executor.stats()
+        self.counters_label.setText(
+            f"Commands: {stats['received']} received, {stats['executed']} run, "
+            f"{stats['coalesced']} coalesced, {stats['debounced']} debounced, {stats['noop']} already in place"
+        )
+
+    def on_export(self):
+        """Ask for a file and write the histograms and recent traces to it."""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Snap Trace", "snapstack-trace.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.snapper.tracer.write_json(path)
+        except OSError as e:
+            self.counters_label.setText(f"Failed to export trace: {e}")
+
+    def on_reset(self):
+        """Clear the histograms and counters."""
+        self.snapper.tracer.reset()
+        self.executor.reset_counters()
+        self.refresh()
+
+    def showEvent(self, event):
+        """Start refreshing when the panel becomes visible."""
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        """Stop refreshing while the panel is hidden."""
+        self.timer.stop()
+        super().hideEvent(event)
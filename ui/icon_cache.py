@@ -0,0 +1,132 @@
+"""
+Icon cache for SnapStack.
+Keeps rendered application icons in the user cache directory so they are drawn once per size, pixel ratio and generator version.
+"""
+
+import logging
+import os
+import shutil
+
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QIcon
+
+from config import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Icon shipped with the code, found relative to this file rather than the working directory
+BUNDLED_ICON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'icon.png')
+
+# Logical sizes the tray (16-32) and the window and task switcher (48-256) ask for
+ICON_SIZES = (16, 22, 32, 48, 64, 128, 256)
+
+
+def _ratio_label(ratio):
+    """Format a device pixel ratio for a file name, e.g. 1, 1.5 or 2."""
+    return f"{ratio:g}".replace('.', '_')
+
+
+class IconCache:
+    """
+    Application icons rendered once and reused across launches.
+
+    Entries are PNG files named after their logical size and device pixel
+    ratio, inside a directory per generator version. A new generator
+    version therefore renders fresh files and removes the old directories.
+    Files are handed to QIcon by path, so Qt only decodes the sizes it
+    actually draws.
+    """
+
+    def __init__(self, cache_dir=None, sizes=ICON_SIZES, bundled_icon=BUNDLED_ICON):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory to keep icons in, defaults to <user cache>/icons
+            sizes: Logical icon sizes to provide
+            bundled_icon: Icon file to prefer over generated ones, None to always generate
+        """
+        self.cache_dir = cache_dir or os.path.join(get_cache_dir(), 'icons')
+        self.sizes = tuple(sizes)
+        self.bundled_icon = bundled_icon
+        self.rendered = 0
+
+    def version_dir(self, version):
+        """Get the directory holding the renders of one generator version."""
+        return os.path.join(self.cache_dir, f"v{version}")
+
+    def entry_path(self, version, size, ratio):
+        """Get the cache file of one size and device pixel ratio."""
+        return os.path.join(self.version_dir(version), f"icon_{size}@{_ratio_label(ratio)}x.png")
+
+    def icon(self, ratios=(1.0,)):
+        """
+        Get the application icon for screens with the given pixel ratios.
+
+        Args:
+            ratios: Device pixel ratios of the screens the icon is shown on
+
+        Returns:
+            QIcon, empty if no icon could be loaded or generated
+        """
+        if self.bundled_icon and os.path.exists(self.bundled_icon):
+            return QIcon(self.bundled_icon)
+
+        try:
+            from assets.icon import GENERATOR_VERSION, generate_icon
+        except ImportError:
+            return QIcon()
+
+        ratios = sorted(set(ratios)) or [1.0]
+        icon = QIcon()
+        missing = []
+        for ratio in ratios:
+            for size in self.sizes:
+                path = self.entry_path(GENERATOR_VERSION, size, ratio)
+                if os.path.exists(path):
+                    # Qt picks entries by pixel size, which is what a render at this ratio has
+                    pixels = round(size * ratio)
+                    icon.addFile(path, QSize(pixels, pixels))
+                else:
+                    missing.append((size, ratio, path))
+
+        if missing:
+            self._prune(GENERATOR_VERSION)
+            for size, ratio, path in missing:
+                try:
+                    pixmap = generate_icon(size, device_pixel_ratio=ratio)
+                except Exception as e:
+                    logger.error("Failed to generate icon: %s", e)
+                    continue
+                self.rendered += 1
+                icon.addPixmap(pixmap)
+                self._store(pixmap, path)
+        return icon
+
+    def _store(self, pixmap, path):
+        """Write a render to the cache, a failure only costs a re-render next launch."""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if pixmap.save(temp_path, 'PNG'):
+                # Rename last so a concurrent launch never reads a partial file
+                os.replace(temp_path, path)
+            else:
+                logger.error("Failed to cache icon at %s", path)
+        except OSError as e:
+            logger.error("Failed to cache icon at %s: %s", path, e)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _prune(self, version):
+        """Remove renders of other generator versions."""
+        keep = os.path.basename(self.version_dir(version))
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            if name != keep and name.startswith('v') and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
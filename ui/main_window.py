@@ -3,29 +3,52 @@ Main window UI for SnapStack application.
 Provides the primary interface for the application.
 """
 
+from html import escape
+
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QPushButton, 
-    QLabel, QHBoxLayout, QSystemTrayIcon, QMenu
+    QLabel, QGridLayout, QSystemTrayIcon, QMenu, QInputDialog
 )
-from PySide6.QtCore import Qt, QSize
-from PySide6.QtGui import QIcon, QPixmap, QAction
-import os.path
+from PySide6.QtCore import Qt, QSize, QObject, Signal
+from PySide6.QtGui import QPixmap, QAction, QGuiApplication
 
-# Import icon generator if available
-try:
-    from assets.icon import generate_icon
-    has_icon_generator = True
-except ImportError:
-    has_icon_generator = False
+from snap_executor import (
+    restore_all_command, restore_profile_command, save_profile_command,
+    snap_command, stack_all_command, undo_command
+)
+from hotkeys import format_keys
+from ui.diagnostics_panel import DiagnosticsPanel
+from ui.icon_cache import IconCache
+
+class SnapResultBridge(QObject):
+    """Carries snap results and hotkey rebinds from worker threads to the GUI thread."""
+    
+    result_ready = Signal(object)
+    bindings_changed = Signal(object)
 
 class MainWindow(QMainWindow):
     """Main application window for SnapStack."""
     
-    def __init__(self, snapper, parent=None):
-        """Initialize the main window."""
+    def __init__(self, snapper, executor, hotkeys=None, parent=None):
+        """
+        Initialize the main window.
+        
+        Args:
+            snapper: WindowSnapper providing the layouts
+            executor: SnapExecutor that runs the snap commands
+            hotkeys: Optional HotkeyEngine whose bindings are listed
+            parent: Optional parent widget
+        """
         super(MainWindow, self).__init__(parent)
         
         self.snapper = snapper
+        self.executor = executor
+        self.hotkeys = hotkeys
+        
+        # Results arrive on the executor thread, the queued signal moves them here
+        self.result_bridge = SnapResultBridge()
+        self.result_bridge.result_ready.connect(self.on_snap_result)
+        self.executor.add_listener(self.result_bridge.result_ready.emit)
         self.setWindowTitle("SnapStack")
         self.setMinimumSize(300, 200)
         
@@ -53,66 +76,94 @@ class MainWindow(QMainWindow):
         self.desc_label.setWordWrap(True)
         self.layout.addWidget(self.desc_label)
         
-        # Shortcut info
-        self.shortcuts_label = QLabel(
-            "<b>Keyboard Shortcuts:</b><br>"
-            "• Ctrl + Alt + Up: Snap to top half<br>"
-            "• Ctrl + Alt + Down: Snap to bottom half"
-        )
+        # Shortcut info, rebuilt whenever a config edit rebinds the hotkeys
+        self.shortcuts_label = QLabel()
         self.shortcuts_label.setAlignment(Qt.AlignCenter)
         self.layout.addWidget(self.shortcuts_label)
+        self.update_shortcuts(hotkeys.bindings if hotkeys else {})
+        if hotkeys:
+            self.result_bridge.bindings_changed.connect(self.update_shortcuts)
+            hotkeys.add_listener(self.result_bridge.bindings_changed.emit)
         
-        # Button layout
-        self.button_layout = QHBoxLayout()
-        
-        # Add snap buttons
-        self.snap_top_button = QPushButton("Snap to Top")
-        self.snap_top_button.clicked.connect(self.on_snap_top)
-        self.button_layout.addWidget(self.snap_top_button)
-        
-        self.snap_bottom_button = QPushButton("Snap to Bottom")
-        self.snap_bottom_button.clicked.connect(self.on_snap_bottom)
-        self.button_layout.addWidget(self.snap_bottom_button)
-        
-        self.layout.addLayout(self.button_layout)
+        # Snap buttons, one row per configured layout
+        self.build_layout_buttons()
         
         # Status indicator
         self.status_label = QLabel("Ready")
         self.status_label.setAlignment(Qt.AlignCenter)
         self.layout.addWidget(self.status_label)
         
+        # Snap latency diagnostics, hidden until asked for
+        self.diagnostics_button = QPushButton("Show Diagnostics")
+        self.diagnostics_button.setCheckable(True)
+        self.diagnostics_button.toggled.connect(self.on_toggle_diagnostics)
+        self.layout.addWidget(self.diagnostics_button)
+        self.diagnostics_panel = DiagnosticsPanel(snapper, executor)
+        self.diagnostics_panel.hide()
+        self.layout.addWidget(self.diagnostics_panel)
+        
         # Setup system tray
         self.setup_tray()
     
-    def get_application_icon(self):
-        """Get the application icon from file or generate one."""
-        # Try to load icon from assets
-        icon_path = "assets/icon.png"
-        small_icon_path = "assets/icon_small.png"
+    def build_layout_buttons(self):
+        """Create a row of snap buttons for every configured layout."""
+        self.button_layout = QGridLayout()
+        self.layout_buttons = {}
         
-        # Check if the icon files exist
-        if os.path.exists(icon_path):
-            return QIcon(icon_path)
+        layouts = list(self.snapper.layout_engine.layouts.values())
+        for row, layout in enumerate(layouts):
+            if len(layouts) > 1:
+                self.button_layout.addWidget(QLabel(layout.label), row, 0)
+            for slot, slot_label in enumerate(layout.slots):
+                button = QPushButton(f"Snap to {slot_label}" if layout.name == 'halves' else slot_label)
+                button.clicked.connect(lambda checked=False, name=layout.name, index=slot: self.on_snap(name, index))
+                self.button_layout.addWidget(button, row, slot + 1)
+                self.layout_buttons[(layout.name, slot)] = button
         
-        # If the icon generator is available, generate an icon
-        if has_icon_generator:
+        columns = self.button_layout.columnCount()
+        self.stack_all_button = QPushButton("Stack All Windows")
+        self.stack_all_button.clicked.connect(self.on_stack_all)
+        self.button_layout.addWidget(self.stack_all_button, len(layouts), 0, 1, columns)
+        
+        self.restore_all_button = QPushButton("Restore All Windows")
+        self.restore_all_button.clicked.connect(self.on_restore_all)
+        self.button_layout.addWidget(self.restore_all_button, len(layouts) + 1, 0, 1, columns)
+        
+        self.layout.addLayout(self.button_layout)
+    
+    def describe_command(self, command):
+        """Describe what a hotkey's SnapCommand does, for the shortcut list."""
+        if command.action == 'snap':
             try:
-                # Generate an icon using the provided module
-                pixmap = generate_icon(256)
-                icon = QIcon(pixmap)
-                
-                # Save the generated icon for future use
-                pixmap.save(icon_path)
-                
-                # Also generate a small icon for the system tray
-                small_pixmap = generate_icon(64)
-                small_pixmap.save(small_icon_path)
-                
-                return icon
-            except Exception as e:
-                print(f"Failed to generate icon: {e}")
-        
-        return QIcon()  # Return an empty icon if we couldn't load or generate one
+                layout = self.snapper.layout_engine.get_layout(command.layout)
+                return f"Snap to {layout.slots[command.slot]}"
+            except (KeyError, IndexError):
+                return f"Snap to {command.layout} slot {command.slot}"
+        if command.action in ('save_profile', 'restore_profile'):
+            return f"{command.action.replace('_', ' ').capitalize()} {command.name}"
+        return command.action.replace('_', ' ').capitalize()
+    
+    def update_shortcuts(self, bindings):
+        """
+        List the hotkey bindings in the shortcuts label.
+        
+        Args:
+            bindings: Dictionary from chord sequence to SnapCommand, as in HotkeyEngine.bindings
+        """
+        lines = [
+            f"• {escape(format_keys(sequence))}: {escape(self.describe_command(command))}"
+            for sequence, command in bindings.items()
+        ]
+        self.shortcuts_label.setText(
+            "<b>Keyboard Shortcuts:</b><br>" + ("<br>".join(lines) if lines else "None configured")
+        )
+    
+    def get_application_icon(self):
+        """Get the application icon from the bundled file or the icon cache."""
+        # Render for every pixel ratio in use, e.g. a laptop panel next to a normal monitor
+        screens = QGuiApplication.screens()
+        ratios = [screen.devicePixelRatio() for screen in screens] or [1.0]
+        return IconCache().icon(ratios)
     
     def setup_tray(self):
         """Setup the system tray icon and menu."""
@@ -125,14 +176,33 @@ class MainWindow(QMainWindow):
         # Create the tray menu
         tray_menu = QMenu()
         
-        # Add actions
-        snap_top_action = QAction("Snap to Top", self)
-        snap_top_action.triggered.connect(self.on_snap_top)
-        tray_menu.addAction(snap_top_action)
+        # Add snap actions, with layouts other than halves in submenus
+        for layout in self.snapper.layout_engine.layouts.values():
+            if layout.name == 'halves':
+                menu = tray_menu
+            else:
+                menu = tray_menu.addMenu(layout.label)
+            for slot, slot_label in enumerate(layout.slots):
+                action = QAction(f"Snap to {slot_label}", self)
+                action.triggered.connect(lambda checked=False, name=layout.name, index=slot: self.on_snap(name, index))
+                menu.addAction(action)
         
-        snap_bottom_action = QAction("Snap to Bottom", self)
-        snap_bottom_action.triggered.connect(self.on_snap_bottom)
-        tray_menu.addAction(snap_bottom_action)
+        stack_all_action = QAction("Stack All Windows", self)
+        stack_all_action.triggered.connect(self.on_stack_all)
+        tray_menu.addAction(stack_all_action)
+        
+        undo_action = QAction("Undo Last Snap", self)
+        undo_action.triggered.connect(self.on_undo)
+        tray_menu.addAction(undo_action)
+        
+        restore_all_action = QAction("Restore All Windows", self)
+        restore_all_action.triggered.connect(self.on_restore_all)
+        tray_menu.addAction(restore_all_action)
+        
+        # Saved profiles, listed afresh each time the submenu opens
+        self.profiles_menu = tray_menu.addMenu("Profiles")
+        self.profiles_menu.aboutToShow.connect(self.build_profiles_menu)
+        self.build_profiles_menu()
         
         tray_menu.addSeparator()
         
@@ -150,15 +220,87 @@ class MainWindow(QMainWindow):
         # Enable the tray icon
         self.tray_icon.show()
     
-    def on_snap_top(self):
-        """Handle snap to top button click."""
-        result = self.snapper.snap_to_top()
-        self.update_status(result, "top")
+    def build_profiles_menu(self):
+        """Fill the profiles submenu with the saved profiles and the save action."""
+        self.profiles_menu.clear()
+        names = self.snapper.profiles.names()
+        for name in names:
+            action = QAction(name, self.profiles_menu)
+            action.triggered.connect(lambda checked=False, profile=name: self.on_restore_profile(profile))
+            self.profiles_menu.addAction(action)
+        if names:
+            self.profiles_menu.addSeparator()
+        
+        save_action = QAction("Save Current Layout...", self.profiles_menu)
+        save_action.triggered.connect(self.on_save_profile)
+        self.profiles_menu.addAction(save_action)
     
-    def on_snap_bottom(self):
-        """Handle snap to bottom button click."""
-        result = self.snapper.snap_to_bottom()
-        self.update_status(result, "bottom")
+    def on_toggle_diagnostics(self, checked):
+        """Show or hide the diagnostics panel."""
+        self.diagnostics_panel.setVisible(checked)
+        self.diagnostics_button.setText("Hide Diagnostics" if checked else "Show Diagnostics")
+    
+    def on_snap(self, layout_name, slot):
+        """Handle a snap button click or tray action."""
+        self.executor.submit(snap_command(layout_name, slot))
+    
+    def on_stack_all(self):
+        """Handle the stack all button click or tray action."""
+        self.executor.submit(stack_all_command())
+    
+    def on_undo(self):
+        """Handle the undo tray action."""
+        self.executor.submit(undo_command())
+    
+    def on_restore_all(self):
+        """Handle the restore all button click or tray action."""
+        self.executor.submit(restore_all_command())
+    
+    def on_save_profile(self):
+        """Ask for a profile name and save the current window arrangement under it."""
+        name, ok = QInputDialog.getText(self, "Save Profile", "Profile name:")
+        name = name.strip()
+        if ok and name:
+            self.executor.submit(save_profile_command(name))
+    
+    def on_restore_profile(self, name):
+        """Handle a profile tray action."""
+        self.executor.submit(restore_profile_command(name))
+    
+    def on_snap_result(self, result):
+        """Show the outcome of a snap command, whether it came from the UI or a hotkey."""
+        command = result.command
+        if command.action == 'stack_all':
+            if result.value:
+                self.status_label.setText(f"Stacked {result.value} windows")
+            else:
+                self.status_label.setText("No windows to stack")
+        elif command.action == 'snap':
+            try:
+                slot_label = self.snapper.layout_engine.get_layout(command.layout).slots[command.slot]
+            except (KeyError, IndexError):
+                slot_label = f"{command.layout} slot {command.slot}"
+            self.update_status(result.success, slot_label.lower())
+        elif command.action in ('undo', 'redo'):
+            if result.success:
+                self.status_label.setText(f"Window {'restored' if command.action == 'undo' else 'snapped again'}")
+            else:
+                self.status_label.setText(f"Nothing to {command.action}")
+        elif command.action == 'restore_all':
+            if result.value:
+                self.status_label.setText(f"Restored {result.value} windows")
+            else:
+                self.status_label.setText("No windows to restore")
+        elif command.action == 'save_profile':
+            if result.value:
+                self.status_label.setText(f"Saved {result.value} windows as {command.name}")
+            else:
+                self.status_label.setText(f"Failed to save profile {command.name}")
+        elif command.action == 'restore_profile':
+            if result.value:
+                self.status_label.setText(f"Placed {result.value} windows from {command.name}")
+            else:
+                self.status_label.setText(f"No windows match profile {command.name}")
     
     def update_status(self, success, position):
         """Update the status label based on operation success."""
@@ -0,0 +1,68 @@
+"""
+Drag snap preview for SnapStack.
+Shows where a dragged window will go while it is held over a monitor edge.
+"""
+
+from PySide6.QtCore import QObject, QRect, Qt, Signal
+from PySide6.QtGui import QColor, QPainter
+from PySide6.QtWidgets import QWidget
+
+# Fill and outline of the preview, drawn over whatever is below it
+FILL_COLOR = QColor(64, 128, 255, 60)
+OUTLINE_COLOR = QColor(64, 128, 255, 200)
+
+
+class SnapPreviewBridge(QObject):
+    """Carries zone changes from the backend's event thread to the GUI thread."""
+
+    zone_changed = Signal(object)
+
+
+class SnapPreview(QWidget):
+    """
+    Translucent overlay covering the slot a drop would snap into.
+
+    Passed to DragSnapper as its preview. show_zone() and hide_zone() may
+    be called from any thread; the queued signal applies them on the GUI
+    thread. The overlay never takes focus or mouse input, so the drag goes
+    on under it.
+    """
+
+    def __init__(self, parent=None):
+        """
+        Initialize the hidden overlay.
+
+        Args:
+            parent: Optional parent widget
+        """
+        flags = Qt.Tool | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.WindowTransparentForInput
+        super().__init__(parent, flags)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.bridge = SnapPreviewBridge()
+        self.bridge.zone_changed.connect(self.on_zone_changed)
+
+    def show_zone(self, zone):
+        """Show the overlay over a zone's slot, from any thread."""
+        self.bridge.zone_changed.emit(zone)
+
+    def hide_zone(self):
+        """Hide the overlay, from any thread."""
+        self.bridge.zone_changed.emit(None)
+
+    def on_zone_changed(self, zone):
+        """Move the overlay to the new zone, or hide it."""
+        if zone is None:
+            self.hide()
+            return
+        # Qt places windows in logical pixels
+        x, y, width, height = zone.monitor.to_logical(zone.rect)
+        self.setGeometry(QRect(x, y, width, height))
+        self.show()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(OUTLINE_COLOR)
+        painter.setBrush(FILL_COLOR)
+        painter.drawRoundedRect(self.rect().adjusted(1, 1, -2, -2), 6, 6)
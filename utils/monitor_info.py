@@ -3,8 +3,12 @@ Monitor information utility module for SnapStack.
 Provides functions to get screen dimensions and monitor information.
 """
 
+import logging
 import platform
-from screeninfo import get_monitors
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
 
 def get_screen_info():
     """
@@ -14,20 +18,25 @@ def get_screen_info():
         List of monitor objects containing dimensions and position
     """
     try:
+        from screeninfo import get_monitors
         monitors = get_monitors()
         return monitors
     except Exception as e:
-        print(f"Error getting monitor info: {e}")
+        logger.error("Error getting monitor info: %s", e)
         return []
 
-def get_primary_monitor():
+def get_primary_monitor(monitors=None):
     """
     Get information about the primary monitor.
     
+    Args:
+        monitors: Optional list of monitors to choose from, defaults to all connected ones
+    
     Returns:
         Monitor object for the primary display or the first available monitor
     """
-    monitors = get_screen_info()
+    if monitors is None:
+        monitors = get_screen_info()
     
     # Try to find primary monitor
     for monitor in monitors:
@@ -58,4 +67,423 @@ def is_supported_platform():
         Boolean: True if supported, False otherwise
     """
     system = get_system_platform()
-    return system in ['Windows', 'Darwin', 'Linux'] 
\ No newline at end of file
+    return system in ['Windows', 'Darwin', 'Linux'] 
+
+# Rectangle in screen coordinates
+Rect = namedtuple('Rect', ['x', 'y', 'width', 'height'])
+
+def intersect_rects(first, second):
+    """
+    Get the overlapping part of two rectangles.
+    
+    Returns:
+        Rect of the overlap, or None if the rectangles do not overlap
+    """
+    left = max(first.x, second.x)
+    top = max(first.y, second.y)
+    right = min(first.x + first.width, second.x + second.width)
+    bottom = min(first.y + first.height, second.y + second.height)
+    if right <= left or bottom <= top:
+        return None
+    return Rect(left, top, right - left, bottom - top)
+
+# Coordinate spaces a backend can position windows in: device pixels, or
+# pixels divided by the monitor's scale factor (points on macOS)
+PHYSICAL = 'physical'
+LOGICAL = 'logical'
+
+def scale_rect(rect, origin_x, origin_y, factor):
+    """
+    Scale a rectangle about an origin, keeping the origin in place.
+    
+    Edges are rounded rather than sizes, so neighbouring rectangles stay
+    adjacent after scaling.
+    
+    Args:
+        rect: Rect to scale
+        origin_x: X coordinate that stays in place, usually the monitor's left edge
+        origin_y: Y coordinate that stays in place, usually the monitor's top edge
+        factor: Scale factor
+    
+    Returns:
+        Scaled Rect
+    """
+    left = origin_x + round((rect.x - origin_x) * factor)
+    top = origin_y + round((rect.y - origin_y) * factor)
+    right = origin_x + round((rect.x + rect.width - origin_x) * factor)
+    bottom = origin_y + round((rect.y + rect.height - origin_y) * factor)
+    return Rect(left, top, right - left, bottom - top)
+
+class MonitorInfo:
+    """
+    Cached geometry of one monitor.
+    
+    `rect` and `work_area` are in the coordinates the backend positions
+    windows in, so slot geometry computed from them goes to the window
+    system as is. The physical and logical variants and the scale factor
+    are derived once per topology change; a monitor's logical rectangle
+    keeps its physical top-left corner, as on Windows with per-monitor
+    DPI awareness.
+    """
+    
+    __slots__ = (
+        'index', 'name', 'rect', 'work_area', 'is_primary', 'scale', 'space',
+        'physical_rect', 'physical_work_area', 'logical_rect', 'logical_work_area',
+    )
+    
+    def __init__(self, index, name, rect, work_area, is_primary, scale=1.0, space=PHYSICAL):
+        """
+        Initialize the monitor and derive its physical and logical geometry.
+        
+        Args:
+            index: Position in the topology
+            name: Output name, or None
+            rect: Monitor bounds in backend coordinates
+            work_area: Bounds without taskbars, docks and panels, in backend coordinates
+            is_primary: Whether this is the primary monitor
+            scale: Device pixels per logical pixel, e.g. 1.5 for 150%
+            space: PHYSICAL or LOGICAL, the coordinates of rect and work_area
+        """
+        self.index = index
+        self.name = name
+        self.rect = rect
+        self.work_area = work_area
+        self.is_primary = is_primary
+        self.scale = scale
+        self.space = space
+        
+        factor = 1 / scale if space == PHYSICAL else scale
+        other_rect = scale_rect(rect, rect.x, rect.y, factor)
+        other_work_area = scale_rect(work_area, rect.x, rect.y, factor)
+        if space == PHYSICAL:
+            self.physical_rect, self.physical_work_area = rect, work_area
+            self.logical_rect, self.logical_work_area = other_rect, other_work_area
+        else:
+            self.logical_rect, self.logical_work_area = rect, work_area
+            self.physical_rect, self.physical_work_area = other_rect, other_work_area
+    
+    def native_length(self, length):
+        """Convert a length in logical pixels, e.g. a configured gap, to backend coordinates."""
+        return round(length * self.scale) if self.space == PHYSICAL else length
+    
+    def to_logical(self, rect):
+        """Convert a Rect on this monitor from backend to logical coordinates."""
+        if self.space == LOGICAL:
+            return rect
+        return scale_rect(rect, self.rect.x, self.rect.y, 1 / self.scale)
+    
+    def from_logical(self, rect):
+        """Convert a Rect on this monitor from logical to backend coordinates."""
+        if self.space == LOGICAL:
+            return rect
+        return scale_rect(rect, self.rect.x, self.rect.y, self.scale)
+    
+    # Full monitor bounds, matching the attributes of screeninfo monitors
+    @property
+    def x(self):
+        return self.rect.x
+    
+    @property
+    def y(self):
+        return self.rect.y
+    
+    @property
+    def width(self):
+        return self.rect.width
+    
+    @property
+    def height(self):
+        return self.rect.height
+    
+    def __repr__(self):
+        return (
+            f"MonitorInfo(index={self.index}, name={self.name!r}, rect={self.rect}, "
+            f"work_area={self.work_area}, scale={self.scale})"
+        )
+
+def overlap_area(first, second):
+    """Get the area shared by two rectangles, 0 if they do not overlap."""
+    width = min(first.x + first.width, second.x + second.width) - max(first.x, second.x)
+    height = min(first.y + first.height, second.y + second.height) - max(first.y, second.y)
+    if width <= 0 or height <= 0:
+        return 0
+    return width * height
+
+class MonitorIndex:
+    """
+    Uniform grid index over monitor rectangles.
+    
+    The grid cell is as large as the smallest monitor, so every cell
+    overlaps only a handful of monitors and a lookup touches the same
+    small number of candidates however many displays are connected.
+    """
+    
+    # Windows covering more cells than this are resolved from their center
+    MAX_CELLS_PER_LOOKUP = 16
+    
+    def __init__(self, monitors):
+        """
+        Build the index.
+        
+        Args:
+            monitors: Sequence of MonitorInfo
+        """
+        self.monitors = tuple(monitors)
+        self.cells = {}
+        if not self.monitors:
+            self.cell_width = self.cell_height = 1
+            return
+        
+        self.cell_width = max(1, min(monitor.rect.width for monitor in self.monitors))
+        self.cell_height = max(1, min(monitor.rect.height for monitor in self.monitors))
+        for monitor in self.monitors:
+            rect = monitor.rect
+            for cell in self._cells_for(rect):
+                self.cells.setdefault(cell, []).append(monitor)
+        
+        # Freeze the buckets so lookups never see a half-built list
+        self.cells = {cell: tuple(bucket) for cell, bucket in self.cells.items()}
+    
+    def _cell_range(self, rect):
+        """Get the inclusive cell column and row bounds covered by a rectangle."""
+        first_column = rect.x // self.cell_width
+        first_row = rect.y // self.cell_height
+        last_column = (rect.x + max(rect.width, 1) - 1) // self.cell_width
+        last_row = (rect.y + max(rect.height, 1) - 1) // self.cell_height
+        return first_column, first_row, last_column, last_row
+    
+    def _cells_for(self, rect):
+        """Yield every cell covered by a rectangle."""
+        first_column, first_row, last_column, last_row = self._cell_range(rect)
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                yield (column, row)
+    
+    def monitor_at(self, x, y):
+        """
+        Get the monitor containing a point.
+        
+        Returns:
+            MonitorInfo or None if the point is outside every monitor
+        """
+        for monitor in self.cells.get((x // self.cell_width, y // self.cell_height), ()):
+            rect = monitor.rect
+            if rect.x <= x < rect.x + rect.width and rect.y <= y < rect.y + rect.height:
+                return monitor
+        return None
+    
+    def monitor_for_rect(self, rect):
+        """
+        Get the monitor a window belongs to.
+        
+        Args:
+            rect: Window rectangle with x, y, width and height
+        
+        Returns:
+            MonitorInfo with the largest overlap, the nearest monitor if the
+            window is off screen, or None if there are no monitors
+        """
+        if not self.monitors:
+            return None
+        
+        center_x = rect.x + rect.width // 2
+        center_y = rect.y + rect.height // 2
+        first_column, first_row, last_column, last_row = self._cell_range(rect)
+        cell_count = (last_column - first_column + 1) * (last_row - first_row + 1)
+        
+        if cell_count > self.MAX_CELLS_PER_LOOKUP:
+            candidates = self.cells.get((center_x // self.cell_width, center_y // self.cell_height), ())
+        else:
+            candidates = set()
+            for cell in self._cells_for(rect):
+                candidates.update(self.cells.get(cell, ()))
+        
+        best = None
+        best_area = 0
+        for monitor in candidates:
+            area = overlap_area(monitor.rect, rect)
+            if area > best_area or (area == best_area and area and monitor.index < best.index):
+                best = monitor
+                best_area = area
+        if best is not None:
+            return best
+        
+        # Off-screen window, fall back to the monitor whose center is closest
+        return min(
+            self.monitors,
+            key=lambda monitor: (
+                (monitor.rect.x + monitor.rect.width // 2 - center_x) ** 2
+                + (monitor.rect.y + monitor.rect.height // 2 - center_y) ** 2
+            ),
+        )
+
+class MonitorTopology:
+    """
+    Cache of the monitor layout and work areas.
+    
+    The layout is read from the system once and then served from memory
+    until invalidate() is called, typically from Qt screen change signals.
+    Each rebuild increments `generation` so dependent caches can tell
+    when they are stale. Scale factors are read in the same rebuild, so a
+    snap never queries DPI.
+    """
+    
+    def __init__(self, monitor_source=None, work_area_source=None, token_source=None,
+                 scale_source=None, coordinate_space=PHYSICAL):
+        """
+        Initialize an empty topology cache.
+        
+        Args:
+            monitor_source: Callable returning monitor objects, defaults to get_screen_info
+            work_area_source: Optional callable mapping the monitors to their work area Rects
+            token_source: Optional callable returning a cheap value that changes
+                whenever the display configuration does
+            scale_source: Optional callable mapping the monitors to their scale factors
+            coordinate_space: PHYSICAL or LOGICAL, the coordinates the monitor sources report
+        """
+        self.monitor_source = monitor_source or get_screen_info
+        self.work_area_source = work_area_source
+        self.token_source = token_source
+        self.scale_source = scale_source
+        self.coordinate_space = coordinate_space
+        self.generation = 0
+        self._monitors = ()
+        self._primary = None
+        self._index = MonitorIndex(())
+        self._stale = True
+        self._token = None
+        self._lock = threading.Lock()
+        self._qt_screens = set()
+    
+    @property
+    def monitors(self):
+        """Tuple of MonitorInfo for every connected monitor."""
+        # Until the first rebuild finishes there is nothing to serve, so
+        # wait for it rather than return the empty initial state
+        if self._stale or not self.generation:
+            self.rebuild()
+        return self._monitors
+    
+    @property
+    def primary(self):
+        """MonitorInfo of the primary monitor, or None if there are no monitors."""
+        if self._stale or not self.generation:
+            self.rebuild()
+        return self._primary
+    
+    @property
+    def index(self):
+        """MonitorIndex over the current monitors."""
+        if self._stale or not self.generation:
+            self.rebuild()
+        return self._index
+    
+    def monitor_for_rect(self, rect):
+        """
+        Get the monitor containing, or mostly overlapping, a rectangle.
+        
+        Returns:
+            MonitorInfo, falling back to the primary monitor
+        """
+        return self.index.monitor_for_rect(rect) or self._primary
+    
+    def invalidate(self, *args):
+        """Mark the cache stale so the next read rebuilds it. Safe to call from any thread."""
+        self._stale = True
+    
+    def check(self):
+        """
+        Invalidate the cache if the configuration token has changed.
+        
+        Returns:
+            Boolean: True if the topology was invalidated
+        """
+        if self.token_source is None:
+            return False
+        try:
+            token = self.token_source()
+        except Exception as e:
+            logger.error("Error checking monitor configuration: %s", e)
+            return False
+        if token != self._token:
+            self._token = token
+            self.invalidate()
+            return True
+        return False
+    
+    def rebuild(self):
+        """Read the monitor layout and work areas from the system."""
+        with self._lock:
+            if not self._stale:
+                return
+            # Clear the flag first so a change during the rebuild is not lost
+            self._stale = False
+            
+            try:
+                raw_monitors = list(self.monitor_source())
+            except Exception as e:
+                logger.error("Error getting monitor info: %s", e)
+                raw_monitors = []
+            
+            work_areas = None
+            if self.work_area_source and raw_monitors:
+                try:
+                    work_areas = self.work_area_source(raw_monitors)
+                except Exception as e:
+                    logger.error("Error getting monitor work areas: %s", e)
+            
+            scales = None
+            if self.scale_source and raw_monitors:
+                try:
+                    scales = self.scale_source(raw_monitors)
+                except Exception as e:
+                    logger.error("Error getting monitor scale factors: %s", e)
+            
+            primary = get_primary_monitor(raw_monitors)
+            monitors = []
+            for index, monitor in enumerate(raw_monitors):
+                rect = Rect(monitor.x, monitor.y, monitor.width, monitor.height)
+                work_area = work_areas[index] if work_areas else None
+                scale = scales[index] if scales else None
+                monitors.append(MonitorInfo(
+                    index,
+                    getattr(monitor, 'name', None),
+                    rect,
+                    work_area or rect,
+                    monitor is primary,
+                    scale if scale and scale > 0 else 1.0,
+                    self.coordinate_space,
+                ))
+            
+            self._monitors = tuple(monitors)
+            self._primary = next((monitor for monitor in monitors if monitor.is_primary), None)
+            self._index = MonitorIndex(monitors)
+            self.generation += 1
+    
+    def attach_qt(self, app):
+        """
+        Invalidate the cache whenever Qt reports a display change.
+        
+        Args:
+            app: The running QGuiApplication or QApplication
+        """
+        app.screenAdded.connect(self._on_qt_screen_added)
+        app.screenRemoved.connect(self.invalidate)
+        app.primaryScreenChanged.connect(self.invalidate)
+        for screen in app.screens():
+            self._watch_qt_screen(screen)
+    
+    def _watch_qt_screen(self, screen):
+        """Connect the change signals of one QScreen."""
+        if screen in self._qt_screens:
+            return
+        self._qt_screens.add(screen)
+        screen.geometryChanged.connect(self.invalidate)
+        screen.availableGeometryChanged.connect(self.invalidate)
+        screen.logicalDotsPerInchChanged.connect(self.invalidate)
+        screen.destroyed.connect(lambda *args, screen=screen: self._qt_screens.discard(screen))
+    
+    def _on_qt_screen_added(self, screen):
+        """Start watching a newly connected screen."""
+        self._watch_qt_screen(screen)
+        self.invalidate()
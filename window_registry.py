@@ -0,0 +1,277 @@
+"""
+Window registry for SnapStack.
+Tracks windows, focus and geometry from window system events so snaps can read them from memory.
+"""
+
+import logging
+import sys
+import threading
+import time
+
+from backends.base import Geometry
+
+logger = logging.getLogger(__name__)
+
+
+class WindowRecord:
+    """Compact state of one tracked window."""
+
+    __slots__ = ('key', 'window', 'x', 'y', 'width', 'height', 'updated')
+
+    def __init__(self, key, window, geometry=None, updated=0.0):
+        self.key = key
+        self.window = window
+        self.updated = updated
+        if geometry is None:
+            self.x = self.y = self.width = self.height = None
+        else:
+            self.x, self.y, self.width, self.height = geometry
+
+    @property
+    def geometry(self):
+        """Geometry of the window, or None if it has not been reported yet."""
+        if self.width is None:
+            return None
+        return Geometry(self.x, self.y, self.width, self.height)
+
+    def __repr__(self):
+        return f"WindowRecord(key={self.key!r}, geometry={self.geometry})"
+
+
+class WindowRegistry:
+    """
+    In-memory view of the desktop kept current by backend events.
+
+    The backend calls on_created, on_destroyed, on_focus and on_moved as
+    windows change, and on_move_start, on_drag and on_move_end while the
+    user drags one, which are passed on to the drag listeners. While the registry is live, the active window and
+    window geometry are answered without any native call. If the backend
+    cannot deliver events the registry stays inactive and callers fall back
+    to querying the backend directly.
+    """
+
+    def __init__(self, backend):
+        """
+        Initialize an empty registry.
+
+        Args:
+            backend: WindowBackend that supplies the events
+        """
+        self.backend = backend
+        self.records = {}
+        self.active_key = None
+        self.live = False
+        self.events_processed = 0
+        self.last_event_time = None
+        self.last_sync_time = None
+        self.creation_listeners = []
+        self.removal_listeners = []
+        self.drag_listeners = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Subscribe to backend events and load the current windows.
+
+        Returns:
+            Boolean: True if the backend delivers events and the registry is live
+        """
+        try:
+            self.live = bool(self.backend.watch_windows(self))
+        except Exception as e:
+            logger.error("Error watching window events: %s", e)
+            self.live = False
+
+        if self.live:
+            self.sync()
+        return self.live
+
+    def stop(self):
+        """Unsubscribe from backend events."""
+        if self.live:
+            self.live = False
+            self.backend.unwatch_windows()
+
+    def sync(self):
+        """Replace the tracked state with a full scan of the backend."""
+        try:
+            windows = self.backend.enumerate_window_geometries()
+            active = self.backend.get_active_window()
+        except Exception as e:
+            logger.error("Error scanning windows: %s", e)
+            return
+
+        now = time.monotonic()
+        key_of = self.backend.window_key
+        records = {}
+        for window, geometry in windows:
+            key = key_of(window)
+            records[key] = WindowRecord(key, window, geometry, now)
+
+        active_key = None
+        if active is not None:
+            active_key = key_of(active)
+            if active_key not in records:
+                records[active_key] = WindowRecord(active_key, active, None, now)
+
+        with self._lock:
+            removed = [key for key in self.records if key not in records]
+            self.records = records
+            self.active_key = active_key
+            self.last_sync_time = now
+        self._notify_removed(removed)
+
+    def _notify_created(self, window):
+        """Tell the creation listeners about a window that appeared."""
+        for listener in self.creation_listeners:
+            try:
+                listener(window)
+            except Exception as e:
+                logger.error("Error handling new window: %s", e)
+
+    def _notify_removed(self, keys):
+        """Tell the removal listeners about windows that are gone."""
+        for key in keys:
+            for listener in self.removal_listeners:
+                try:
+                    listener(key)
+                except Exception as e:
+                    logger.error("Error handling closed window: %s", e)
+
+    def _touch(self):
+        """Update the event counters. Must be called with the lock held."""
+        self.events_processed += 1
+        self.last_event_time = time.monotonic()
+
+    def on_created(self, window, geometry=None):
+        """Handle a new top-level window."""
+        key = self.backend.window_key(window)
+        with self._lock:
+            self._touch()
+            self.records[key] = WindowRecord(key, window, geometry, self.last_event_time)
+        self._notify_created(window)
+
+    def on_destroyed(self, window):
+        """Handle a window that was closed or hidden."""
+        key = self.backend.window_key(window)
+        with self._lock:
+            self._touch()
+            self.records.pop(key, None)
+            if self.active_key == key:
+                self.active_key = None
+        self._notify_removed([key])
+
+    def on_focus(self, window):
+        """Handle a change of the active window, None when nothing has focus."""
+        with self._lock:
+            self._touch()
+            if window is None:
+                self.active_key = None
+                return
+            key = self.backend.window_key(window)
+            if key not in self.records:
+                self.records[key] = WindowRecord(key, window, None, self.last_event_time)
+            self.active_key = key
+
+    def on_moved(self, window, geometry):
+        """Handle a tracked window being moved or resized."""
+        key = self.backend.window_key(window)
+        with self._lock:
+            self._touch()
+            record = self.records.get(key)
+            if record is None:
+                return
+            record.x, record.y, record.width, record.height = geometry
+            record.updated = self.last_event_time
+
+    def _notify_drag(self, method, window, x, y):
+        """Forward one step of a user drag to the drag listeners."""
+        for listener in self.drag_listeners:
+            try:
+                getattr(listener, method)(window, x, y)
+            except Exception as e:
+                logger.error("Error handling window drag: %s", e)
+
+    def on_move_start(self, window, x, y):
+        """Handle the user starting to drag a window, with the pointer at (x, y)."""
+        self._notify_drag('on_move_start', window, x, y)
+
+    def on_drag(self, window, x, y):
+        """Handle the pointer moving to (x, y) while a window is dragged."""
+        self._notify_drag('on_drag', window, x, y)
+
+    def on_move_end(self, window, x, y):
+        """Handle the user dropping a dragged window, with the pointer at (x, y)."""
+        self._notify_drag('on_move_end', window, x, y)
+
+    def record_geometries(self, changes):
+        """
+        Store geometry the snapper has just applied, ahead of the backend's own events.
+
+        Args:
+            changes: List of (window, x, y, width, height) tuples as committed
+        """
+        key_of = self.backend.window_key
+        now = time.monotonic()
+        with self._lock:
+            for window, x, y, width, height in changes:
+                record = self.records.get(key_of(window))
+                if record is None:
+                    continue
+                if x is not None:
+                    record.x, record.y = x, y
+                if width is not None:
+                    record.width, record.height = width, height
+                record.updated = now
+
+    def active_window(self):
+        """
+        Get the active window from memory.
+
+        Returns:
+            Window object, or None if no tracked window has focus
+        """
+        record = self.records.get(self.active_key)
+        return record.window if record else None
+
+    def geometry(self, window):
+        """
+        Get the last known geometry of a window.
+
+        Returns:
+            Geometry, or None if the window is unknown or was never measured
+        """
+        record = self.records.get(self.backend.window_key(window))
+        return record.geometry if record else None
+
+    def snapshot(self):
+        """
+        Get a consistent copy of the tracked windows.
+
+        Returns:
+            Tuple of (list of WindowRecord, key of the active window or None)
+        """
+        with self._lock:
+            return list(self.records.values()), self.active_key
+
+    def diagnostics(self):
+        """
+        Describe the registry state for troubleshooting.
+
+        Returns:
+            Dictionary with tracked window count, approximate memory use in
+            bytes, event count and seconds since the last event and sync
+        """
+        now = time.monotonic()
+        with self._lock:
+            records = list(self.records.values())
+        memory = sys.getsizeof(self.records) + sum(sys.getsizeof(record) for record in records)
+        return {
+            'live': self.live,
+            'windows': len(records),
+            'memory_bytes': memory,
+            'bytes_per_window': memory / len(records) if records else 0,
+            'events_processed': self.events_processed,
+            'seconds_since_event': None if self.last_event_time is None else now - self.last_event_time,
+            'seconds_since_sync': None if self.last_sync_time is None else now - self.last_sync_time,
+        }
@@ -0,0 +1,297 @@
+"""
+Window rules for SnapStack.
+Snaps new windows automatically by matching their title, application, process and monitor against configured rules.
+"""
+
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+def _values(data, field):
+    """Read a rule field that may be one value or a list of them."""
+    value = data.get(field)
+    if value is None:
+        return ()
+    values = value if isinstance(value, (list, tuple)) else [value]
+    if field == 'monitor':
+        return tuple(int(item) for item in values)
+    return tuple(str(item).lower() for item in values if str(item))
+
+
+class WindowRule:
+    """
+    Where to snap windows that match a set of criteria.
+
+    Every given criterion must match; a criterion with several values
+    matches if any of them does. Titles match case-insensitively anywhere
+    in the window title, applications and processes match the whole name
+    case-insensitively and monitors match by index.
+    """
+
+    def __init__(self, name, layout, slot, title=(), app=(), process=(), monitor=()):
+        """
+        Initialize a rule.
+
+        Args:
+            name: Name used in diagnostics
+            layout: Name of the layout to snap into
+            slot: Index of the slot, top to bottom
+            title: Lower-case substrings of the window title
+            app: Lower-case application or window class names
+            process: Lower-case executable names
+            monitor: Indices of the monitors the window may appear on
+        """
+        if not (title or app or process or monitor):
+            raise ValueError(f"Rule {name!r} needs at least one of title, app, process or monitor")
+
+        self.name = name
+        self.layout = layout
+        self.slot = int(slot)
+        self.title = tuple(title)
+        self.app = tuple(app)
+        self.process = tuple(process)
+        self.monitor = tuple(monitor)
+
+    @property
+    def criteria(self):
+        """Number of criteria that must all match."""
+        return sum(1 for values in (self.title, self.app, self.process, self.monitor) if values)
+
+    @classmethod
+    def from_dict(cls, data, name=None):
+        """
+        Create a rule from its config file representation.
+
+        Args:
+            data: Dictionary with layout, slot and any of title, app, process
+                and monitor, each one value or a list
+            name: Name to use when the dictionary has none
+
+        Returns:
+            WindowRule instance
+        """
+        return cls(
+            data.get('name') or name or f"{data['layout']} {data['slot']}",
+            data['layout'],
+            data['slot'],
+            _values(data, 'title'),
+            _values(data, 'app'),
+            _values(data, 'process'),
+            _values(data, 'monitor'),
+        )
+
+    def matches(self, info, monitor=None):
+        """
+        Check this rule alone against a window.
+
+        Args:
+            info: WindowInfo of the window
+            monitor: Index of the monitor the window is on, or None if unknown
+
+        Returns:
+            Boolean: True if every criterion matches
+        """
+        if self.title:
+            title = info.title.lower()
+            if not any(pattern in title for pattern in self.title):
+                return False
+        if self.app and info.app.lower() not in self.app:
+            return False
+        if self.process and info.process.lower() not in self.process:
+            return False
+        if self.monitor and monitor not in self.monitor:
+            return False
+        return True
+
+    def __repr__(self):
+        return f"WindowRule(name={self.name!r}, layout={self.layout!r}, slot={self.slot})"
+
+
+def load_rules(definitions=None):
+    """
+    Build rules from config definitions.
+
+    Invalid definitions are reported and skipped.
+
+    Args:
+        definitions: List of rule dictionaries
+
+    Returns:
+        List of WindowRule, in config order
+    """
+    rules = []
+    for index, data in enumerate(definitions or ()):
+        try:
+            rules.append(WindowRule.from_dict(data, f"rule {index + 1}"))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.warning("Skipping invalid rule %r: %s", data, e)
+    return rules
+
+
+class SubstringAutomaton:
+    """
+    Aho-Corasick automaton finding every pattern contained in a text.
+
+    A search reads the text once, so its cost depends on the length of
+    the text and the number of hits, not on the number of patterns.
+    """
+
+    def __init__(self, patterns):
+        """
+        Build the automaton.
+
+        Args:
+            patterns: Iterable of (pattern, value) pairs; a search returns
+                the values of the patterns it finds
+        """
+        self.goto = [{}]
+        self.outputs = [set()]
+        for pattern, value in patterns:
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = self.goto[state][char] = len(self.goto)
+                    self.goto.append({})
+                    self.outputs.append(set())
+                state = next_state
+            self.outputs[state].add(value)
+
+        # Breadth-first, so every failure target is complete before it is used
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.outputs[next_state] |= self.outputs[self.fail[next_state]]
+        self.outputs = [frozenset(values) for values in self.outputs]
+
+    def __len__(self):
+        return len(self.goto)
+
+    def search(self, text):
+        """
+        Find the patterns contained in a text.
+
+        Returns:
+            Set of the values of every pattern found
+        """
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
+
+
+class RuleEngine:
+    """
+    Rules compiled into one combined matcher.
+
+    Title patterns share one substring automaton and applications and
+    processes are dictionaries from name to rules, so matching a window
+    costs a pass over its title and two lookups however many rules there
+    are. Each of those criteria that matches adds one vote for its rules,
+    and a rule is a candidate once its votes equal its criteria count.
+    Monitors are not selective enough to vote, since every window is on
+    some monitor: they filter the candidates, and of the rules that only
+    match a monitor just the first one per monitor can ever win.
+    """
+
+    def __init__(self, rules=None):
+        """
+        Compile rules.
+
+        Args:
+            rules: List of WindowRule, earlier rules win over later ones
+        """
+        self.rules = list(rules or ())
+        self.required = [rule.criteria - bool(rule.monitor) for rule in self.rules]
+        self.rule_monitors = [frozenset(rule.monitor) for rule in self.rules]
+        self.titles = SubstringAutomaton(
+            (pattern, index) for index, rule in enumerate(self.rules) for pattern in rule.title
+        )
+        self.apps = self._index('app')
+        self.processes = self._index('process')
+        self.monitor_only = {}
+        for position, rule in enumerate(self.rules):
+            if not self.required[position]:
+                for monitor in rule.monitor:
+                    self.monitor_only.setdefault(monitor, position)
+        self.matched = 0
+        self.checked = 0
+
+    def _index(self, field):
+        """Map each value of one exact criterion to the rules using it."""
+        index = {}
+        for position, rule in enumerate(self.rules):
+            for value in getattr(rule, field):
+                index.setdefault(value, set()).add(position)
+        return {value: frozenset(positions) for value, positions in index.items()}
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match(self, info, monitor=None):
+        """
+        Find the rule for a window.
+
+        Args:
+            info: WindowInfo of the window
+            monitor: Index of the monitor the window is on, or None if unknown
+
+        Returns:
+            The first matching WindowRule, or None
+        """
+        self.checked += 1
+        votes = {}
+        candidates = (
+            self.titles.search(info.title.lower()) if len(self.titles) > 1 else (),
+            self.apps.get(info.app.lower(), ()),
+            self.processes.get(info.process.lower(), ()),
+        )
+        for positions in candidates:
+            for position in positions:
+                votes[position] = votes.get(position, 0) + 1
+
+        required = self.required
+        rule_monitors = self.rule_monitors
+        best = self.monitor_only.get(monitor)
+        for position, count in votes.items():
+            if count != required[position] or (best is not None and position > best):
+                continue
+            if rule_monitors[position] and monitor not in rule_monitors[position]:
+                continue
+            best = position
+        if best is None:
+            return None
+        self.matched += 1
+        return self.rules[best]
+
+    def diagnostics(self):
+        """
+        Describe the compiled rules for troubleshooting.
+
+        Returns:
+            Dictionary with rule count, automaton size, windows checked and matched
+        """
+        return {
+            'rules': len(self.rules),
+            'title_states': len(self.titles),
+            'checked': self.checked,
+            'matched': self.matched,
+        }